@@ -0,0 +1,158 @@
+"""
+Shared setup for the HealthBot benchmark scripts.
+
+Puts the backend on the import path, provides local-testing environment
+defaults (like generate_graph_image.py) and stand-ins for the LLM and Tavily
+so the graph can run without any network access.
+"""
+
+import json
+import os
+import random
+import sys
+import time
+
+# Add the backend directory to the path so `src.handlers` imports resolve
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Set up environment variables for local testing
+os.environ.setdefault('OPENAI_API_KEY', 'test-key')
+os.environ.setdefault('TAVILY_API_KEY', 'test-key')
+os.environ.setdefault('OPENAI_BASE_URL', 'https://api.openai.com/v1')
+os.environ.setdefault('AWS_REGION', 'us-east-1')
+os.environ.setdefault('SESSION_STATE_TABLE', 'healthbot-test-table')
+os.environ.setdefault('CHAT_SESSIONS_TABLE', 'healthbot-test-chat-sessions')
+os.environ.setdefault('RATE_LIMIT_TABLE', 'healthbot-test-rate-limits')
+os.environ.setdefault('IDEMPOTENCY_TABLE', 'healthbot-test-idempotency')
+os.environ.setdefault('JOBS_TABLE', 'healthbot-test-jobs')
+os.environ.setdefault('CONNECTIONS_TABLE', 'healthbot-test-connections')
+os.environ.setdefault('USER_MESSAGES_TABLE', 'healthbot-test-user-messages')
+os.environ.setdefault('METRICS_DISABLED', 'true')
+# Load tests drive many turns per user; keep the limiter in the path but out of the way
+os.environ.setdefault('RATE_LIMIT_CAPACITY', '100000')
+
+
+QUESTION_JSON = json.dumps({
+    "question": "Which of these is a common symptom of type 2 diabetes?",
+    "choices": ["Increased thirst", "Hair turning green", "Sudden height gain", "Improved night vision"],
+    "correct_letter": "A"
+})
+
+SUMMARY_TEXT = (
+    "Type 2 diabetes is a long-term condition that affects how the body uses sugar [1]. "
+    "Common signs include increased thirst and frequent urination [2]. "
+    "Healthy eating and regular activity help manage blood sugar [3].\n\n"
+    "Key Points:\n- It affects blood sugar [1]\n- Symptoms can be mild [2]\n- Lifestyle matters [3]"
+)
+
+EXPLANATION_TEXT = "Increased thirst is a common early sign because high blood sugar pulls fluid from tissues [2]."
+
+
+VOCABULARY = (
+    "blood sugar insulin glucose pancreas kidney nerve vision heart weight diet fiber exercise walking "
+    "sleep stress medication metformin dose monitoring test hemoglobin a1c doctor nurse dietitian clinic "
+    "family history age risk genetics obesity activity vegetables grains protein fats sodium pressure "
+    "cholesterol circulation foot wound infection thirst urination fatigue blurred tingling numbness "
+    "screening prevention education support goals plan habits routine meals snacks hydration symptoms"
+).split()
+
+
+def sample_search_payload(topic: str, results: int = 8) -> dict:
+    """
+    A Tavily-shaped response with realistic snippet sizes, a paragraph that
+    most sites repeat, and the usual navigation boilerplate.
+    """
+    domains = ["mayoclinic.org", "healthline.com", "webmd.com", "medlineplus.gov", "cdc.gov", "nih.gov"]
+    shared = (
+        f"{topic.capitalize()} is a condition that many people live with. Symptoms can include fatigue, "
+        "increased thirst and frequent urination. Treatment usually combines lifestyle changes with "
+        "medication, and regular check-ups help catch complications early."
+    )
+    facets = ["causes", "symptoms", "diagnosis", "treatment", "diet", "exercise", "complications", "prevention"]
+    payload_results = []
+    for i in range(results):
+        facet = facets[i % len(facets)]
+        rng = random.Random(f"{topic}-{i}")
+        unique = " ".join(
+            f"{facet.capitalize()} of {topic} " + " ".join(rng.sample(VOCABULARY, 18)) + "."
+            for _ in range(4)
+        )
+        payload_results.append({
+            "url": f"https://www.{domains[i % len(domains)]}/{topic.replace(' ', '-')}/{facet}",
+            "title": f"{topic.title()}: {facet}",
+            "content": f"Skip to main content\nAdvertisement\n{shared}\n{unique}\nPrivacy Policy | Terms of Use",
+            "score": round(0.95 - i * 0.05, 2),
+        })
+    return {"query": topic, "results": payload_results}
+
+
+def canned_reply(prompt_text: str) -> str:
+    """Pick the canned completion matching whichever node built the prompt."""
+    if "multiple-choice" in prompt_text:
+        return QUESTION_JSON
+    if "Student selected" in prompt_text:
+        return EXPLANATION_TEXT
+    return SUMMARY_TEXT
+
+
+class FakeResponse:
+    def __init__(self, content: str):
+        self.content = content
+        self.usage_metadata = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+
+
+class FakeLLM:
+    """Chat model stand-in that answers each node's prompt with canned content."""
+
+    def __init__(self, latency_seconds: float = 0.0):
+        self.latency_seconds = latency_seconds
+
+    def invoke(self, messages, *args, **kwargs):
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return FakeResponse(canned_reply(" ".join(str(getattr(m, "content", m)) for m in messages)))
+
+
+class FakeTavilyClient:
+    def __init__(self, latency_seconds: float = 0.0):
+        self.latency_seconds = latency_seconds
+
+    def search(self, query, **kwargs):
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return sample_search_payload(query, kwargs.get("max_results", 8))
+
+
+def install_fakes(llm_latency: float = 0.0, search_latency: float = 0.0) -> None:
+    """Point every node and tool at the local stand-ins."""
+    from src.handlers import tools
+    from src.handlers.nodes import quiz_nodes, summary_nodes
+
+    llm = FakeLLM(llm_latency)
+    summary_nodes.get_llm = lambda *args, **kwargs: llm
+    quiz_nodes.get_llm = lambda *args, **kwargs: llm
+    tools.get_tavily_client = lambda: FakeTavilyClient(search_latency)
+
+
+# One full learning loop: topic -> summary -> quiz -> answer -> restart
+SESSION_SCRIPT = [
+    ("topic", "type 2 diabetes"),
+    ("confirmation", "ready"),
+    ("answer", "A"),
+    ("restart", "yes"),
+]
+
+
+class quiet:
+    """Silence the nodes' debug prints while timing."""
+
+    def __enter__(self):
+        self._stdout = sys.stdout
+        sys.stdout = open(os.devnull, "w")
+        return self
+
+    def __exit__(self, *exc):
+        sys.stdout.close()
+        sys.stdout = self._stdout
+        return False
@@ -0,0 +1,211 @@
+"""
+Local HTTP stand-ins for the OpenAI-compatible relay and the Tavily search API.
+
+Both run on a background thread and bind to 127.0.0.1 on a free port. Point
+the backend at them through OPENAI_BASE_URL and TAVILY_BASE_URL.
+"""
+
+import glob
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+from common import canned_reply, sample_search_payload
+
+
+class _Server:
+    handler_class = BaseHTTPRequestHandler
+
+    def __init__(self):
+        self.requests = 0
+        self._lock = threading.Lock()
+        service = self
+
+        class Handler(self.handler_class):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                with service._lock:
+                    service.requests += 1
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                service.handle(self, body)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def handle(self, request: BaseHTTPRequestHandler, body: Dict):
+        raise NotImplementedError
+
+    @staticmethod
+    def send_json(request: BaseHTTPRequestHandler, payload: Dict, status: int = 200):
+        data = json.dumps(payload).encode()
+        request.send_response(status)
+        request.send_header("Content-Type", "application/json")
+        request.send_header("Content-Length", str(len(data)))
+        request.end_headers()
+        request.wfile.write(data)
+
+
+class FakeOpenAIServer(_Server):
+    """
+    Minimal /v1/chat/completions endpoint.
+
+    Each completion waits `latency_ms` before the first token and then
+    streams/generates at `tokens_per_second`, so end-to-end time scales with
+    output length like the real service. A `slow_rate` fraction of
+    completions are stragglers that wait an extra `slow_ms` for the first
+    token, the tail that hedged requests are meant to cut, and an
+    `error_rate` fraction fail with a 500 after the usual latency.
+    """
+
+    def __init__(self, latency_ms: float = 300.0, tokens_per_second: float = 80.0,
+                 slow_rate: float = 0.0, slow_ms: float = 0.0, error_rate: float = 0.0, seed: int = 7):
+        self.latency_ms = latency_ms
+        self.tokens_per_second = tokens_per_second
+        self.slow_rate = slow_rate
+        self.slow_ms = slow_ms
+        self.error_rate = error_rate
+        self.stragglers = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        super().__init__()
+
+    @property
+    def base_url(self) -> str:
+        return f"{self.url}/v1"
+
+    def handle(self, request, body):
+        prompt = " ".join(str(m.get("content", "")) for m in body.get("messages", []))
+        content = canned_reply(prompt)
+        max_tokens = body.get("max_tokens") or body.get("max_completion_tokens")
+        finish_reason = "stop"
+        if max_tokens and len(content) > max_tokens * 4:
+            content = content[:max_tokens * 4]
+            finish_reason = "length"
+        prompt_tokens = max(len(prompt) // 4, 1)
+        completion_tokens = max(len(content) // 4, 1)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        model = body.get("model", "gpt-4o-mini")
+
+        with self._lock:
+            straggler = self._random.random() < self.slow_rate
+            failing = self._random.random() < self.error_rate
+            self.stragglers += straggler
+            self.errors += failing
+        time.sleep((self.latency_ms + (self.slow_ms if straggler else 0)) / 1000)
+        if failing:
+            self.send_json(request, {"error": {"message": "upstream unavailable", "type": "server_error"}}, status=500)
+            return
+        if body.get("stream"):
+            try:
+                self._stream(request, completion_id, model, content, prompt_tokens, completion_tokens, finish_reason)
+            except (BrokenPipeError, ConnectionResetError):
+                # The client closed the stream, e.g. the losing side of a hedged request
+                pass
+            return
+
+        time.sleep(completion_tokens / self.tokens_per_second)
+        self.send_json(request, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": finish_reason,
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        })
+
+    def _stream(self, request, completion_id, model, content, prompt_tokens, completion_tokens, finish_reason):
+        request.send_response(200)
+        request.send_header("Content-Type", "text/event-stream")
+        request.send_header("Connection", "close")
+        request.end_headers()
+        words = content.split(" ")
+        per_word = (completion_tokens / self.tokens_per_second) / max(len(words), 1)
+        for i, word in enumerate(words):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": word if i == 0 else " " + word}, "finish_reason": None}],
+            }
+            request.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            request.wfile.flush()
+            time.sleep(per_word)
+        final = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+        request.wfile.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode())
+        request.wfile.flush()
+        request.close_connection = True
+
+
+class FakeTavilyServer(_Server):
+    """
+    Tavily /search stand-in that replays recorded payloads.
+
+    A recorded payload is served when its "query" matches the request
+    (case-insensitive); any other query gets a generated sample payload.
+    """
+
+    def __init__(self, payload_dir: Optional[str] = None, latency_ms: float = 800.0):
+        self.latency_ms = latency_ms
+        self.payloads: Dict[str, Dict] = {}
+        for path in sorted(glob.glob(os.path.join(payload_dir or "", "*.json"))) if payload_dir else []:
+            with open(path) as f:
+                payload = json.load(f)
+            self.payloads[payload.get("query", "").strip().lower()] = payload
+        super().__init__()
+
+    def handle(self, request, body):
+        query = (body.get("query") or "").strip()
+        time.sleep(self.latency_ms / 1000)
+        payload = self.payloads.get(query.lower()) or sample_search_payload(query, body.get("max_results", 8))
+        self.send_json(request, payload)
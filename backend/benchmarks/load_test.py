@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Offline end-to-end load test for the HealthBot backend.
+
+Runs process_user_message.handler (or the compiled graph directly) against
+local stand-ins only:
+  - a fake OpenAI-compatible server with configurable latency and token rate,
+  - a fake Tavily server replaying recorded payloads from benchmarks/payloads/,
+  - in-memory DynamoDB tables for chat sessions, user messages and
+    checkpoints, plus the rate limit, idempotency, job and other handler
+    tables. Checkpoints go through the real DynamoDBSaver (behind the
+    production checkpoint cache), so its item layout, serialization and
+    batched writes run as deployed, and --dynamodb-latency-ms applies to
+    every checkpoint read and write.
+
+Each virtual user drives scripted sessions (topic -> confirmation -> answer ->
+restart) and the script reports throughput plus p50/p95/p99 latency per turn
+type.
+
+Usage: python benchmarks/load_test.py [--users 20] [--concurrency 10] [--loops 2]
+                                      [--target handler|graph] [--llm-latency-ms 300]
+                                      [--llm-tokens-per-second 80] [--search-latency-ms 800]
+                                      [--duplicate-rate 0.2] [--async] [--progress] [--no-single-flight]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import common
+from common import SESSION_SCRIPT
+from fake_services import FakeOpenAIServer, FakeTavilyServer
+from local_dynamodb import LocalBoto3, create_healthbot_tables
+from local_queue import LocalJobQueue
+from local_websocket import LocalWebSocketGateway
+
+
+
+class FakeLambdaContext:
+    """The parts of the Lambda context object the handler may use."""
+
+    # The processUserMessage timeout; --lambda-timeout-seconds shrinks it
+    timeout_ms = 180_000
+
+    def __init__(self, timeout_ms: int = None):
+        self.aws_request_id = str(uuid.uuid4())
+        self.function_name = "healthbot-backend-dev-processUserMessage"
+        self.memory_limit_in_mb = 1024
+        self._deadline = time.monotonic() + (timeout_ms or self.timeout_ms) / 1000
+
+    def get_remaining_time_in_millis(self) -> int:
+        return max(int((self._deadline - time.monotonic()) * 1000), 0)
+
+
+def api_event(user_id: str, session_id: str, message_type: str, message: str, idempotency_key: str = None,
+              async_mode: bool = False) -> dict:
+    """An API Gateway proxy event as delivered through the Cognito authorizer."""
+    body = {"message": message, "sessionId": session_id, "messageType": message_type, "async": async_mode}
+    if idempotency_key:
+        body["idempotencyKey"] = idempotency_key
+    return {
+        "path": "/api/messages",
+        "httpMethod": "POST",
+        "headers": {"Content-Type": "application/json"},
+        "requestContext": {
+            "authorizer": {"claims": {"sub": user_id, "email": f"{user_id}@example.com"}},
+        },
+        "body": json.dumps(body),
+    }
+
+
+def install_local_backends(args):
+    """Point every external dependency of the backend at a local stand-in."""
+    openai = FakeOpenAIServer(args.llm_latency_ms, args.llm_tokens_per_second,
+                              args.llm_slow_rate, args.llm_slow_ms, args.llm_error_rate).start()
+    tavily = FakeTavilyServer(args.payloads, args.search_latency_ms).start()
+    os.environ["OPENAI_BASE_URL"] = openai.base_url
+    os.environ["TAVILY_BASE_URL"] = tavily.url
+
+    from src.handlers import (circuit_breaker, idempotency, job_worker, jobs, rate_limiter,
+                              session_manager, single_flight)
+    from src.utils import secrets_manager
+    from langgraph_checkpoint_dynamodb import saver as dynamodb_saver
+
+    if args.no_hedging:
+        os.environ["LLM_HEDGING_DISABLED"] = "true"
+    if args.no_single_flight:
+        os.environ["SINGLE_FLIGHT_DISABLED"] = "true"
+    else:
+        os.environ.setdefault("SINGLE_FLIGHT_TABLE", "healthbot-test-single-flight")
+    # Breaker state is shared through the table, as it is between containers
+    os.environ.setdefault("CIRCUIT_BREAKER_TABLE", "healthbot-test-circuit-breakers")
+
+    db = create_healthbot_tables(os.environ, args.dynamodb_latency_ms)
+    session_manager._dynamodb = db
+    rate_limiter._dynamodb = db
+    single_flight._dynamodb = db
+    circuit_breaker._dynamodb = db
+    idempotency._dynamodb = db
+    jobs._dynamodb = db
+
+    # Async turns go through an in-process queue to worker threads running
+    # the real job_worker handler
+    job_queue = None
+    if args.async_jobs:
+        os.environ["JOB_QUEUE_URL"] = "local-job-queue"
+        job_queue = LocalJobQueue(job_worker.handler, workers=args.concurrency,
+                                  context_factory=FakeLambdaContext,
+                                  dead_letter_handler=jobs.dead_letter_handler).start()
+        jobs._sqs = job_queue
+
+    # Each virtual user holds a WebSocket connection that receives progress events
+    websockets = LocalWebSocketGateway().install(db) if args.progress else None
+
+    # The real DynamoDBSaver builds its own boto3 clients; hand it the
+    # in-memory SessionStateTable instead
+    dynamodb_saver.boto3 = LocalBoto3(db)
+
+    # Keys are already in the environment; skip the Secrets Manager call
+    secrets_manager.get_secrets = lambda: {}
+    return openai, tavily, db, job_queue, websockets
+
+
+def wait_for_job(user_id: str, job_id: str, poll_seconds: float = 0.05, timeout_seconds: float = 180) -> dict:
+    """Poll GET /api/jobs/{jobId} until the job finishes; returns the message response it stored."""
+    from src.handlers.session_history import job_status_handler
+
+    event = {
+        "path": f"/api/jobs/{job_id}",
+        "httpMethod": "GET",
+        "headers": {},
+        "pathParameters": {"jobId": job_id},
+        "requestContext": {"authorizer": {"claims": {"sub": user_id}}},
+    }
+    deadline = time.monotonic() + timeout_seconds
+    while time.monotonic() < deadline:
+        status = job_status_handler(event, None)
+        view = json.loads(status["body"])
+        if status["statusCode"] != 200 or view["status"] in ("succeeded", "failed"):
+            return {"statusCode": view.get("statusCode", status["statusCode"]), "body": json.dumps(view.get("result", view))}
+        time.sleep(poll_seconds)
+    return {"statusCode": 504, "body": json.dumps({"error": f"job {job_id} did not finish"})}
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--users", type=int, default=20, help="virtual users, one session each")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--loops", type=int, default=2, help="learning loops per session")
+    parser.add_argument("--target", choices=["handler", "graph"], default="handler")
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0)
+    parser.add_argument("--llm-tokens-per-second", type=float, default=80.0)
+    parser.add_argument("--llm-slow-rate", type=float, default=0.0,
+                        help="fraction of LLM requests that stall before the first token")
+    parser.add_argument("--llm-slow-ms", type=float, default=5000.0, help="extra first-token delay of a stalled request")
+    parser.add_argument("--lambda-timeout-seconds", type=float, default=180.0,
+                        help="function timeout seen through the Lambda context, which sets each turn's deadline")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0,
+                        help="fraction of LLM requests answered with a 500, to trip the circuit breaker")
+    parser.add_argument("--no-hedging", action="store_true",
+                        help="never send a hedged LLM request, however late the first token")
+    parser.add_argument("--search-latency-ms", type=float, default=800.0)
+    parser.add_argument("--dynamodb-latency-ms", type=float, default=5.0)
+    parser.add_argument("--duplicate-rate", type=float, default=0.0,
+                        help="fraction of turns the client re-sends (same idempotency key) while the original runs")
+    parser.add_argument("--async", dest="async_jobs", action="store_true",
+                        help="submit turns as async jobs (202 + polling) run by queue workers")
+    parser.add_argument("--progress", action="store_true",
+                        help="connect each user to the WebSocket stand-in and report progress event timing")
+    parser.add_argument("--no-single-flight", action="store_true",
+                        help="give every user its own search and summary instead of coalescing identical ones")
+    parser.add_argument("--payloads", default=os.path.join(os.path.dirname(__file__), "payloads"))
+    args = parser.parse_args()
+
+    FakeLambdaContext.timeout_ms = int(args.lambda_timeout_seconds * 1000)
+    openai, tavily, db, job_queue, websockets = install_local_backends(args)
+
+    from src.handlers.healthbot_graph import build_graph
+    from src.handlers.process_user_message import handler
+
+    graph = None
+    if args.target == "graph":
+        with contextlib.redirect_stdout(open(os.devnull, "w")):
+            graph = build_graph()
+
+    latencies = {}
+    accepted = []
+    first_progress = []
+    progress_counts = {}
+    errors = []
+    lock = threading.Lock()
+
+    duplicates = {"sent": 0, "replayed": 0, "mismatched": 0}
+    rng = random.Random(11)
+
+    def send_duplicate(event, result):
+        # A client retry that arrives while the original is still running
+        time.sleep(0.05)
+        result.append(handler(event, FakeLambdaContext()))
+
+    def run_user(index: int):
+        user_id = f"load-user-{index}"
+        session_id = str(uuid.uuid4())
+        connection_id = websockets.connect(user_id) if websockets else None
+        for _ in range(args.loops):
+            for message_type, message in SESSION_SCRIPT:
+                started = time.perf_counter()
+                if args.target == "handler":
+                    event = api_event(user_id, session_id, message_type, message, str(uuid.uuid4()), args.async_jobs)
+                    retry, retry_result = None, []
+                    with lock:
+                        duplicate = rng.random() < args.duplicate_rate
+                    if duplicate:
+                        retry = threading.Thread(target=send_duplicate, args=(event, retry_result))
+                        retry.start()
+                    response = submitted = handler(event, FakeLambdaContext())
+                    if args.async_jobs and submitted["statusCode"] == 202:
+                        with lock:
+                            accepted.append((time.perf_counter() - started) * 1000)
+                        response = wait_for_job(user_id, json.loads(submitted["body"])["jobId"])
+                    ok = response["statusCode"] == 200
+                    detail = response["body"]
+                    if connection_id:
+                        frames = [f for f in websockets.frames_since(connection_id, started)
+                                  if f[1]["sessionId"] == session_id]
+                        with lock:
+                            progress_counts.setdefault(message_type, []).append(len(frames))
+                            if frames:
+                                first_progress.append((frames[0][0] - started) * 1000)
+                    if retry is not None:
+                        retry.join()
+                        with lock:
+                            duplicates["sent"] += 1
+                            replayed = retry_result[0]["headers"].get("Idempotent-Replayed") == "true"
+                            duplicates["replayed"] += replayed
+                            duplicates["mismatched"] += retry_result[0]["body"] != submitted["body"]
+                else:
+                    state = graph.invoke(
+                        {"user_message": message, "message_type": message_type, "messages": []},
+                        config={"configurable": {"thread_id": session_id}, "recursion_limit": 50}
+                    )
+                    ok = bool(state.get("bot_message"))
+                    detail = state.get("status")
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                with lock:
+                    latencies.setdefault(message_type, []).append(elapsed_ms)
+                    if not ok:
+                        errors.append((message_type, detail))
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(run_user, range(args.users)))
+    wall_seconds = time.perf_counter() - started
+
+    openai.stop()
+    tavily.stop()
+    if job_queue is not None:
+        job_queue.stop()
+
+    total_turns = sum(len(v) for v in latencies.values())
+    print(f"Target: {args.target}  users: {args.users}  concurrency: {args.concurrency}  loops: {args.loops}")
+    print(f"Turns: {total_turns} in {wall_seconds:.2f}s -> {total_turns / wall_seconds:.2f} turns/s, errors: {len(errors)}")
+    print(f"\n{'turn type':<14} {'count':>6} {'mean':>9} {'p50':>9} {'p95':>9} {'p99':>9}  (ms)")
+    for message_type, _ in SESSION_SCRIPT:
+        samples = latencies.get(message_type, [])
+        print(f"{message_type:<14} {len(samples):>6} {statistics.mean(samples) if samples else 0:>9.1f} "
+              f"{percentile(samples, 50):>9.1f} {percentile(samples, 95):>9.1f} {percentile(samples, 99):>9.1f}")
+    if args.async_jobs:
+        print(f"{'202 accepted':<14} {len(accepted):>6} {statistics.mean(accepted) if accepted else 0:>9.1f} "
+              f"{percentile(accepted, 50):>9.1f} {percentile(accepted, 95):>9.1f} {percentile(accepted, 99):>9.1f}")
+        print(f"Jobs queued: {job_queue.sent}  dead-lettered: {len(job_queue.dead_letters)}")
+    if websockets:
+        counts = ", ".join(f"{t} {statistics.mean(c):.1f}" for t, c in progress_counts.items())
+        print(f"Progress events per turn: {counts}")
+        print(f"First progress event after submit: p50 {percentile(first_progress, 50):.1f} ms, "
+              f"p95 {percentile(first_progress, 95):.1f} ms")
+    print(f"\nLLM requests: {openai.requests} ({openai.stragglers} stalled, {openai.errors} failed)  "
+          f"search requests: {tavily.requests}")
+    if duplicates["sent"]:
+        print(f"Duplicate submissions: {duplicates['sent']} sent, {duplicates['replayed']} replayed, "
+              f"{duplicates['mismatched']} with a different response")
+        if duplicates["mismatched"]:
+            errors.append(("duplicate", f"{duplicates['mismatched']} duplicate(s) got a different response"))
+    print(f"DynamoDB calls: {json.dumps(db.calls(), sort_keys=True)}")
+    for message_type, detail in errors[:5]:
+        print(f"❌ {message_type}: {detail}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,636 @@
+"""
+In-memory stand-in for the boto3 DynamoDB resource and client APIs.
+
+Implements the subset of `Table` the backend uses (get/put/update/delete_item,
+batch_writer, query with key conditions, indexes and pagination, scan)
+including the expression syntax of UpdateExpression, ConditionExpression,
+KeyConditionExpression, FilterExpression and ProjectionExpression. Failed
+conditions raise the same botocore ClientError as the real service, and
+numbers come back as Decimal, so code that works here behaves the same way
+against DynamoDB.
+
+The client covers the table management calls DynamoDBSaver makes on startup
+(describe_table, create_table, the table_exists waiter and point-in-time
+recovery), and LocalBoto3 hands both to code that builds its own clients
+through the boto3 module.
+"""
+
+import copy
+import re
+import threading
+import time
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from boto3.dynamodb.conditions import ConditionBase, ConditionExpressionBuilder
+from botocore.exceptions import ClientError, WaiterError
+
+
+class ResourceNotFoundException(ClientError):
+    pass
+
+
+class ResourceInUseException(ClientError):
+    pass
+
+
+_MODELED_ERRORS = {"ResourceNotFoundException": ResourceNotFoundException,
+                   "ResourceInUseException": ResourceInUseException}
+
+# DynamoDB's BatchWriteItem limit
+BATCH_WRITE_SIZE = 25
+
+
+def _client_error(code: str, message: str, operation: str) -> ClientError:
+    # Modeled errors are subclasses, as on `client.exceptions`, so both ways of catching them work
+    return _MODELED_ERRORS.get(code, ClientError)({"Error": {"Code": code, "Message": message}}, operation)
+
+
+def _to_dynamo(value: Any) -> Any:
+    """Mirror the boto3 serializer: ints become Decimal, floats are rejected."""
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, float):
+        raise TypeError("Float types are not supported. Use Decimal types instead.")
+    if isinstance(value, int):
+        return Decimal(value)
+    if isinstance(value, dict):
+        return {k: _to_dynamo(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_dynamo(v) for v in value]
+    if isinstance(value, set):
+        return {_to_dynamo(v) for v in value}
+    return value
+
+
+_TOKEN_RE = re.compile(r"\s*(<>|<=|>=|=|<|>|\(|\)|,|\+|-|[#:]?[A-Za-z_][A-Za-z0-9_.]*)")
+
+
+class _Parser:
+    """Recursive-descent parser for DynamoDB expressions over one item."""
+
+    def __init__(self, expression: str, names: Optional[Dict[str, str]], values: Optional[Dict[str, Any]]):
+        self.tokens = []
+        pos = 0
+        expression = expression.strip()
+        while pos < len(expression):
+            match = _TOKEN_RE.match(expression, pos)
+            if not match:
+                raise _client_error("ValidationException", f"Invalid expression near: {expression[pos:]}", "Expression")
+            self.tokens.append(match.group(1))
+            pos = match.end()
+        self.pos = 0
+        self.names = names or {}
+        self.values = {k: _to_dynamo(v) for k, v in (values or {}).items()}
+
+    def matches(self, item: Dict[str, Any]) -> bool:
+        """Evaluate the whole condition against an item, reusing the parsed tokens."""
+        self.pos = 0
+        return self.condition(item)
+
+    def peek(self, offset: int = 0) -> Optional[str]:
+        index = self.pos + offset
+        return self.tokens[index] if index < len(self.tokens) else None
+
+    def take(self, expected: Optional[str] = None) -> str:
+        token = self.peek()
+        if token is None or (expected is not None and token.upper() != expected.upper()):
+            raise _client_error("ValidationException", f"Expected {expected}, got {token}", "Expression")
+        self.pos += 1
+        return token
+
+    def at_end(self) -> bool:
+        return self.pos >= len(self.tokens)
+
+    def path(self) -> str:
+        token = self.take()
+        return self.names.get(token, token) if token.startswith("#") else token
+
+    # Operands --------------------------------------------------------------
+
+    def operand(self, item: Dict[str, Any]) -> Any:
+        token = self.peek()
+        if token.startswith(":"):
+            self.pos += 1
+            if token not in self.values:
+                raise _client_error("ValidationException", f"Missing value {token}", "Expression")
+            return self.values[token]
+        if token == "if_not_exists":
+            self.take()
+            self.take("(")
+            name = self.path()
+            self.take(",")
+            default = self.value(item)
+            self.take(")")
+            return item.get(name, default)
+        if token == "list_append":
+            self.take()
+            self.take("(")
+            first = self.value(item)
+            self.take(",")
+            second = self.value(item)
+            self.take(")")
+            return list(first or []) + list(second or [])
+        if token == "size":
+            self.take()
+            self.take("(")
+            value = item.get(self.path())
+            self.take(")")
+            return Decimal(len(value)) if value is not None else None
+        return item.get(self.path())
+
+    def value(self, item: Dict[str, Any]) -> Any:
+        result = self.operand(item)
+        while self.peek() in ("+", "-"):
+            op = self.take()
+            right = self.operand(item)
+            result = result + right if op == "+" else result - right
+        return result
+
+    # Conditions ------------------------------------------------------------
+
+    def condition(self, item: Dict[str, Any]) -> bool:
+        result = self.and_condition(item)
+        while self.peek() and self.peek().upper() == "OR":
+            self.take()
+            right = self.and_condition(item)
+            result = result or right
+        return result
+
+    def and_condition(self, item: Dict[str, Any]) -> bool:
+        result = self.not_condition(item)
+        while self.peek() and self.peek().upper() == "AND":
+            self.take()
+            right = self.not_condition(item)
+            result = result and right
+        return result
+
+    def not_condition(self, item: Dict[str, Any]) -> bool:
+        if self.peek() and self.peek().upper() == "NOT":
+            self.take()
+            return not self.not_condition(item)
+        return self.comparison(item)
+
+    def comparison(self, item: Dict[str, Any]) -> bool:
+        token = self.peek()
+        if token == "(":
+            self.take()
+            result = self.condition(item)
+            self.take(")")
+            return result
+        if token in ("attribute_exists", "attribute_not_exists"):
+            self.take()
+            self.take("(")
+            name = self.path()
+            self.take(")")
+            return (name in item) == (token == "attribute_exists")
+        if token in ("begins_with", "contains"):
+            self.take()
+            self.take("(")
+            left = self.operand(item)
+            self.take(",")
+            right = self.operand(item)
+            self.take(")")
+            if left is None:
+                return False
+            return left.startswith(right) if token == "begins_with" else right in left
+
+        left = self.value(item)
+        op = self.take()
+        if op.upper() == "BETWEEN":
+            low = self.value(item)
+            self.take("AND")
+            high = self.value(item)
+            return left is not None and low <= left <= high
+        right = self.value(item)
+        if op == "=":
+            return left == right
+        if op == "<>":
+            return left != right
+        if left is None or right is None:
+            return False
+        try:
+            return {"<": left < right, "<=": left <= right, ">": left > right, ">=": left >= right}[op]
+        except TypeError:
+            return False
+
+    # Updates ---------------------------------------------------------------
+
+    def apply_update(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        original = copy.deepcopy(item)
+        while not self.at_end():
+            clause = self.take().upper()
+            while True:
+                if clause == "SET":
+                    name = self.path()
+                    self.take("=")
+                    item[name] = self.value(original)
+                elif clause == "REMOVE":
+                    item.pop(self.path(), None)
+                elif clause == "ADD":
+                    name = self.path()
+                    delta = self.operand(original)
+                    current = item.get(name)
+                    if isinstance(delta, set):
+                        item[name] = (current or set()) | delta
+                    else:
+                        item[name] = (current or Decimal(0)) + delta
+                elif clause == "DELETE":
+                    name = self.path()
+                    delta = self.operand(original)
+                    item[name] = (item.get(name) or set()) - delta
+                else:
+                    raise _client_error("ValidationException", f"Unsupported update clause {clause}", "UpdateItem")
+                if self.peek() == ",":
+                    self.take()
+                    continue
+                break
+        return item
+
+
+def _expression(expression: Any, names, values, is_key_condition: bool = False,
+                builder: Optional[ConditionExpressionBuilder] = None) -> Tuple[str, Dict, Dict]:
+    """
+    Accept either string expressions or boto3.dynamodb.conditions objects.
+
+    Pass the same builder for every expression of one request, as boto3 does,
+    so their generated placeholders do not collide.
+    """
+    if isinstance(expression, ConditionBase):
+        built = (builder or ConditionExpressionBuilder()).build_expression(expression, is_key_condition=is_key_condition)
+        merged_names = {**(names or {}), **built.attribute_name_placeholders}
+        merged_values = {**(values or {}), **built.attribute_value_placeholders}
+        return built.condition_expression, merged_names, merged_values
+    return expression, names or {}, values or {}
+
+
+def _project(item: Dict[str, Any], projection: Optional[str], names: Optional[Dict[str, str]]) -> Dict[str, Any]:
+    if not projection:
+        return copy.deepcopy(item)
+    fields = [names.get(f.strip(), f.strip()) if names else f.strip() for f in projection.split(",")]
+    return {f: copy.deepcopy(item[f]) for f in fields if f in item}
+
+
+class InMemoryTable:
+    """A single table with a hash key, optional range key and optional GSIs."""
+
+    def __init__(self, name: str, hash_key: str, range_key: Optional[str] = None,
+                 indexes: Optional[Dict[str, Tuple[str, Optional[str]]]] = None, latency_ms: float = 0.0):
+        self.name = name
+        self.table_name = name
+        self.hash_key = hash_key
+        self.range_key = range_key
+        self.indexes = indexes or {}
+        self.latency_ms = latency_ms
+        self.items: Dict[Tuple[Any, Any], Dict[str, Any]] = {}
+        self.calls: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        # Item keys grouped by partition key value, for the table and each GSI,
+        # so a Query only touches its own partition like the real service
+        self._partitions: Dict[Optional[str], Dict[Any, set]] = {None: {}, **{name: {} for name in self.indexes}}
+
+    def _partition_keys(self) -> Dict[Optional[str], str]:
+        return {None: self.hash_key, **{name: hash_key for name, (hash_key, _) in self.indexes.items()}}
+
+    def _store(self, key: Tuple[Any, Any], item: Optional[Dict[str, Any]]) -> None:
+        """Write (or delete, when item is None) an item and keep the partition index current."""
+        old = self.items.get(key)
+        for index, attribute in self._partition_keys().items():
+            partitions = self._partitions[index]
+            if old is not None and attribute in old:
+                partitions.get(old[attribute], set()).discard(key)
+            if item is not None and attribute in item:
+                partitions.setdefault(item[attribute], set()).add(key)
+        if item is None:
+            self.items.pop(key, None)
+        else:
+            self.items[key] = item
+
+    def _partition(self, index: Optional[str], parser: "_Parser") -> List[Dict[str, Any]]:
+        """Items in the partition named by the key condition's `hash = :value` clause."""
+        attribute = self._partition_keys()[index]
+        tokens = parser.tokens
+        for i in range(len(tokens) - 2):
+            name = parser.names.get(tokens[i], tokens[i]) if tokens[i].startswith("#") else tokens[i]
+            if name == attribute and tokens[i + 1] == "=" and tokens[i + 2] in parser.values:
+                value = parser.values[tokens[i + 2]]
+                return [self.items[key] for key in self._partitions[index].get(value, ())]
+        return list(self.items.values())
+
+    def _call(self, operation: str) -> None:
+        self.calls[operation] = self.calls.get(operation, 0) + 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+    def _key(self, key: Dict[str, Any]) -> Tuple[Any, Any]:
+        key = _to_dynamo(key)
+        if self.hash_key not in key or (self.range_key and self.range_key not in key):
+            raise _client_error("ValidationException", "The provided key element does not match the schema", "GetItem")
+        return key[self.hash_key], key.get(self.range_key) if self.range_key else None
+
+    def _check(self, item: Dict[str, Any], condition, names, values, operation: str) -> None:
+        if condition is None:
+            return
+        expression, names, values = _expression(condition, names, values)
+        if not _Parser(expression, names, values).condition(item):
+            raise _client_error("ConditionalCheckFailedException", "The conditional request failed", operation)
+
+    def get_item(self, Key, ProjectionExpression=None, ExpressionAttributeNames=None, ConsistentRead=False, **_):
+        self._call("GetItem")
+        with self._lock:
+            item = self.items.get(self._key(Key))
+            if item is None:
+                return {}
+            return {"Item": _project(item, ProjectionExpression, ExpressionAttributeNames)}
+
+    def put_item(self, Item, ConditionExpression=None, ExpressionAttributeNames=None,
+                 ExpressionAttributeValues=None, ReturnValues="NONE", **_):
+        self._call("PutItem")
+        item = _to_dynamo(copy.deepcopy(Item))
+        with self._lock:
+            key = self._key(item)
+            existing = self.items.get(key, {})
+            self._check(existing, ConditionExpression, ExpressionAttributeNames, ExpressionAttributeValues, "PutItem")
+            self._store(key, item)
+            return {"Attributes": copy.deepcopy(existing)} if ReturnValues == "ALL_OLD" and existing else {}
+
+    def update_item(self, Key, UpdateExpression, ConditionExpression=None, ExpressionAttributeNames=None,
+                    ExpressionAttributeValues=None, ReturnValues="NONE", **_):
+        self._call("UpdateItem")
+        with self._lock:
+            key = self._key(Key)
+            existing = self.items.get(key)
+            item = copy.deepcopy(existing) if existing is not None else _to_dynamo(dict(Key))
+            self._check(existing or {}, ConditionExpression, ExpressionAttributeNames,
+                        ExpressionAttributeValues, "UpdateItem")
+            updated = _Parser(UpdateExpression, ExpressionAttributeNames, ExpressionAttributeValues).apply_update(item)
+            self._store(key, updated)
+            if ReturnValues == "ALL_NEW":
+                return {"Attributes": copy.deepcopy(updated)}
+            if ReturnValues == "ALL_OLD":
+                return {"Attributes": copy.deepcopy(existing or {})}
+            if ReturnValues == "UPDATED_NEW":
+                changed = {k: v for k, v in updated.items() if (existing or {}).get(k) != v}
+                return {"Attributes": copy.deepcopy(changed)}
+            return {}
+
+    def delete_item(self, Key, ConditionExpression=None, ExpressionAttributeNames=None,
+                    ExpressionAttributeValues=None, ReturnValues="NONE", **_):
+        self._call("DeleteItem")
+        with self._lock:
+            key = self._key(Key)
+            existing = self.items.get(key, {})
+            self._check(existing, ConditionExpression, ExpressionAttributeNames,
+                        ExpressionAttributeValues, "DeleteItem")
+            self._store(key, None)
+            return {"Attributes": copy.deepcopy(existing)} if ReturnValues == "ALL_OLD" and existing else {}
+
+    def query(self, KeyConditionExpression, IndexName=None, ScanIndexForward=True, Limit=None,
+              ExclusiveStartKey=None, ProjectionExpression=None, FilterExpression=None,
+              ExpressionAttributeNames=None, ExpressionAttributeValues=None, ConsistentRead=False, **_):
+        self._call("Query")
+        hash_key, range_key = self.indexes[IndexName] if IndexName else (self.hash_key, self.range_key)
+        builder = ConditionExpressionBuilder()
+        key_expr, names, values = _expression(
+            KeyConditionExpression, ExpressionAttributeNames, ExpressionAttributeValues,
+            is_key_condition=True, builder=builder
+        )
+        if FilterExpression is not None:
+            filter_expr, names, values = _expression(FilterExpression, names, values, builder=builder)
+
+        key_parser = _Parser(key_expr, names, values)
+        with self._lock:
+            candidates = [
+                item for item in self._partition(IndexName, key_parser)
+                if hash_key in item and (range_key is None or range_key in item)
+                and key_parser.matches(item)
+            ]
+        sort_key = lambda item: (item.get(range_key) if range_key else None,
+                                 item[self.hash_key], item.get(self.range_key) if self.range_key else None)
+        candidates.sort(key=sort_key, reverse=not ScanIndexForward)
+
+        if ExclusiveStartKey:
+            start = _to_dynamo(ExclusiveStartKey)
+            start_position = (start.get(range_key) if range_key else None, start[self.hash_key],
+                              start.get(self.range_key) if self.range_key else None)
+            positions = [sort_key(item) for item in candidates]
+            candidates = [
+                item for item, position in zip(candidates, positions)
+                if (position > start_position if ScanIndexForward else position < start_position)
+            ]
+
+        # Limit applies before the filter, exactly like DynamoDB
+        page = candidates[:Limit] if Limit else candidates
+        last_key = None
+        if Limit and len(candidates) > Limit:
+            last = page[-1]
+            last_key = {self.hash_key: last[self.hash_key]}
+            if self.range_key:
+                last_key[self.range_key] = last[self.range_key]
+            if IndexName:
+                last_key[hash_key] = last[hash_key]
+                if range_key:
+                    last_key[range_key] = last[range_key]
+
+        scanned = len(page)
+        if FilterExpression is not None:
+            filter_parser = _Parser(filter_expr, names, values)
+            page = [item for item in page if filter_parser.matches(item)]
+
+        response = {
+            "Items": [_project(item, ProjectionExpression, names) for item in page],
+            "Count": len(page),
+            "ScannedCount": scanned,
+        }
+        if last_key:
+            response["LastEvaluatedKey"] = copy.deepcopy(last_key)
+        return response
+
+    def scan(self, **kwargs):
+        self._call("Scan")
+        with self._lock:
+            items = [copy.deepcopy(item) for item in self.items.values()]
+        return {"Items": items, "Count": len(items), "ScannedCount": len(items)}
+
+    def batch_writer(self, overwrite_by_pkeys=None):
+        return _BatchWriter(self)
+
+    def batch_write(self, requests: List[Tuple[str, Dict[str, Any]]]) -> None:
+        """One BatchWriteItem call: unconditional puts and deletes, ('put', item) or ('delete', key)."""
+        if len(requests) > BATCH_WRITE_SIZE:
+            raise _client_error("ValidationException", "Too many items requested for the BatchWriteItem call",
+                                "BatchWriteItem")
+        self._call("BatchWriteItem")
+        with self._lock:
+            for action, body in requests:
+                body = _to_dynamo(copy.deepcopy(body))
+                self._store(self._key(body), body if action == "put" else None)
+
+    def describe(self) -> Dict[str, Any]:
+        key_schema = [{"AttributeName": self.hash_key, "KeyType": "HASH"}]
+        if self.range_key:
+            key_schema.append({"AttributeName": self.range_key, "KeyType": "RANGE"})
+        return {
+            "TableName": self.name,
+            "TableStatus": "ACTIVE",
+            "KeySchema": key_schema,
+            "BillingModeSummary": {"BillingMode": "PAY_PER_REQUEST"},
+            "ItemCount": len(self.items),
+        }
+
+
+class _BatchWriter:
+    """Stand-in for `Table.batch_writer()`: buffers puts and deletes and sends them 25 at a time."""
+
+    def __init__(self, table: InMemoryTable):
+        self.table = table
+        self._requests: List[Tuple[str, Dict[str, Any]]] = []
+
+    def put_item(self, Item):
+        self._requests.append(("put", Item))
+        self._flush(full_only=True)
+
+    def delete_item(self, Key):
+        self._requests.append(("delete", Key))
+        self._flush(full_only=True)
+
+    def _flush(self, full_only: bool = False) -> None:
+        while self._requests and (len(self._requests) >= BATCH_WRITE_SIZE or not full_only):
+            batch, self._requests = self._requests[:BATCH_WRITE_SIZE], self._requests[BATCH_WRITE_SIZE:]
+            self.table.batch_write(batch)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._flush()
+        return False
+
+
+class InMemoryDynamoDB:
+    """Stand-in for `boto3.resource('dynamodb')` holding any number of tables."""
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.tables: Dict[str, InMemoryTable] = {}
+
+    def create_table(self, name: str, hash_key: str, range_key: Optional[str] = None,
+                     indexes: Optional[Dict[str, Tuple[str, Optional[str]]]] = None) -> InMemoryTable:
+        table = InMemoryTable(name, hash_key, range_key, indexes, self.latency_ms)
+        self.tables[name] = table
+        return table
+
+    def Table(self, name: str) -> InMemoryTable:
+        if name not in self.tables:
+            raise _client_error("ResourceNotFoundException", f"Requested resource not found: Table: {name}", "DescribeTable")
+        return self.tables[name]
+
+    def calls(self) -> Dict[str, int]:
+        totals: Dict[str, int] = {}
+        for table in self.tables.values():
+            for operation, count in table.calls.items():
+                totals[operation] = totals.get(operation, 0) + count
+        return totals
+
+    def client(self) -> "InMemoryDynamoDBClient":
+        return InMemoryDynamoDBClient(self)
+
+
+class _Waiter:
+    def __init__(self, client: "InMemoryDynamoDBClient", exists: bool):
+        self.client = client
+        self.exists = exists
+
+    def wait(self, TableName, **_):
+        # Tables are ACTIVE as soon as they are created
+        if (TableName in self.client.db.tables) != self.exists:
+            raise WaiterError(f"Table{'Exists' if self.exists else 'NotExists'}", "table never reached the expected state",
+                              {"TableName": TableName})
+
+
+class InMemoryDynamoDBClient:
+    """Stand-in for `boto3.client('dynamodb')`: the table management calls, over an InMemoryDynamoDB."""
+
+    class exceptions:
+        ResourceNotFoundException = ResourceNotFoundException
+        ResourceInUseException = ResourceInUseException
+
+    class meta:
+        region_name = "local"
+
+    def __init__(self, db: InMemoryDynamoDB):
+        self.db = db
+        self._point_in_time_recovery: set = set()
+
+    def _table(self, name: str, operation: str) -> InMemoryTable:
+        if name not in self.db.tables:
+            raise _client_error("ResourceNotFoundException", f"Requested resource not found: Table: {name}", operation)
+        return self.db.tables[name]
+
+    def describe_table(self, TableName):
+        return {"Table": self._table(TableName, "DescribeTable").describe()}
+
+    def create_table(self, TableName, KeySchema, **_):
+        if TableName in self.db.tables:
+            raise _client_error("ResourceInUseException", f"Table already exists: {TableName}", "CreateTable")
+        keys = {entry["KeyType"]: entry["AttributeName"] for entry in KeySchema}
+        return {"TableDescription": self.db.create_table(TableName, keys["HASH"], keys.get("RANGE")).describe()}
+
+    def update_table(self, TableName, **_):
+        return {"TableDescription": self._table(TableName, "UpdateTable").describe()}
+
+    def get_waiter(self, name: str) -> _Waiter:
+        return _Waiter(self, exists=name == "table_exists")
+
+    def describe_continuous_backups(self, TableName):
+        self._table(TableName, "DescribeContinuousBackups")
+        status = "ENABLED" if TableName in self._point_in_time_recovery else "DISABLED"
+        return {"ContinuousBackupsDescription": {
+            "ContinuousBackupsStatus": "ENABLED",
+            "PointInTimeRecoveryDescription": {"PointInTimeRecoveryStatus": status},
+        }}
+
+    def update_continuous_backups(self, TableName, PointInTimeRecoverySpecification):
+        self._table(TableName, "UpdateContinuousBackups")
+        if PointInTimeRecoverySpecification.get("PointInTimeRecoveryEnabled"):
+            self._point_in_time_recovery.add(TableName)
+        else:
+            self._point_in_time_recovery.discard(TableName)
+        return self.describe_continuous_backups(TableName)
+
+
+class LocalBoto3:
+    """
+    Stand-in for the boto3 module where a library builds its own DynamoDB clients.
+
+    Assign it to that library module's `boto3` attribute (as the load test
+    does for langgraph_checkpoint_dynamodb.saver) so `boto3.resource` and
+    `boto3.client` return the in-memory tables.
+    """
+
+    def __init__(self, db: InMemoryDynamoDB):
+        self.db = db
+        self._client = db.client()
+
+    def resource(self, service_name: str, **_):
+        return self.db
+
+    def client(self, service_name: str, **_):
+        return self._client
+
+
+def create_healthbot_tables(env: Dict[str, str], latency_ms: float = 0.0) -> InMemoryDynamoDB:
+    """Create the tables defined in resources/dynamodb.yml, named from the given environment."""
+    db = InMemoryDynamoDB(latency_ms)
+    db.create_table(env["CHAT_SESSIONS_TABLE"], "sessionId",
+                    indexes={"UserSessionsByLastActivity": ("userId", "lastActivity")})
+    db.create_table(env["USER_MESSAGES_TABLE"], "sessionId", "timestamp",
+                    indexes={"MessageIdIndex": ("messageId", None)})
+    db.create_table(env["SESSION_STATE_TABLE"], "PK", "SK")
+    db.create_table(env["RATE_LIMIT_TABLE"], "bucketKey")
+    db.create_table(env["IDEMPOTENCY_TABLE"], "idempotencyKey")
+    db.create_table(env["JOBS_TABLE"], "jobId")
+    db.create_table(env.get("CIRCUIT_BREAKER_TABLE", "healthbot-test-circuit-breakers"), "dependency")
+    db.create_table(env["CONNECTIONS_TABLE"], "connectionId", indexes={"UserConnections": ("userId", None)})
+    db.create_table(env.get("SINGLE_FLIGHT_TABLE", "healthbot-test-single-flight"), "flightKey")
+    return db
@@ -0,0 +1,77 @@
+"""
+In-process stand-in for SQS feeding the async job worker.
+
+LocalJobQueue implements the `send_message` call used by src.handlers.jobs
+and delivers each message to a handler (normally job_worker.handler) on a
+pool of worker threads, shaped like the SQS event Lambda would receive.
+Records the worker reports in batchItemFailures are redelivered up to
+`max_receives` times, like a redrive policy, after which they go to
+`dead_letters` and, when given, to `dead_letter_handler` (normally
+jobs.dead_letter_handler) as the dead-letter queue's consumer would.
+"""
+
+import queue
+import threading
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+
+class LocalJobQueue:
+    """Minimal SQS client: send_message in, SQS-shaped batches of one out."""
+
+    def __init__(self, handler: Callable[[Dict[str, Any], Any], Dict[str, Any]], workers: int = 4,
+                 max_receives: int = 3, context_factory: Callable[[], Any] = lambda: None,
+                 dead_letter_handler: Optional[Callable[[Dict[str, Any], Any], Any]] = None):
+        self.handler = handler
+        self.dead_letter_handler = dead_letter_handler
+        self.max_receives = max_receives
+        self.context_factory = context_factory
+        self.sent = 0
+        self.dead_letters: List[str] = []
+        self._queue: "queue.Queue" = queue.Queue()
+        self._threads = [threading.Thread(target=self._work, daemon=True) for _ in range(workers)]
+
+    def start(self) -> "LocalJobQueue":
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self) -> None:
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
+    def send_message(self, QueueUrl: str, MessageBody: str, **_) -> Dict[str, Any]:
+        message_id = str(uuid.uuid4())
+        self.sent += 1
+        self._queue.put((message_id, MessageBody, 1))
+        return {"MessageId": message_id}
+
+    @staticmethod
+    def _event(message_id: str, body: str, receive_count: int) -> Dict[str, Any]:
+        return {"Records": [{
+            "messageId": message_id,
+            "body": body,
+            "attributes": {"ApproximateReceiveCount": str(receive_count)},
+            "eventSource": "aws:sqs",
+        }]}
+
+    def _work(self) -> None:
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                return
+            message_id, body, receive_count = entry
+            event = self._event(message_id, body, receive_count)
+            try:
+                failures = self.handler(event, self.context_factory()).get("batchItemFailures", [])
+            except Exception:
+                failures = [{"itemIdentifier": message_id}]
+            if failures:
+                if receive_count >= self.max_receives:
+                    self.dead_letters.append(body)
+                    if self.dead_letter_handler is not None:
+                        self.dead_letter_handler(self._event(message_id, body, receive_count), self.context_factory())
+                else:
+                    self._queue.put((message_id, body, receive_count + 1))
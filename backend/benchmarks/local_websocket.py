@@ -0,0 +1,87 @@
+"""
+In-process stand-in for the WebSocket API used for progress events.
+
+LocalWebSocketGateway plays both sides of API Gateway: it runs the real
+$connect/$disconnect handlers for virtual clients and implements the
+`post_to_connection` call of the apigatewaymanagementapi client, keeping
+every pushed frame with its arrival time. LocalCognito accepts tokens of
+the form "local-token:<user id>".
+"""
+
+import json
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Tuple
+
+from botocore.exceptions import ClientError
+
+
+def _client_error(code: str, operation: str) -> ClientError:
+    return ClientError({"Error": {"Code": code, "Message": code}}, operation)
+
+
+class LocalCognito:
+    """The get_user call of the cognito-idp client."""
+
+    def get_user(self, AccessToken: str, **_) -> Dict[str, Any]:
+        prefix = "local-token:"
+        if not AccessToken.startswith(prefix):
+            raise _client_error("NotAuthorizedException", "GetUser")
+        user_id = AccessToken[len(prefix):]
+        return {"Username": user_id, "UserAttributes": [{"Name": "sub", "Value": user_id}]}
+
+
+class LocalWebSocketGateway:
+    """Virtual WebSocket clients plus the management API that pushes to them."""
+
+    def __init__(self):
+        self.frames: Dict[str, List[Tuple[float, Dict[str, Any]]]] = {}
+        self._open = set()
+        self._lock = threading.Lock()
+
+    def install(self, db) -> "LocalWebSocketGateway":
+        from src.handlers import progress, websocket_connections
+
+        websocket_connections._dynamodb = db
+        websocket_connections._cognito = LocalCognito()
+        progress._management_api = self
+        return self
+
+    def connect(self, user_id: str) -> str:
+        from src.handlers.websocket_connections import connect_handler
+
+        connection_id = str(uuid.uuid4())
+        response = connect_handler({
+            "requestContext": {"connectionId": connection_id, "routeKey": "$connect"},
+            "queryStringParameters": {"token": f"local-token:{user_id}"},
+        }, None)
+        if response["statusCode"] != 200:
+            raise RuntimeError(f"connect rejected: {response['body']}")
+        with self._lock:
+            self._open.add(connection_id)
+            self.frames[connection_id] = []
+        return connection_id
+
+    def disconnect(self, connection_id: str) -> None:
+        from src.handlers.websocket_connections import disconnect_handler
+
+        with self._lock:
+            self._open.discard(connection_id)
+        disconnect_handler({"requestContext": {"connectionId": connection_id, "routeKey": "$disconnect"}}, None)
+
+    def drop(self, connection_id: str) -> None:
+        """Lose the client without a $disconnect, as a closed laptop lid would."""
+        with self._lock:
+            self._open.discard(connection_id)
+
+    def post_to_connection(self, ConnectionId: str, Data: bytes, **_) -> Dict[str, Any]:
+        with self._lock:
+            if ConnectionId not in self._open:
+                raise _client_error("GoneException", "PostToConnection")
+            self.frames[ConnectionId].append((time.perf_counter(), json.loads(Data)))
+        return {}
+
+    def frames_since(self, connection_id: str, since: float) -> List[Tuple[float, Dict[str, Any]]]:
+        with self._lock:
+            return [frame for frame in self.frames.get(connection_id, []) if frame[0] >= since]
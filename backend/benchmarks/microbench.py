@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the pure-CPU hot spots of a HealthBot turn.
+
+Covers every router in routers.py, every node with the LLM and Tavily stubbed
+out, response_builder.build_response_data, request_validator.validate_message_body
+and checkpoint (de)serialization of realistic HealthBotState sizes.
+
+Every case is timed in --rounds separate rounds, interleaved with the other
+cases so a burst of background load cannot skew all of one case's timings,
+and the median of the rounds is compared against benchmarks/baseline.json;
+any case slower than the baseline by more than --threshold percent is flagged
+and the script exits non-zero. Baselines are machine-specific, so refresh
+them with --update-baseline (which times the same way) on the machine that
+runs the comparison.
+
+Usage: python benchmarks/microbench.py [--filter router] [--threshold 25] [--rounds 5] [--update-baseline]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+
+import common  # noqa: F401  (sets up sys.path and env)
+from common import install_fakes, quiet, sample_search_payload, QUESTION_JSON, SUMMARY_TEXT
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from src.handlers import routers
+from src.handlers.nodes.quiz_nodes import node_evaluate, node_generate_question, node_present_question
+from src.handlers.nodes.restart_nodes import node_handle_restart
+from src.handlers.nodes.summary_nodes import node_present_summary, node_summarize
+from src.handlers.nodes.topic_nodes import node_collect_topic, node_search
+from src.handlers.request_validator import validate_message_body
+from src.handlers.response_builder import build_response_data
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Swings of about a microsecond on the cheapest cases are timer noise, not regressions
+NOISE_FLOOR_US = 1.0
+
+
+def history(turns: int):
+    """Message history of `turns` complete learning loops."""
+    messages = [SystemMessage(content="You are a medical education assistant.", name="system", id=str(uuid.uuid4()))]
+    payload = json.dumps(sample_search_payload("type 2 diabetes"))
+    for _ in range(turns):
+        call_id = str(uuid.uuid4())
+        messages += [
+            HumanMessage(content="type 2 diabetes", name="patient", id=str(uuid.uuid4())),
+            AIMessage(content="Search for up-to-date medical information about: type 2 diabetes", name="healthbot",
+                      id=str(uuid.uuid4()),
+                      tool_calls=[{"id": call_id, "type": "tool_call", "name": "web_search",
+                                   "args": {"question": "type 2 diabetes"}}]),
+            ToolMessage(content=payload, name="web_search", tool_call_id=call_id, id=str(uuid.uuid4())),
+            AIMessage(content=SUMMARY_TEXT, name="healthbot", id=str(uuid.uuid4())),
+            AIMessage(content=SUMMARY_TEXT + "\n\n---\n\nReady for a quick check?", name="healthbot", id=str(uuid.uuid4())),
+            HumanMessage(content="ready", name="patient", id=str(uuid.uuid4())),
+            HumanMessage(content="A", name="patient", id=str(uuid.uuid4())),
+            AIMessage(content="✅ Correct! Well done.", name="healthbot", id=str(uuid.uuid4())),
+            HumanMessage(content="yes", name="patient", id=str(uuid.uuid4())),
+            AIMessage(content="Great! What health topic would you like to learn about?", name="healthbot", id=str(uuid.uuid4())),
+        ]
+    return messages
+
+
+def state(turns: int = 3, **overrides):
+    question = json.loads(QUESTION_JSON)
+    base = {
+        "messages": history(turns),
+        "user_message": "",
+        "message_type": "topic",
+        "topic": "type 2 diabetes",
+        "status": "presenting_summary",
+        "search_results": sample_search_payload("type 2 diabetes")["results"],
+        "summary": SUMMARY_TEXT,
+        "citations": [r["url"] for r in sample_search_payload("type 2 diabetes")["results"]],
+        "question": question["question"],
+        "correct_answer": question["choices"][0],
+        "multiple_choice": question,
+        "user_answer": "",
+        "grade": "",
+        "explanation": "",
+        "bot_message": SUMMARY_TEXT,
+        "response_type": "confirmation",
+        "confirmation_prompt": {"message": "Ready?", "requires_confirmation": True},
+    }
+    base.update(overrides)
+    return base
+
+
+def build_cases():
+    serde = JsonPlusSerializer()
+    cases = {}
+
+    # Routers
+    cases["router.entry_router.topic"] = (routers.entry_router, state(user_message="asthma", message_type="topic"))
+    cases["router.entry_router.confirmation"] = (routers.entry_router, state(user_message="ready", message_type="confirmation"))
+    cases["router.entry_router.resume"] = (routers.entry_router, state(status="searching"))
+    cases["router.router.answer"] = (routers.router, state(status="awaiting_answer", user_message="B", message_type="answer"))
+    cases["router.present_summary_router"] = (routers.present_summary_router, state())
+    cases["router.present_question_router"] = (routers.present_question_router, state(user_message="C", message_type="answer"))
+    cases["router.handle_restart_router"] = (routers.handle_restart_router, state(user_message="yes", message_type="confirmation"))
+    cases["router.tool_router"] = (routers.tool_router, state())
+
+    # Nodes (LLM and Tavily stubbed)
+    summarize_state = state()
+    call_id = str(uuid.uuid4())
+    summarize_state["messages"] = summarize_state["messages"] + [
+        ToolMessage(content=json.dumps(sample_search_payload("type 2 diabetes")), name="web_search",
+                    tool_call_id=call_id, id=str(uuid.uuid4()))
+    ]
+    cases["node.collect_topic"] = (node_collect_topic, state(user_message="asthma"))
+    cases["node.search"] = (node_search, state(status="searching"))
+    cases["node.summarize"] = (node_summarize, summarize_state)
+    cases["node.present_summary"] = (node_present_summary, state(confirmation_prompt=None))
+    cases["node.generate_question"] = (node_generate_question, state(question="", user_message="ready"))
+    cases["node.present_question"] = (node_present_question, state(status="awaiting_answer"))
+    cases["node.evaluate"] = (node_evaluate, state(user_message="A", status="present_question"))
+    cases["node.handle_restart"] = (node_handle_restart, state(user_message="yes", status="ask_restart"))
+
+    # Response building and request validation
+    response_data = {
+        "bot_response": SUMMARY_TEXT,
+        "response_type": "confirmation",
+        "multiple_choice": None,
+        "confirmation_prompt": {"message": "Ready?", "requires_confirmation": True},
+        "status": "presenting_summary",
+    }
+    bot_metadata = {"message_id": str(uuid.uuid4()), "timestamp": "2024-01-01T00:00:00+00:00"}
+    cases["response_builder.build_response_data"] = (lambda args: build_response_data(*args), (response_data, bot_metadata))
+    event = {"body": json.dumps({"message": "type 2 diabetes", "sessionId": str(uuid.uuid4()), "messageType": "topic"})}
+    cases["request_validator.validate_message_body"] = (validate_message_body, event)
+
+    # Checkpoint (de)serialization of growing session state
+    for turns in (1, 10, 50):
+        snapshot = state(turns)
+        blob = serde.dumps_typed(snapshot)
+        cases[f"checkpoint.serialize.{turns}_loops"] = (serde.dumps_typed, snapshot)
+        cases[f"checkpoint.deserialize.{turns}_loops"] = (serde.loads_typed, blob)
+    return cases
+
+
+def arg_factory(arg):
+    """Nodes must not see their own output, so give each call a fresh shallow copy."""
+    if isinstance(arg, dict) and "messages" in arg:
+        return lambda: {**arg, "messages": list(arg["messages"])}
+    return lambda: arg
+
+
+def calibrate(fn, arg, min_time: float = 0.2, repeats: int = 7) -> int:
+    """Loop count that makes one sample last at least `min_time / repeats`, auto-ranged like timeit."""
+    make_arg = arg_factory(arg)
+    loops = 1
+    while True:
+        args = [make_arg() for _ in range(loops)]
+        started = time.perf_counter()
+        for a in args:
+            fn(a)
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time / repeats or loops >= 100_000:
+            return loops
+        loops *= 2
+
+
+def measure(fn, arg, loops: int, repeats: int = 7) -> float:
+    """Best-of-`repeats` microseconds per call over `loops` calls each."""
+    make_arg = arg_factory(arg)
+    samples = []
+    for _ in range(repeats):
+        args = [make_arg() for _ in range(loops)]
+        started = time.perf_counter()
+        for a in args:
+            fn(a)
+        samples.append((time.perf_counter() - started) / loops * 1e6)
+    # The minimum is the least noisy estimate; slower samples are interference
+    return min(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--filter", default="", help="only run cases containing this substring")
+    parser.add_argument("--threshold", type=float, default=25.0, help="regression threshold in percent")
+    parser.add_argument("--rounds", type=int, default=5, help="timing rounds per case; their median is compared")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    install_fakes()
+    cases = {k: v for k, v in build_cases().items() if args.filter in k}
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f).get("results_us", {})
+
+    with quiet():
+        loops = {name: calibrate(fn, arg) for name, (fn, arg) in cases.items()}
+    samples = {name: [] for name in cases}
+    for round_number in range(args.rounds):
+        print(f"⏱️ Round {round_number + 1}/{args.rounds}", file=sys.stderr)
+        for name, (fn, arg) in cases.items():
+            with quiet():
+                samples[name].append(measure(fn, arg, loops[name]))
+    results = {name: statistics.median(timings) for name, timings in samples.items()}
+
+    regressions = []
+    print(f"{'case':<44} {'us/call':>12} {'spread':>8} {'baseline':>12} {'change':>8}")
+    for name in cases:
+        spread = f"±{(max(samples[name]) - min(samples[name])) / results[name] * 50:.1f}%"
+        base = baseline.get(name)
+        change = f"{(results[name] / base - 1) * 100:+.1f}%" if base else "new"
+        flag = ""
+        if base and results[name] - base > max(base * args.threshold / 100, NOISE_FLOOR_US):
+            regressions.append(name)
+            flag = "  ❌ regression"
+        print(f"{name:<44} {results[name]:>12.2f} {spread:>8} {base or 0:>12.2f} {change:>8}{flag}")
+
+    if args.update_baseline:
+        merged = {**baseline, **results}
+        with open(BASELINE_PATH, "w") as f:
+            json.dump({"python": sys.version.split()[0], "rounds": args.rounds,
+                       "results_us": dict(sorted(merged.items()))}, f, indent=2)
+            f.write("\n")
+        print(f"\n💾 Baseline written to {BASELINE_PATH}")
+        return 0
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} case(s) regressed by more than {args.threshold:.0f}%")
+        return 1
+    print(f"\n✅ No regressions above {args.threshold:.0f}%")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Compare delta-only node updates against the legacy full-state returns.
+
+The legacy shape is reproduced by wrapping each node so it appends its new
+messages to state["messages"] in place and returns {**state, **update}, which
+is what every node did before. Both graphs replay the same scripted sessions
+and their final states must match.
+
+The cost that changes between the two is the superstep's update step, so
+that is what gets timed, apart from node work and checkpoint I/O: every node
+call of the delta session is recorded, and its return value (or the legacy
+full-state equivalent) is reduced into channels restored from the node's
+input state, exactly as LangGraph applies a task's writes (append_messages
+for the message history), and each write is serialized as put_writes would.
+The restored history is indexed, as it is after the first update of a run.
+The result is reported per history size, where the legacy cost grows with
+the history and the delta cost stays flat.
+
+Usage: python benchmarks/node_deltas.py [--rounds 40] [--repeats 5] [--buckets 6]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+
+import common  # noqa: F401  (sets up sys.path and env)
+from common import SESSION_SCRIPT, install_fakes, quiet
+
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from src.handlers import healthbot_graph
+from src.handlers.message_history import indexed
+
+NODE_NAMES = [
+    "node_collect_topic", "node_search", "node_summarize", "node_present_summary",
+    "node_generate_question", "node_present_question", "node_evaluate", "node_handle_restart",
+]
+
+
+def legacy(node):
+    """Wrap a delta node so it behaves like the old full-state nodes."""
+    def wrapped(state):
+        update = dict(node(state))
+        state["messages"].extend(update.pop("messages", []))
+        return {**state, **update}
+    wrapped.__name__ = node.__name__
+    return wrapped
+
+
+def recorded(node, supersteps):
+    """Wrap a delta node so each call's input state and returned update are kept for timing."""
+    def wrapped(state):
+        before = {**state, "messages": list(state.get("messages", []))}
+        update = node(state)
+        supersteps.append((node.__name__, before, dict(update)))
+        return update
+    wrapped.__name__ = node.__name__
+    return wrapped
+
+
+def build(wrap=None):
+    originals = {name: getattr(healthbot_graph, name) for name in NODE_NAMES}
+    try:
+        if wrap is not None:
+            for name, node in originals.items():
+                setattr(healthbot_graph, name, wrap(node))
+        with quiet():
+            return healthbot_graph.build_graph(checkpointer=MemorySaver())
+    finally:
+        for name, node in originals.items():
+            setattr(healthbot_graph, name, node)
+
+
+def normalize(state):
+    """Drop random message IDs so states from separate runs can be compared."""
+    normalized = dict(state)
+    normalized["messages"] = [
+        (m.type, getattr(m, "name", None), m.content, [c["args"] for c in getattr(m, "tool_calls", []) or []])
+        for m in state.get("messages", [])
+    ]
+    return normalized
+
+
+def run_session(graph, thread_id: str, rounds: int):
+    config = {"configurable": {"thread_id": thread_id}, "recursion_limit": 50}
+    state = None
+    for _ in range(rounds):
+        for message_type, message in SESSION_SCRIPT:
+            with quiet():
+                state = graph.invoke(
+                    {"user_message": message, "message_type": message_type, "messages": []},
+                    config=config
+                )
+    return state
+
+
+def legacy_update(state, update):
+    """What the legacy node returned for the same call: the whole state with the update applied."""
+    return {**state, **update, "messages": state["messages"] + list(update.get("messages", []))}
+
+
+def time_update_step(channels, serde, state, update, repeats: int) -> float:
+    """
+    Best-of-`repeats` microseconds to apply one node's writes.
+
+    Restoring the channels from the node's input state stands in for the
+    loaded checkpoint and is not timed; reducing every write into its channel
+    and serializing it is.
+    """
+    writes = [(key, value) for key, value in update.items() if key in channels]
+    samples = []
+    for _ in range(repeats):
+        restored = {
+            key: channels[key].from_checkpoint(indexed(state[key]) if key == "messages" else state[key])
+            if key in state else channels[key].copy()
+            for key, _ in writes
+        }
+        started = time.perf_counter()
+        for key, value in writes:
+            restored[key].update([value])
+            serde.dumps_typed(value)
+        samples.append((time.perf_counter() - started) * 1e6)
+    return min(samples)
+
+
+def report(rows, buckets: int):
+    """Median update-step cost per history-size bucket for both node shapes."""
+    rows.sort(key=lambda row: row[0])
+    largest = rows[-1][0]
+    width = max(largest // buckets + 1, 1)
+    print(f"\n{'history msgs':>14} {'supersteps':>11} {'legacy us':>10} {'delta us':>9} {'ratio':>7}")
+    medians = []
+    for start in range(0, largest + 1, width):
+        chunk = [row for row in rows if start <= row[0] < start + width]
+        if not chunk:
+            continue
+        legacy_us = statistics.median(row[1] for row in chunk)
+        delta_us = statistics.median(row[2] for row in chunk)
+        medians.append((legacy_us, delta_us))
+        print(f"{start:>6}-{start + width - 1:<7} {len(chunk):>11} {legacy_us:>10.1f} {delta_us:>9.1f} "
+              f"{legacy_us / delta_us:>6.1f}x")
+    return medians
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rounds", type=int, default=40, help="learning loops per session")
+    parser.add_argument("--repeats", type=int, default=5, help="timings per superstep; the fastest is kept")
+    parser.add_argument("--buckets", type=int, default=6, help="history-size buckets in the report")
+    args = parser.parse_args()
+
+    install_fakes()
+
+    supersteps = []
+    delta_graph = build(lambda node: recorded(node, supersteps))
+    delta_state = run_session(delta_graph, "delta", args.rounds)
+    legacy_state = run_session(build(legacy), "legacy", args.rounds)
+
+    if normalize(delta_state) != normalize(legacy_state):
+        print("❌ Final state differs between delta and legacy nodes")
+        for key in sorted(set(delta_state) | set(legacy_state)):
+            if normalize(delta_state).get(key) != normalize(legacy_state).get(key):
+                print(f"   - {key}")
+        return 1
+    print(f"✅ Final states identical ({len(delta_state['messages'])} messages)")
+
+    channels = delta_graph.channels
+    serde = JsonPlusSerializer()
+    rows = []
+    for _, state, update in supersteps:
+        rows.append((
+            len(state["messages"]),
+            time_update_step(channels, serde, state, legacy_update(state, update), args.repeats),
+            time_update_step(channels, serde, state, update, args.repeats),
+        ))
+
+    print(f"\nPer-superstep update step (append_messages reduction + write serialization), "
+          f"{len(rows)} node calls")
+    medians = report(rows, args.buckets)
+    (first_legacy, first_delta), (last_legacy, last_delta) = medians[0], medians[-1]
+    print(f"\nShortest to longest history: legacy {first_legacy:.1f} -> {last_legacy:.1f} us "
+          f"({last_legacy / first_legacy:.1f}x), delta {first_delta:.1f} -> {last_delta:.1f} us "
+          f"({last_delta / first_delta:.1f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
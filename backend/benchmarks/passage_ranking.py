@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark passage ranking and source preparation over stored search payloads.
+
+Each payload is a Tavily response saved as JSON (see benchmarks/payloads/).
+For every payload the script times rank_passages() on its own and the full
+prepare_sources() pass used by node_summarize, and checks that every selected
+source still maps back to a result from the payload.
+
+Usage: python benchmarks/passage_ranking.py [--payloads DIR] [--iterations 200]
+"""
+
+import argparse
+import glob
+import json
+import os
+import statistics
+import sys
+import time
+
+import common  # noqa: F401  (sets up sys.path and env)
+
+from src.handlers.passage_ranking import rank_passages
+from src.handlers.source_prep import prepare_sources, split_passages
+
+# Single-digit milliseconds per turn is the target for ranking
+RANKING_BUDGET_MS = 10.0
+
+
+def load_payloads(directory: str):
+    for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        with open(path) as f:
+            payload = json.load(f)
+        results = [
+            {"url": r.get("url", ""), "title": r.get("title", ""), "content": r.get("content", "")}
+            for r in payload.get("results", [])
+            if len((r.get("content") or "").strip()) > 50
+        ]
+        yield os.path.basename(path), payload.get("query", ""), results
+
+
+def time_ms(fn, iterations: int):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--payloads", default=os.path.join(os.path.dirname(__file__), "payloads"))
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'payload':<28} {'passages':>8} {'rank p50':>9} {'rank p95':>9} {'prep p50':>9} {'prep p95':>9} {'kept':>5}")
+    failures = 0
+    for name, topic, results in load_payloads(args.payloads):
+        passages = [
+            {"source_index": i, "position": j, "text": text, "tokens": 0, "score": 0.0}
+            for i, r in enumerate(results)
+            for j, text in enumerate(split_passages(r["content"]))
+        ]
+        rank_p50, rank_p95 = time_ms(lambda: rank_passages(passages, topic), args.iterations)
+        prep = lambda: prepare_sources(results, score_passages=lambda ps: rank_passages(ps, topic))
+        prep_p50, prep_p95 = time_ms(prep, args.iterations)
+
+        sources, stats = prep()
+        urls = {r["url"] for r in results}
+        if any(s["url"] not in urls for s in sources):
+            print(f"❌ {name}: selected source does not map back to a search result")
+            failures += 1
+        if rank_p95 > RANKING_BUDGET_MS:
+            print(f"❌ {name}: ranking p95 {rank_p95:.2f} ms exceeds {RANKING_BUDGET_MS} ms")
+            failures += 1
+
+        print(f"{name:<28} {len(passages):>8} {rank_p50:>9.3f} {rank_p95:>9.3f} {prep_p50:>9.3f} {prep_p95:>9.3f} "
+              f"{stats['passages_out']:>5}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Replay recorded HealthBot sessions through execute_workflow.
+
+Recordings come from src/handlers/session_recorder.py (enable with
+SESSION_RECORDING=true; see the handlers README). Each recorded turn carries
+the LLM completions and Tavily payloads the graph consumed, and the replayer
+serves them back in the same order, so the graph takes the same path it took
+in production without touching the network. DynamoDB is the in-memory
+stand-in used by load_test.py, with checkpoints written by the real
+DynamoDBSaver.
+
+The script reports per-turn latency by message type and checkpoint size per
+turn, counts divergences (a turn ending in a different status, or asking for
+more external calls than were recorded), and can save the results and compare
+them against a run from another version.
+
+Usage: python benchmarks/replay_sessions.py RECORDINGS.jsonl [--honor-latency]
+                                            [--output run.json] [--compare baseline_run.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from collections import defaultdict, deque
+
+import common
+from common import canned_reply, quiet, sample_search_payload
+from local_dynamodb import LocalBoto3, create_healthbot_tables
+
+from langchain_core.messages import AIMessage
+from langgraph_checkpoint_dynamodb import saver as dynamodb_saver
+
+# Replays must never produce new recordings
+os.environ.pop("SESSION_RECORDING", None)
+
+from src.handlers import healthbot_graph, session_manager, tools
+from src.handlers.nodes import quiz_nodes, summary_nodes
+from src.handlers.session_recorder import load_records
+from src.handlers.workflow_engine import execute_workflow
+
+
+class Replay:
+    """Serves one turn's recorded external responses in the order they were consumed."""
+
+    def __init__(self, honor_latency: bool = False):
+        self.honor_latency = honor_latency
+        self.queues = {"llm": deque(), "search": deque()}
+        self.missing = 0
+
+    def load_turn(self, record):
+        for queue in self.queues.values():
+            queue.clear()
+        for call in record.get("calls", []):
+            self.queues.setdefault(call["kind"], deque()).append(call)
+
+    @property
+    def unused(self) -> int:
+        return sum(len(queue) for queue in self.queues.values())
+
+    def next_call(self, kind: str):
+        if not self.queues[kind]:
+            self.missing += 1
+            return None
+        call = self.queues[kind].popleft()
+        if self.honor_latency:
+            time.sleep(call.get("latency_ms", 0) / 1000)
+        if call.get("error"):
+            raise RuntimeError(call["error"])
+        return call
+
+
+class ReplayLLM:
+    def __init__(self, replay: Replay):
+        self.replay = replay
+
+    def invoke(self, messages, *args, **kwargs):
+        call = self.replay.next_call("llm")
+        if call is None:
+            return AIMessage(content=canned_reply(" ".join(str(getattr(m, "content", m)) for m in messages)))
+        return AIMessage(content=call.get("content", ""), usage_metadata=call.get("usage") or None)
+
+
+class ReplayTavilyClient:
+    def __init__(self, replay: Replay):
+        self.replay = replay
+
+    def search(self, query, **kwargs):
+        call = self.replay.next_call("search")
+        if call is None:
+            return sample_search_payload(query, kwargs.get("max_results", 8))
+        return call.get("response") or {}
+
+
+def group_sessions(records):
+    sessions = defaultdict(list)
+    for record in records:
+        sessions[record["session"]].append(record)
+    for turns in sessions.values():
+        turns.sort(key=lambda r: r["started_at"])
+    return sessions
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)] if ordered else 0.0
+
+
+def replay_sessions(sessions, honor_latency: bool):
+    replay = Replay(honor_latency)
+    llm = ReplayLLM(replay)
+    summary_nodes.get_llm = lambda *args, **kwargs: llm
+    quiz_nodes.get_llm = lambda *args, **kwargs: llm
+    tools.get_tavily_client = lambda: ReplayTavilyClient(replay)
+
+    db = create_healthbot_tables(os.environ, latency_ms=0)
+    session_manager._dynamodb = db
+    dynamodb_saver.boto3 = LocalBoto3(db)
+    with quiet():
+        checkpoints = healthbot_graph.get_graph().checkpointer.saver
+
+    latencies = defaultdict(list)
+    checkpoint_bytes = defaultdict(list)
+    divergences = []
+    for key, turns in sessions.items():
+        thread_id = str(uuid.uuid4())
+        for index, record in enumerate(turns):
+            replay.load_turn(record)
+            missing_before = replay.missing
+            status, error = None, None
+            started = time.perf_counter()
+            try:
+                with quiet():
+                    status = execute_workflow(thread_id, record["message"], record["message_type"],
+                                              skip_environment_setup=True).get("status")
+            except Exception as e:
+                error = str(e)
+            latencies[record["message_type"]].append((time.perf_counter() - started) * 1000)
+
+            saved = checkpoints.get_tuple({"configurable": {"thread_id": thread_id}})
+            if saved:
+                checkpoint_bytes[index].append(len(checkpoints.serde.dumps_typed(saved.checkpoint)[1]))
+
+            if status != record.get("status") or bool(error) != bool(record.get("error")) \
+                    or replay.missing != missing_before or replay.unused:
+                divergences.append({
+                    "session": key, "turn": index, "message_type": record["message_type"],
+                    "recorded_status": record.get("status"), "replayed_status": status, "error": error,
+                    "missing_calls": replay.missing - missing_before, "unused_calls": replay.unused,
+                })
+
+    return {
+        "sessions": len(sessions),
+        "turns": sum(len(t) for t in sessions.values()),
+        "latency_ms": {
+            message_type: {"p50": percentile(s, 50), "p95": percentile(s, 95), "mean": statistics.mean(s)}
+            for message_type, s in sorted(latencies.items())
+        },
+        "checkpoint_bytes": {
+            str(index): {"mean": statistics.mean(s), "max": max(s)}
+            for index, s in sorted(checkpoint_bytes.items())
+        },
+        "divergences": divergences,
+    }
+
+
+def print_report(results, previous=None):
+    def change(current, before):
+        return f"{(current / before - 1) * 100:+7.1f}%" if before else "       "
+
+    print(f"Replayed {results['turns']} turns from {results['sessions']} sessions, "
+          f"{len(results['divergences'])} divergence(s)")
+    print(f"\n{'turn type':<14} {'p50 ms':>9} {'p95 ms':>9} {'mean ms':>9}")
+    for message_type, row in results["latency_ms"].items():
+        before = (previous or {}).get("latency_ms", {}).get(message_type, {})
+        print(f"{message_type:<14} {row['p50']:>9.1f} {row['p95']:>9.1f} {row['mean']:>9.1f} "
+              f"{change(row['p50'], before.get('p50'))}")
+    print(f"\n{'turn':<6} {'checkpoint mean B':>18} {'max B':>10}")
+    for index, row in results["checkpoint_bytes"].items():
+        before = (previous or {}).get("checkpoint_bytes", {}).get(index, {})
+        print(f"{index:<6} {row['mean']:>18.0f} {row['max']:>10} {change(row['mean'], before.get('mean'))}")
+    for divergence in results["divergences"][:10]:
+        print(f"⚠️  {json.dumps(divergence)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("recordings", help="JSONL of turn records or raw log lines containing them")
+    parser.add_argument("--honor-latency", action="store_true",
+                        help="sleep for each recorded external call's latency instead of answering instantly")
+    parser.add_argument("--output", help="write the results as JSON for a later --compare")
+    parser.add_argument("--compare", help="results JSON from a previous run to diff against")
+    args = parser.parse_args()
+
+    sessions = group_sessions(load_records(args.recordings))
+    if not sessions:
+        print(f"❌ No recordings found in {args.recordings}")
+        return 1
+
+    results = replay_sessions(sessions, args.honor_latency)
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+    print_report(results, previous)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
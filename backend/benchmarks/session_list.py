@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Benchmark the "my sessions" endpoint against the in-memory DynamoDB stand-in.
+
+Seeds ChatSessionsTable with a few heavy users holding thousands of sessions
+plus many light users, then times list_sessions_handler for first pages (with
+and without the per-user cache) and walks one heavy user's full history. The
+run fails if the endpoint ever issues a Scan, returns sessions out of order,
+or repeats/drops a session while paginating.
+
+Usage: python benchmarks/session_list.py [--heavy-users 3] [--sessions 5000] [--page-size 20]
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import common  # noqa: F401  (sets up sys.path and env)
+from common import quiet
+from local_dynamodb import create_healthbot_tables
+
+from src.handlers import session_history, session_manager
+from src.handlers.session_history import list_sessions_handler
+
+
+def seed(db, heavy_users: int, sessions: int, light_users: int, rng: random.Random):
+    table = db.Table(os.environ["CHAT_SESSIONS_TABLE"])
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    topics = ["type 2 diabetes", "high blood pressure", "asthma in children", "flu", "migraine", "sleep apnea"]
+    users = {f"heavy-{i}": sessions for i in range(heavy_users)}
+    users.update({f"light-{i}": 5 for i in range(light_users)})
+    for user_id, count in users.items():
+        for _ in range(count):
+            table.put_item(Item={
+                "sessionId": str(uuid.uuid4()),
+                "userId": user_id,
+                "userEmail": f"{user_id}@example.com",
+                "lastActivity": (start + timedelta(seconds=rng.randrange(0, 365 * 86400))).isoformat(),
+                "messageCount": rng.randrange(1, 60),
+                "topic": rng.choice(topics),
+                "checkpointId": str(uuid.uuid4()),
+                "ttl": 1_900_000_000,
+            })
+    return table, users
+
+
+def event(user_id: str, limit: int, cursor=None):
+    params = {"limit": str(limit)}
+    if cursor:
+        params["cursor"] = cursor
+    return {
+        "path": "/api/sessions",
+        "httpMethod": "GET",
+        "headers": {},
+        "queryStringParameters": params,
+        "requestContext": {"authorizer": {"claims": {"sub": user_id}}},
+    }
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - started) * 1000
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--heavy-users", type=int, default=3)
+    parser.add_argument("--sessions", type=int, default=5000, help="sessions per heavy user")
+    parser.add_argument("--light-users", type=int, default=500)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--dynamodb-latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    db = create_healthbot_tables(os.environ, args.dynamodb_latency_ms)
+    session_manager._dynamodb = db
+    table, users = seed(db, args.heavy_users, args.sessions, args.light_users, random.Random(7))
+
+    scanned = []
+    original_query = table.query
+
+    def counting_query(**kwargs):
+        response = original_query(**kwargs)
+        scanned.append(response["ScannedCount"])
+        return response
+
+    table.query = counting_query
+    failures = []
+    heavy = "heavy-0"
+
+    with quiet():
+        # First page, cold per-user cache
+        cold = []
+        for _ in range(args.iterations):
+            session_history._session_list_cache.clear()
+            response, ms = timed(lambda: list_sessions_handler(event(heavy, args.page_size), None))
+            cold.append(ms)
+        # First page served from the per-user cache
+        warm = []
+        for _ in range(args.iterations):
+            response, ms = timed(lambda: list_sessions_handler(event(heavy, args.page_size), None))
+            warm.append(ms)
+
+        # Walk the whole history of one heavy user
+        session_history._session_list_cache.clear()
+        seen, previous, cursor, pages = [], None, None, 0
+        walk_started = time.perf_counter()
+        while True:
+            response = list_sessions_handler(event(heavy, args.page_size, cursor), None)
+            body = json.loads(response["body"])
+            pages += 1
+            for item in body["sessions"]:
+                if previous is not None and item["lastActivity"] > previous:
+                    failures.append(f"out of order on page {pages}")
+                previous = item["lastActivity"]
+                seen.append(item["sessionId"])
+            cursor = body["nextCursor"]
+            if not cursor:
+                break
+        walk_ms = (time.perf_counter() - walk_started) * 1000
+
+    if len(seen) != users[heavy] or len(set(seen)) != len(seen):
+        failures.append(f"pagination returned {len(seen)} sessions ({len(set(seen))} unique), expected {users[heavy]}")
+    calls = db.calls()
+    if calls.get("Scan"):
+        failures.append(f"{calls['Scan']} Scan call(s) issued")
+    fields = set(body["sessions"][0]) if body["sessions"] else set()
+    if fields != {"sessionId", "lastActivity", "messageCount", "topic"}:
+        failures.append(f"unexpected projection {sorted(fields)}")
+
+    cold_p50, cold_p95 = summarize(cold)
+    warm_p50, warm_p95 = summarize(warm)
+    print(f"Table: {len(table.items)} sessions, {len(users)} users "
+          f"({args.heavy_users} with {args.sessions} sessions each), page size {args.page_size}")
+    print(f"\n{'case':<28} {'p50 ms':>9} {'p95 ms':>9}")
+    print(f"{'first page (cache miss)':<28} {cold_p50:>9.3f} {cold_p95:>9.3f}")
+    print(f"{'first page (cache hit)':<28} {warm_p50:>9.3f} {warm_p95:>9.3f}")
+    print(f"\nFull walk of {heavy}: {pages} pages, {len(seen)} sessions in {walk_ms:.1f} ms")
+    print(f"Items read per Query: max {max(scanned)} (page size {args.page_size}); "
+          f"a Scan would read all {len(table.items)}")
+    print(f"DynamoDB calls: {json.dumps(calls, sort_keys=True)}")
+    for failure in failures:
+        print(f"❌ {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
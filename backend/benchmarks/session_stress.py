@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Hammer one session with concurrent messages and check its state stays linear.
+
+Walks the scripted learning loop on a single session, but sends every turn
+--burst times at once (double clicks, several tabs) through
+process_user_message.handler, against the in-memory DynamoDB stand-in and the
+fake OpenAI/Tavily servers. Checkpoints are written by the real
+DynamoDBSaver into the stand-in's SessionStateTable, so the conditional head
+move runs against the saver's actual put/put_writes item writes. Like the web client, a request answered 409 with
+Retry-After is resent with the same idempotency key (--client-retries times).
+After the run it checks that:
+
+  - every final response is a 200 or a 409;
+  - the session's checkpoints form a single chain (no checkpoint has two
+    successors, i.e. no run wrote a divergent successor);
+  - the checkpoint head on ChatSessions is the thread's latest checkpoint;
+  - exactly one bot message was saved per 200 response (losers write none);
+  - exactly one user message was saved per accepted turn (a 200, or a run
+    superseded after it started), however often a message was resent.
+
+--no-sequencing and --no-supersede turn off the per-session turn lease and
+run superseding, leaving the version-conditioned checkpoint writes alone to
+keep the state linear. Rate limiting stays on: a burst's copies all spend
+from one user's bucket at once, and contention on it must not turn any of
+them into a 429. Exits non-zero on any violation.
+
+Usage: python benchmarks/session_stress.py [--burst 4] [--loops 3] [--stagger-ms 50] [--client-retries 2]
+                                           [--no-sequencing] [--no-supersede]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+import common  # noqa: F401  (sets up sys.path and env)
+from common import SESSION_SCRIPT, quiet
+from load_test import FakeLambdaContext, api_event, install_local_backends
+
+from langgraph_checkpoint_dynamodb import DynamoDBSaver
+
+
+# The 409 of a run that was superseded after it started (and saved its user message)
+SUPERSEDED_IN_RUN = "Superseded by a newer message in this session"
+
+
+def send_burst(handler, user_id: str, session_id: str, message_type: str, message: str,
+               burst: int, stagger_ms: float, retries: int, retry_delay_ms: float, rng: random.Random):
+    """Send the same turn `burst` times at once, each as its own request; returns (status, message, ms)."""
+    results = [None] * burst
+    start = threading.Barrier(burst)
+    delays = [rng.uniform(0, stagger_ms) / 1000 for _ in range(burst)]
+
+    def send(index: int):
+        event = api_event(user_id, session_id, message_type, message, str(uuid.uuid4()))
+        start.wait()
+        time.sleep(delays[index])
+        started = time.perf_counter()
+        for _ in range(retries + 1):
+            response = handler(event, FakeLambdaContext())
+            if response["statusCode"] != 409 or "Retry-After" not in response["headers"]:
+                break
+            time.sleep(retry_delay_ms / 1000)
+        body = json.loads(response["body"])
+        results[index] = (response["statusCode"], body.get("message"), (time.perf_counter() - started) * 1000)
+
+    threads = [threading.Thread(target=send, args=(i,)) for i in range(burst)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def check_session(saver, session_manager, user_id: str, session_id: str, successes: int, accepted: int):
+    """Return the invariant violations of the session's final state."""
+    problems = []
+    config = {"configurable": {"thread_id": session_id, "checkpoint_ns": ""}}
+    checkpoints = list(saver.list(config))
+    children = Counter(
+        item.parent_config["configurable"]["checkpoint_id"] for item in checkpoints if item.parent_config
+    )
+    forks = {parent: count for parent, count in children.items() if count > 1}
+    if forks:
+        problems.append(f"{len(forks)} checkpoint(s) with divergent successors: {forks}")
+
+    latest = saver.get_tuple(config)
+    head = session_manager.get_checkpoint_head(session_id)
+    latest_id = latest.config["configurable"]["checkpoint_id"] if latest else None
+    if head != latest_id:
+        problems.append(f"checkpoint head {head} is not the latest checkpoint {latest_id}")
+
+    messages, _ = session_manager.get_session_messages(session_id, user_id, limit=10_000)
+    bot_messages = sum(1 for message in messages if message["type"] == "bot")
+    if bot_messages != successes:
+        problems.append(f"{bot_messages} bot message(s) saved for {successes} successful response(s)")
+    user_messages = sum(1 for message in messages if message["type"] == "user")
+    if user_messages != accepted:
+        problems.append(f"{user_messages} user message(s) saved for {accepted} accepted turn(s)")
+    return problems, len(checkpoints)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--burst", type=int, default=4, help="concurrent copies of every turn")
+    parser.add_argument("--loops", type=int, default=3, help="passes through the scripted learning loop")
+    parser.add_argument("--stagger-ms", type=float, default=50.0, help="random start spread within a burst")
+    parser.add_argument("--client-retries", type=int, default=2, help="resends of a 409 with Retry-After")
+    parser.add_argument("--retry-delay-ms", type=float, default=200.0, help="wait before a resend")
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0)
+    parser.add_argument("--search-latency-ms", type=float, default=300.0)
+    parser.add_argument("--dynamodb-latency-ms", type=float, default=2.0)
+    parser.add_argument("--no-sequencing", action="store_true", help="disable the per-session turn lease")
+    parser.add_argument("--no-supersede", action="store_true", help="disable cancelling superseded runs")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--payloads", default=os.path.join(os.path.dirname(__file__), "payloads"))
+    parser.set_defaults(llm_tokens_per_second=200.0, llm_slow_rate=0.0, llm_slow_ms=0.0, llm_error_rate=0.0,
+                        no_hedging=True, no_single_flight=True, async_jobs=False, progress=False)
+    args = parser.parse_args()
+    args.concurrency = args.burst
+
+    if args.no_sequencing:
+        os.environ["SESSION_SEQUENCING_DISABLED"] = "true"
+    if args.no_supersede:
+        os.environ["RUN_SUPERSEDE_DISABLED"] = "true"
+    openai, tavily, db, _, _ = install_local_backends(args)
+
+    from src.handlers import healthbot_graph, session_manager
+    from src.handlers.process_user_message import handler
+
+    rng = random.Random(args.seed)
+    user_id = "stress-user"
+    session_id = str(uuid.uuid4())
+    statuses = Counter()
+    accepted = 0
+    latencies = []
+    started = time.perf_counter()
+    for loop in range(args.loops):
+        for message_type, message in SESSION_SCRIPT:
+            with quiet():
+                results = send_burst(handler, user_id, session_id, message_type, message, args.burst,
+                                     args.stagger_ms, args.client_retries, args.retry_delay_ms, rng)
+            codes = sorted(code for code, _, _ in results)
+            statuses.update(codes)
+            accepted += sum(1 for code, text, _ in results if code == 200 or text == SUPERSEDED_IN_RUN)
+            latencies.extend(ms for _, _, ms in results)
+            print(f"loop {loop + 1} {message_type:<13} {codes}")
+    elapsed = time.perf_counter() - started
+    openai.stop()
+    tavily.stop()
+
+    saver = healthbot_graph.get_graph().checkpointer.saver
+    problems, checkpoint_count = check_session(saver, session_manager, user_id, session_id,
+                                               statuses[200], accepted)
+    if not isinstance(saver, DynamoDBSaver):
+        problems.append(f"checkpoints went to {type(saver).__name__}, not DynamoDBSaver")
+    checkpoint_calls = db.tables[os.environ["SESSION_STATE_TABLE"]].calls
+    unexpected = {code: count for code, count in statuses.items() if code not in (200, 409)}
+    if unexpected:
+        problems.append(f"unexpected responses: {unexpected}")
+
+    latencies.sort()
+    print(f"\nRequests: {sum(statuses.values())} in {elapsed:.2f}s, "
+          f"p50 {latencies[len(latencies) // 2]:.0f} ms, max {latencies[-1]:.0f} ms")
+    print(f"Responses: {dict(sorted(statuses.items()))}  checkpoints: {checkpoint_count}  "
+          f"sequencing: {'off' if args.no_sequencing else 'on'}  supersede: {'off' if args.no_supersede else 'on'}")
+    print(f"Checkpoint table calls: {json.dumps(dict(sorted(checkpoint_calls.items())))}")
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    if not problems:
+        print("OK: session state stayed linear")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
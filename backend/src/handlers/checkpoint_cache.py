@@ -0,0 +1,317 @@
+"""
+In-container read-through cache for the latest checkpoint of each thread.
+
+Warm Lambda containers frequently serve consecutive turns of the same session,
+so the checkpoint written at the end of one turn is usually exactly the one the
+next turn loads. The cache keeps those tuples in a bounded LRU and validates
+them against a tiny head pointer (the latest checkpoint ID per session) instead
+of re-reading the full checkpoint from DynamoDB.
+
+The same head pointer makes checkpoint writes version-conditioned: a write
+only moves the head from the checkpoint it was built on, so when two runs
+load the same checkpoint only the first to write goes on and the other gets
+CheckpointConflict instead of writing a divergent successor.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, NamedTuple, Optional, Sequence, Tuple
+
+from langgraph.checkpoint.base import BaseCheckpointSaver, CheckpointTuple, get_checkpoint_id
+
+from .memory_profiler import profile_memory
+from .metrics import put_metrics
+
+
+class CheckpointConflict(Exception):
+    """Another run wrote a checkpoint for the thread after this run loaded its state."""
+
+    def __init__(self, thread_id: str, parent_id: Optional[str]):
+        super().__init__(f"checkpoint head of thread {thread_id} moved past {parent_id or 'the empty thread'}")
+        self.thread_id = thread_id
+        self.parent_id = parent_id
+
+
+class CachedCheckpoint(NamedTuple):
+    """Serialized copy of a checkpoint tuple, detached from the live graph state."""
+    config: Dict[str, Any]
+    parent_config: Optional[Dict[str, Any]]
+    checkpoint: Tuple[str, bytes]
+    metadata: Tuple[str, bytes]
+    cached_at: float
+
+
+class CheckpointLRU:
+    """Bounded LRU of the latest checkpoint per (thread_id, checkpoint_ns)."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], CachedCheckpoint]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str]) -> Optional[CachedCheckpoint]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: Tuple[str, str], entry: CachedCheckpoint) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, key: Tuple[str, str]) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def discard_thread(self, thread_id: str) -> None:
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == thread_id]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Shared by every saver built in this container so the cache survives across
+# warm invocations even when the graph itself is rebuilt.
+_shared_cache = CheckpointLRU(int(os.environ.get("CHECKPOINT_CACHE_SIZE", "64")))
+
+
+def get_shared_cache() -> CheckpointLRU:
+    """Get the container-wide checkpoint cache."""
+    return _shared_cache
+
+
+class CachingCheckpointSaver(BaseCheckpointSaver):
+    """
+    Checkpointer wrapper that serves the latest checkpoint from memory when it is
+    known to be current.
+
+    Freshness is established in one of two ways:
+      - the entry was written or read less than `lease_seconds` ago, or
+      - `head_reader(thread_id)` returns the same checkpoint ID as the cached entry.
+
+    Any mismatch, probe failure or explicit checkpoint_id lookup falls through to
+    the wrapped saver, whose result then refreshes the cache.
+
+    `head_writer(thread_id, checkpoint_id, expected_id, dangling_id=None)`
+    moves the head only if it is still at `expected_id` and returns whether it
+    did; put() raises CheckpointConflict when it did not.
+    """
+
+    def __init__(
+        self,
+        saver: BaseCheckpointSaver,
+        head_reader: Optional[Callable[[str], Optional[str]]] = None,
+        head_writer: Optional[Callable[..., bool]] = None,
+        cache: Optional[CheckpointLRU] = None,
+        lease_seconds: Optional[float] = None,
+    ):
+        super().__init__(serde=saver.serde)
+        self.saver = saver
+        self.head_reader = head_reader
+        self.head_writer = head_writer
+        self.cache = cache if cache is not None else get_shared_cache()
+        if lease_seconds is None:
+            lease_seconds = float(os.environ.get("CHECKPOINT_CACHE_LEASE_SECONDS", "1.0"))
+        self.lease_seconds = lease_seconds
+        self._read_ms_ewma: Optional[float] = None
+
+    @property
+    def config_specs(self) -> list:
+        return self.saver.config_specs
+
+    @staticmethod
+    def _cache_key(config: Dict[str, Any]) -> Tuple[str, str]:
+        configurable = config["configurable"]
+        return configurable["thread_id"], configurable.get("checkpoint_ns", "")
+
+    def _to_entry(self, config, parent_config, checkpoint, metadata) -> CachedCheckpoint:
+        # Serializing up front detaches the entry from objects the graph keeps mutating
+        return CachedCheckpoint(
+            config=config,
+            parent_config=parent_config,
+            checkpoint=self.serde.dumps_typed(checkpoint),
+            metadata=self.serde.dumps_typed(metadata),
+            cached_at=time.monotonic(),
+        )
+
+    def _from_entry(self, entry: CachedCheckpoint) -> CheckpointTuple:
+        return CheckpointTuple(
+            config=entry.config,
+            checkpoint=self.serde.loads_typed(entry.checkpoint),
+            metadata=self.serde.loads_typed(entry.metadata),
+            parent_config=entry.parent_config,
+            pending_writes=[],
+        )
+
+    def _record_read(self, elapsed_ms: float) -> None:
+        if self._read_ms_ewma is None:
+            self._read_ms_ewma = elapsed_ms
+        else:
+            self._read_ms_ewma = 0.8 * self._read_ms_ewma + 0.2 * elapsed_ms
+
+    def _is_fresh(self, thread_id: str, entry: CachedCheckpoint) -> Tuple[bool, float]:
+        """Return (fresh, probe_ms) for a cached entry."""
+        if time.monotonic() - entry.cached_at <= self.lease_seconds:
+            return True, 0.0
+        if self.head_reader is None:
+            return False, 0.0
+
+        started = time.perf_counter()
+        try:
+            head = self.head_reader(thread_id)
+        except Exception as e:
+            print(f"⚠️ Checkpoint head probe failed for {thread_id}: {e}")
+            return False, (time.perf_counter() - started) * 1000
+        probe_ms = (time.perf_counter() - started) * 1000
+        return head is not None and head == entry.config["configurable"].get("checkpoint_id"), probe_ms
+
+    def get_tuple(self, config: Dict[str, Any]) -> Optional[CheckpointTuple]:
+        with profile_memory("checkpoint:load"):
+            return self._get_tuple(config)
+
+    def _get_tuple(self, config: Dict[str, Any]) -> Optional[CheckpointTuple]:
+        # Historical lookups are rare and bypass the cache entirely
+        if get_checkpoint_id(config):
+            return self.saver.get_tuple(config)
+
+        key = self._cache_key(config)
+        entry = self.cache.get(key)
+        if entry is not None:
+            fresh, probe_ms = self._is_fresh(key[0], entry)
+            if fresh:
+                saved_ms = max((self._read_ms_ewma or 0.0) - probe_ms, 0.0)
+                print(f"⚡ Checkpoint cache hit for thread {key[0]}")
+                put_metrics({
+                    "CheckpointCacheHit": (1, "Count"),
+                    "CheckpointCacheProbeLatency": (probe_ms, "Milliseconds"),
+                    "CheckpointCacheSavedReadLatency": (saved_ms, "Milliseconds"),
+                })
+                return self._from_entry(entry)
+            print(f"🔄 Checkpoint cache entry for thread {key[0]} is stale")
+            put_metrics({"CheckpointCacheStale": (1, "Count")})
+            self.cache.discard(key)
+
+        started = time.perf_counter()
+        result = self.saver.get_tuple(config)
+        read_ms = (time.perf_counter() - started) * 1000
+        self._record_read(read_ms)
+        put_metrics({
+            "CheckpointCacheMiss": (1, "Count"),
+            "CheckpointReadLatency": (read_ms, "Milliseconds"),
+        })
+
+        # Tuples with pending writes belong to an interrupted superstep; leave
+        # those to the saver rather than mirroring its write ordering rules
+        if result is not None and not result.pending_writes:
+            self.cache.set(key, self._to_entry(result.config, result.parent_config, result.checkpoint, result.metadata))
+        return result
+
+    def list(
+        self,
+        config: Optional[Dict[str, Any]],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        return self.saver.list(config, filter=filter, before=before, limit=limit)
+
+    def put(self, config, checkpoint, metadata, new_versions) -> Dict[str, Any]:
+        with profile_memory("checkpoint:save"):
+            return self._put(config, checkpoint, metadata, new_versions)
+
+    def _move_head(self, key: Tuple[str, str], checkpoint_id: str, parent_id: Optional[str]) -> bool:
+        if self.head_writer(key[0], checkpoint_id, parent_id):
+            return True
+        # A head whose own checkpoint never landed (the writer died between
+        # the two writes) would otherwise refuse every later write
+        head = self.head_reader(key[0]) if self.head_reader is not None else None
+        if head is None or head == parent_id:
+            return False
+        head_config = {"configurable": {"thread_id": key[0], "checkpoint_ns": key[1], "checkpoint_id": head}}
+        if self.saver.get_tuple(head_config) is not None:
+            return False
+        moved = self.head_writer(key[0], checkpoint_id, parent_id, head)
+        if moved:
+            print(f"🔧 Replaced dangling checkpoint head {head} of thread {key[0]}")
+        return moved
+
+    def _put(self, config, checkpoint, metadata, new_versions) -> Dict[str, Any]:
+        key = self._cache_key(config)
+        if self.head_writer is None:
+            new_config = self.saver.put(config, checkpoint, metadata, new_versions)
+        else:
+            # Move the head before writing so a concurrent reader can never
+            # validate an entry older than a checkpoint that already exists,
+            # and only from the checkpoint this one builds on, so a run that
+            # loaded superseded state cannot write a divergent successor
+            parent_id = get_checkpoint_id(config) or None
+            try:
+                moved = self._move_head(key, checkpoint["id"], parent_id)
+            except Exception as e:
+                print(f"⚠️ Failed to record checkpoint head for {key[0]}: {e}")
+                self.cache.discard(key)
+                return self.saver.put(config, checkpoint, metadata, new_versions)
+            if not moved:
+                print(f"⚔️ Checkpoint conflict on thread {key[0]}: head moved past {parent_id}")
+                put_metrics({"CheckpointConflict": (1, "Count")})
+                self.cache.discard(key)
+                raise CheckpointConflict(key[0], parent_id)
+            try:
+                new_config = self.saver.put(config, checkpoint, metadata, new_versions)
+            except Exception:
+                # Hand the head back so the thread's next write is not refused
+                if parent_id is not None:
+                    try:
+                        self.head_writer(key[0], parent_id, checkpoint["id"])
+                    except Exception as e:
+                        print(f"⚠️ Failed to restore checkpoint head for {key[0]}: {e}")
+                self.cache.discard(key)
+                raise
+
+        parent_config = config if get_checkpoint_id(config) else None
+        self.cache.set(key, self._to_entry(new_config, parent_config, checkpoint, metadata))
+        return new_config
+
+    def put_writes(self, config, writes: Sequence[Tuple[str, Any]], task_id: str, task_path: str = "") -> None:
+        self.saver.put_writes(config, writes, task_id, task_path)
+        # Pending writes only exist mid-superstep and the next put() supersedes
+        # them, so dropping the entry is simpler than tracking them here
+        self.cache.discard(self._cache_key(config))
+
+    def delete_thread(self, thread_id: str) -> None:
+        self.cache.discard_thread(thread_id)
+        self.saver.delete_thread(thread_id)
+
+    def get_next_version(self, current, channel):
+        return self.saver.get_next_version(current, channel)
+
+    # The async API is not used by the Lambda handler; delegate it untouched
+    async def aget_tuple(self, config):
+        return await self.saver.aget_tuple(config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        async for item in self.saver.alist(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        self.cache.discard(self._cache_key(config))
+        return await self.saver.aput(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        self.cache.discard(self._cache_key(config))
+        return await self.saver.aput_writes(config, writes, task_id, task_path)
@@ -0,0 +1,414 @@
+"""
+Circuit breakers for the OpenAI relay and Tavily.
+
+LLM and search calls go through breaker_call(dependency, fn). Each container
+keeps a rolling window of the dependency's outcomes over
+CIRCUIT_BREAKER_WINDOW_SECONDS; once it holds CIRCUIT_BREAKER_MIN_CALLS calls
+and either the share of failures reaches CIRCUIT_BREAKER_FAILURE_RATE or the
+share of calls slower than the dependency's slow-call threshold reaches
+CIRCUIT_BREAKER_SLOW_CALL_RATE, the container opens the breaker.
+
+Breaker state lives in one CircuitBreakerTable item per dependency, which
+every container re-reads at most every CIRCUIT_BREAKER_REFRESH_SECONDS, so
+one container tripping makes all of them fail fast with CircuitOpenError and
+take their fallback without calling the dependency. When the open period
+ends, a single caller wins a conditional write to send the half-open probe:
+success closes the breaker everywhere, failure reopens it for twice as long
+(up to CIRCUIT_BREAKER_MAX_OPEN_SECONDS).
+
+Only outcomes that say something about the dependency count: connection
+errors, 429 and 5xx answers, and timeouts at the call's full cap. Other 4xx
+answers (a bad request, an expired key) and timeouts the request budget had
+cut short pass through without touching the window, and a half-open probe
+that ends that way hands the probe back to the next caller.
+
+Without CIRCUIT_BREAKER_TABLE the state is kept per container, and if the
+table cannot be reached the breaker decides from what it last saw.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+import httpx
+import openai
+from botocore.exceptions import ClientError
+
+from .metrics import put_metrics
+from ..utils.aws_clients import get_aws_resource
+
+T = TypeVar("T")
+
+# Successful calls slower than this still count against the dependency
+DEFAULT_SLOW_CALL_SECONDS = {
+    'openai': 20.0,
+    'tavily': 10.0
+}
+
+CLOSED = 'closed'
+OPEN = 'open'
+
+_dynamodb = None
+_circuit_breaker_table = None
+_breakers: Dict[str, "CircuitBreaker"] = {}
+_breakers_lock = threading.Lock()
+
+# Failures raised before any HTTP status is known
+_TRANSPORT_ERRORS = (OSError, openai.APIConnectionError, httpx.TransportError)
+_TIMEOUT_ERRORS = (TimeoutError, openai.APITimeoutError, httpx.TimeoutException)
+
+
+class CircuitOpenError(Exception):
+    """The dependency's breaker is open; the caller should take its fallback."""
+
+    def __init__(self, dependency: str, retry_after: float):
+        super().__init__(f"{dependency} is unavailable (circuit open, retry in {retry_after:.0f}s)")
+        self.dependency = dependency
+        self.retry_after = retry_after
+
+
+def _get_circuit_breaker_table():
+    """Get the circuit breaker table, creating the DynamoDB resource lazily."""
+    global _dynamodb, _circuit_breaker_table
+    if _circuit_breaker_table is None:
+        if _dynamodb is None:
+            _dynamodb = get_aws_resource('dynamodb')
+        _circuit_breaker_table = _dynamodb.Table(os.environ['CIRCUIT_BREAKER_TABLE'])
+    return _circuit_breaker_table
+
+
+def is_circuit_breaker_enabled() -> bool:
+    return os.environ.get('CIRCUIT_BREAKER_DISABLED', '').lower() not in {'1', 'true', 'yes'}
+
+
+def get_slow_call_seconds() -> Dict[str, float]:
+    """Slow-call threshold per dependency; CIRCUIT_BREAKER_SLOW_CALL_SECONDS (JSON) overrides the defaults."""
+    thresholds = dict(DEFAULT_SLOW_CALL_SECONDS)
+    override = os.environ.get('CIRCUIT_BREAKER_SLOW_CALL_SECONDS')
+    if override:
+        thresholds.update({k: float(v) for k, v in json.loads(override).items()})
+    return thresholds
+
+
+def is_dependency_failure(error: BaseException) -> bool:
+    """Whether a failed call counts against the dependency: no answer at all, a 429 or a 5xx."""
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    return isinstance(error, _TRANSPORT_ERRORS)
+
+
+def _settings() -> Dict[str, float]:
+    return {
+        'window': float(os.environ.get('CIRCUIT_BREAKER_WINDOW_SECONDS', '60')),
+        'min_calls': int(os.environ.get('CIRCUIT_BREAKER_MIN_CALLS', '5')),
+        'failure_rate': float(os.environ.get('CIRCUIT_BREAKER_FAILURE_RATE', '0.5')),
+        'slow_rate': float(os.environ.get('CIRCUIT_BREAKER_SLOW_CALL_RATE', '0.8')),
+        'open': float(os.environ.get('CIRCUIT_BREAKER_OPEN_SECONDS', '30')),
+        'max_open': float(os.environ.get('CIRCUIT_BREAKER_MAX_OPEN_SECONDS', '300')),
+        'probe_lease': float(os.environ.get('CIRCUIT_BREAKER_PROBE_SECONDS', '60')),
+        'refresh': float(os.environ.get('CIRCUIT_BREAKER_REFRESH_SECONDS', '5'))
+    }
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def _closed_state(dependency: str) -> Dict[str, Any]:
+    return {'dependency': dependency, 'state': CLOSED}
+
+
+class _LocalStore:
+    """Breaker state kept in this container only."""
+
+    def __init__(self):
+        self._items: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def read(self, dependency: str) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._items.get(dependency) or _closed_state(dependency))
+
+    def trip(self, dependency: str, open_seconds: float, now_ms: int) -> bool:
+        with self._lock:
+            if self._items.get(dependency, {}).get('state') == OPEN:
+                return False
+            self._items[dependency] = {
+                'dependency': dependency, 'state': OPEN,
+                'openUntil': now_ms + int(open_seconds * 1000), 'openSeconds': int(open_seconds)
+            }
+            return True
+
+    def claim_probe(self, dependency: str, owner: str, now_ms: int, lease_seconds: float) -> bool:
+        with self._lock:
+            item = self._items.get(dependency, {})
+            if item.get('state') != OPEN or item['openUntil'] > now_ms or item.get('probeUntil', 0) >= now_ms:
+                return False
+            item.update(probeOwner=owner, probeUntil=now_ms + int(lease_seconds * 1000))
+            return True
+
+    def settle_probe(self, dependency: str, owner: str, reopen_seconds: Optional[float], now_ms: int) -> None:
+        with self._lock:
+            if self._items.get(dependency, {}).get('probeOwner') != owner:
+                return
+            if reopen_seconds is None:
+                self._items[dependency] = _closed_state(dependency)
+            else:
+                self._items[dependency] = {
+                    'dependency': dependency, 'state': OPEN,
+                    'openUntil': now_ms + int(reopen_seconds * 1000), 'openSeconds': int(reopen_seconds)
+                }
+
+    def release_probe(self, dependency: str, owner: str) -> None:
+        with self._lock:
+            item = self._items.get(dependency, {})
+            if item.get('probeOwner') == owner:
+                item.pop('probeOwner')
+                item.pop('probeUntil', None)
+
+
+class _TableStore:
+    """Breaker state shared across containers through CircuitBreakerTable."""
+
+    def read(self, dependency: str) -> Dict[str, Any]:
+        item = _get_circuit_breaker_table().get_item(Key={'dependency': dependency}).get('Item')
+        return item or _closed_state(dependency)
+
+    def _conditional(self, **kwargs) -> bool:
+        try:
+            _get_circuit_breaker_table().update_item(**kwargs)
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+                return False
+            raise
+
+    def trip(self, dependency: str, open_seconds: float, now_ms: int) -> bool:
+        # Only the first container to trip sets the open period
+        return self._conditional(
+            Key={'dependency': dependency},
+            UpdateExpression='SET #state = :open, openUntil = :until, openSeconds = :seconds, updatedAt = :now '
+                             'REMOVE probeOwner, probeUntil',
+            ConditionExpression='attribute_not_exists(dependency) OR #state = :closed',
+            ExpressionAttributeNames={'#state': 'state'},
+            ExpressionAttributeValues={
+                ':open': OPEN, ':closed': CLOSED, ':until': now_ms + int(open_seconds * 1000),
+                ':seconds': int(open_seconds), ':now': now_ms
+            }
+        )
+
+    def claim_probe(self, dependency: str, owner: str, now_ms: int, lease_seconds: float) -> bool:
+        return self._conditional(
+            Key={'dependency': dependency},
+            UpdateExpression='SET probeOwner = :owner, probeUntil = :lease',
+            ConditionExpression='#state = :open AND openUntil <= :now '
+                                'AND (attribute_not_exists(probeUntil) OR probeUntil < :now)',
+            ExpressionAttributeNames={'#state': 'state'},
+            ExpressionAttributeValues={
+                ':owner': owner, ':lease': now_ms + int(lease_seconds * 1000), ':open': OPEN, ':now': now_ms
+            }
+        )
+
+    def settle_probe(self, dependency: str, owner: str, reopen_seconds: Optional[float], now_ms: int) -> None:
+        values: Dict[str, Any] = {':owner': owner, ':now': now_ms}
+        if reopen_seconds is None:
+            update = 'SET #state = :closed, updatedAt = :now REMOVE openUntil, openSeconds, probeOwner, probeUntil'
+            values[':closed'] = CLOSED
+        else:
+            update = 'SET #state = :open, openUntil = :until, openSeconds = :seconds, updatedAt = :now ' \
+                     'REMOVE probeOwner, probeUntil'
+            values.update({':open': OPEN, ':until': now_ms + int(reopen_seconds * 1000), ':seconds': int(reopen_seconds)})
+        # A probe whose lease ran out has been superseded and must not overwrite the newer outcome
+        self._conditional(
+            Key={'dependency': dependency},
+            UpdateExpression=update,
+            ConditionExpression='probeOwner = :owner',
+            ExpressionAttributeNames={'#state': 'state'},
+            ExpressionAttributeValues=values
+        )
+
+    def release_probe(self, dependency: str, owner: str) -> None:
+        self._conditional(
+            Key={'dependency': dependency},
+            UpdateExpression='REMOVE probeOwner, probeUntil',
+            ConditionExpression='probeOwner = :owner',
+            ExpressionAttributeValues={':owner': owner}
+        )
+
+
+class CircuitBreaker:
+    """Rolling outcome window for one dependency plus a cached view of its shared state."""
+
+    def __init__(self, dependency: str, store):
+        self.dependency = dependency
+        self.store = store
+        self._window: Deque[Tuple[float, bool, bool]] = deque()
+        self._state: Optional[Dict[str, Any]] = None
+        self._state_read_at = 0.0
+        self._lock = threading.Lock()
+
+    def _current_state(self, settings: Dict[str, float]) -> Dict[str, Any]:
+        with self._lock:
+            state, read_at = self._state, self._state_read_at
+        if state is not None and time.monotonic() - read_at < settings['refresh']:
+            return state
+        try:
+            state = self.store.read(self.dependency)
+        except Exception as e:
+            print(f"⚠️ Circuit breaker state for {self.dependency} unavailable: {e}")
+            put_metrics({"CircuitBreakerStoreError": (1, "Count")}, {"Dependency": self.dependency})
+            state = state or _closed_state(self.dependency)
+        self._remember(state)
+        return state
+
+    def _remember(self, state: Dict[str, Any]) -> None:
+        with self._lock:
+            self._state = state
+            self._state_read_at = time.monotonic()
+
+    def before_call(self) -> Optional[str]:
+        """Admit a call: None for a normal call, a probe token for the half-open probe; raises when open."""
+        settings = _settings()
+        state = self._current_state(settings)
+        if state.get('state') != OPEN:
+            return None
+
+        now_ms = _now_ms()
+        open_until = int(state.get('openUntil', 0))
+        if now_ms < open_until:
+            put_metrics({"CircuitRejected": (1, "Count")}, {"Dependency": self.dependency})
+            raise CircuitOpenError(self.dependency, (open_until - now_ms) / 1000)
+
+        owner = str(uuid.uuid4())
+        try:
+            claimed = self.store.claim_probe(self.dependency, owner, now_ms, settings['probe_lease'])
+        except Exception as e:
+            print(f"⚠️ Could not claim circuit probe for {self.dependency}: {e}")
+            claimed = False
+        if not claimed:
+            # Another caller is probing; keep failing fast until it reports back
+            put_metrics({"CircuitRejected": (1, "Count")}, {"Dependency": self.dependency})
+            raise CircuitOpenError(self.dependency, 1)
+        print(f"🔌 Circuit for {self.dependency} half-open, sending probe")
+        return owner
+
+    def record(self, failed: bool, elapsed: float, probe: Optional[str]) -> None:
+        settings = _settings()
+        slow = elapsed >= get_slow_call_seconds().get(self.dependency, float('inf'))
+        now = time.monotonic()
+
+        if probe is not None:
+            self._settle_probe(probe, failed or slow, settings)
+            return
+
+        with self._lock:
+            self._window.append((now, failed, slow))
+            while self._window and self._window[0][0] < now - settings['window']:
+                self._window.popleft()
+            calls = len(self._window)
+            failures = sum(1 for _, f, _ in self._window if f)
+            slow_calls = sum(1 for _, _, s in self._window if s)
+        if calls < settings['min_calls']:
+            return
+
+        if failures / calls >= settings['failure_rate']:
+            reason = 'failures'
+        elif slow_calls / calls >= settings['slow_rate']:
+            reason = 'latency'
+        else:
+            return
+        self._trip(reason, calls, failures, slow_calls, settings)
+
+    def release(self, probe: Optional[str]) -> None:
+        """Record nothing for a call that said nothing about the dependency, handing back its probe."""
+        if probe is None:
+            return
+        try:
+            self.store.release_probe(self.dependency, probe)
+        except Exception as e:
+            # The probe lease runs out on its own
+            print(f"⚠️ Could not release circuit probe for {self.dependency}: {e}")
+
+    def _trip(self, reason: str, calls: int, failures: int, slow_calls: int, settings: Dict[str, float]) -> None:
+        with self._lock:
+            self._window.clear()
+        now_ms = _now_ms()
+        try:
+            opened = self.store.trip(self.dependency, settings['open'], now_ms)
+        except Exception as e:
+            print(f"⚠️ Could not share open circuit for {self.dependency}: {e}")
+            opened = True
+        if not opened:
+            # Another container opened it first; adopt its open period
+            self._state_read_at = 0.0
+            self._current_state(settings)
+            return
+        print(f"🔌 Circuit for {self.dependency} opened on {reason}: "
+              f"{failures} failed and {slow_calls} slow of {calls} calls")
+        put_metrics({"CircuitOpened": (1, "Count")}, {"Dependency": self.dependency, "Reason": reason})
+        self._remember({'dependency': self.dependency, 'state': OPEN,
+                        'openUntil': now_ms + int(settings['open'] * 1000), 'openSeconds': int(settings['open'])})
+
+    def _settle_probe(self, owner: str, failed: bool, settings: Dict[str, float]) -> None:
+        state = self._state or {}
+        reopen_seconds = None
+        if failed:
+            reopen_seconds = min(float(state.get('openSeconds', settings['open'])) * 2, settings['max_open'])
+        now_ms = _now_ms()
+        try:
+            self.store.settle_probe(self.dependency, owner, reopen_seconds, now_ms)
+        except Exception as e:
+            print(f"⚠️ Could not record circuit probe for {self.dependency}: {e}")
+        if reopen_seconds is None:
+            print(f"🔌 Circuit for {self.dependency} closed after a successful probe")
+            put_metrics({"CircuitClosed": (1, "Count")}, {"Dependency": self.dependency})
+            self._remember(_closed_state(self.dependency))
+        else:
+            print(f"🔌 Circuit probe for {self.dependency} failed, reopening for {reopen_seconds:.0f}s")
+            put_metrics({"CircuitOpened": (1, "Count")}, {"Dependency": self.dependency, "Reason": "probe"})
+            self._remember({'dependency': self.dependency, 'state': OPEN,
+                            'openUntil': now_ms + int(reopen_seconds * 1000), 'openSeconds': int(reopen_seconds)})
+
+
+def get_breaker(dependency: str) -> CircuitBreaker:
+    with _breakers_lock:
+        breaker = _breakers.get(dependency)
+        if breaker is None:
+            store = _TableStore() if os.environ.get('CIRCUIT_BREAKER_TABLE') else _LocalStore()
+            breaker = _breakers[dependency] = CircuitBreaker(dependency, store)
+    return breaker
+
+
+def breaker_call(dependency: str, fn: Callable[[], T], timeout_clipped: bool = False) -> T:
+    """
+    Call `fn` through the dependency's breaker.
+
+    Raises CircuitOpenError without calling `fn` while the breaker is open;
+    otherwise the call's outcome and latency are recorded and its result or
+    exception passed through. Exceptions that are not dependency failures
+    (is_dependency_failure) are not recorded, nor are timeouts when
+    `timeout_clipped` says the call got less than its full timeout.
+    """
+    if not is_circuit_breaker_enabled():
+        return fn()
+
+    breaker = get_breaker(dependency)
+    probe = breaker.before_call()
+    started = time.monotonic()
+    try:
+        result = fn()
+    except Exception as e:
+        if (timeout_clipped and isinstance(e, _TIMEOUT_ERRORS)) or not is_dependency_failure(e):
+            breaker.release(probe)
+        else:
+            breaker.record(True, time.monotonic() - started, probe)
+        raise
+    breaker.record(False, time.monotonic() - started, probe)
+    return result
@@ -1,10 +1,112 @@
+import json
 import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from uuid import UUID
+
+import openai
+from langchain_core.callbacks import BaseCallbackHandler
 from langchain_openai import ChatOpenAI
 from tavily import TavilyClient
 
+from .metrics import put_metrics
+from .prompts import PROMPTS
+
+# Per-call caps; call_with_deadline lowers them as the request deadline nears
+LLM_TIMEOUT_SECONDS = float(os.environ.get("LLM_TIMEOUT_SECONDS", "60"))
+SEARCH_TIMEOUT_SECONDS = float(os.environ.get("SEARCH_TIMEOUT_SECONDS", "20"))
+
+# Model settings per node. A missing model means OPENAI_MODEL; the quiz
+# path only needs a short JSON object or a few sentences, so its output is
+# capped well below the patient summary's 300-500 words.
+DEFAULT_LLM_PROFILES = {
+    "summarize": {"model": None, "max_tokens": 1200, "temperature": 0, "timeout": LLM_TIMEOUT_SECONDS},
+    "generate_question": {"model": None, "max_tokens": 350, "temperature": 0, "timeout": 20},
+    "evaluate": {"model": None, "max_tokens": 250, "temperature": 0, "timeout": 20},
+}
+
+
+def get_llm_profile(name: str) -> Dict[str, Any]:
+    """
+    Model settings for one node.
+
+    LLM_PROFILES (JSON, from the environment or the secrets bundle) overrides
+    individual fields, e.g. {"evaluate": {"model": "gpt-4o-mini", "max_tokens": 200}}.
+    """
+    profile = dict(DEFAULT_LLM_PROFILES.get(name, {"model": None, "max_tokens": None, "temperature": 0,
+                                                   "timeout": LLM_TIMEOUT_SECONDS}))
+    override = os.environ.get("LLM_PROFILES")
+    if override:
+        profile.update(json.loads(override).get(name, {}))
+    profile["model"] = profile.get("model") or os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
+    profile["timeout"] = float(profile["timeout"])
+    return profile
+
+
+class LLMProfileMetrics(BaseCallbackHandler):
+    """Emits latency, token counts and prompt-cache hits of each completion, by profile, model and prompt version."""
+
+    def __init__(self, profile: str, model: str):
+        self.profile = profile
+        self.model = model
+        self.prompt_version = PROMPTS[profile].version if profile in PROMPTS else "none"
+        self._started: Dict[UUID, float] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs) -> None:
+        self._started[run_id] = time.perf_counter()
 
-def get_llm() -> ChatOpenAI:
-    """Get configured OpenAI LLM client"""
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs) -> None:
+        started = self._started.pop(run_id, None)
+        generation = response.generations[0][0] if response.generations and response.generations[0] else None
+        message = getattr(generation, "message", None)
+        usage = getattr(message, "usage_metadata", None) or {}
+        finish_reason = (getattr(message, "response_metadata", None) or {}).get("finish_reason") \
+            or (getattr(generation, "generation_info", None) or {}).get("finish_reason")
+        input_tokens = usage.get("input_tokens", 0)
+        # Prompt tokens the provider served from its prefix cache
+        cached_tokens = (usage.get("input_token_details") or {}).get("cache_read", 0)
+        metrics = {
+            "LLMInputTokens": (input_tokens, "Count"),
+            "LLMCachedInputTokens": (cached_tokens, "Count"),
+            "LLMCacheHitRatio": (100 * cached_tokens / input_tokens if input_tokens else 0, "Percent"),
+            "LLMOutputTokens": (usage.get("output_tokens", 0), "Count"),
+            # Output cut off by max_tokens; raise the profile's limit if this is common
+            "LLMTruncated": (1 if finish_reason == "length" else 0, "Count")
+        }
+        if started is not None:
+            metrics["LLMLatency"] = ((time.perf_counter() - started) * 1000, "Milliseconds")
+        put_metrics(metrics, {"Profile": self.profile, "Model": self.model, "PromptVersion": self.prompt_version})
+
+    def on_llm_error(self, error, *, run_id: UUID, **kwargs) -> None:
+        self._started.pop(run_id, None)
+
+
+# One chat model per distinct configuration, all sharing one HTTP connection pool
+_llms: Dict[Tuple, ChatOpenAI] = {}
+_http_client: Optional[openai.DefaultHttpxClient] = None
+_llm_lock = threading.Lock()
+
+
+def _get_http_client() -> openai.DefaultHttpxClient:
+    global _http_client
+    if _http_client is None:
+        _http_client = openai.DefaultHttpxClient()
+    return _http_client
+
+
+def reset_llm_clients() -> None:
+    """Close pooled OpenAI connections and drop cached models; the next get_llm() builds fresh ones."""
+    global _http_client
+    with _llm_lock:
+        _llms.clear()
+        if _http_client is not None:
+            _http_client.close()
+            _http_client = None
+
+
+def get_llm(profile: Optional[str] = None) -> ChatOpenAI:
+    """Get configured OpenAI LLM client, using the named node profile's model settings"""
     # Debug API key loading
     api_key = os.environ.get("OPENAI_API_KEY", "")
     print(f"OpenAI API Key (first 10 chars): {api_key[:10]}...")
@@ -15,14 +117,28 @@ def get_llm() -> ChatOpenAI:
     base_url = os.environ.get("OPENAI_BASE_URL", "https://openai.vocareum.com/v1")
     print(f"Using base URL: {base_url}")
     
-    # Keep a small, fast model for lambda latency
-    return ChatOpenAI(
-        model=os.environ.get("OPENAI_MODEL", "gpt-4o-mini"), 
-        temperature=0,
-        api_key=api_key,
-        base_url=base_url,
-        max_retries=0  # Disable retries to get immediate error feedback
-    )
+    settings = get_llm_profile(profile) if profile else {
+        "model": os.environ.get("OPENAI_MODEL", "gpt-4o-mini"), "max_tokens": None, "temperature": 0
+    }
+    key = (profile, settings["model"], settings["temperature"], settings["max_tokens"], api_key, base_url)
+    llm = _llms.get(key)
+    if llm is None:
+        with _llm_lock:
+            llm = _llms.get(key)
+            if llm is None:
+                llm = ChatOpenAI(
+                    model=settings["model"],
+                    temperature=settings["temperature"],
+                    max_tokens=settings["max_tokens"],
+                    api_key=api_key,
+                    base_url=base_url,
+                    max_retries=0,  # Disable retries to get immediate error feedback
+                    stream_usage=True,  # Hedged calls stream; keep token usage on the final chunk
+                    http_client=_get_http_client(),
+                    callbacks=[LLMProfileMetrics(profile, settings["model"])] if profile else None
+                )
+                _llms[key] = llm
+    return llm
 
 
 def get_tavily_client() -> TavilyClient:
@@ -30,4 +146,11 @@ def get_tavily_client() -> TavilyClient:
     api_key = os.environ.get("TAVILY_API_KEY", "")
     if not api_key:
         raise ValueError("TAVILY_API_KEY environment variable is required")
-    return TavilyClient(api_key=api_key)
+    client = TavilyClient(api_key=api_key)
+    
+    # Allow pointing search at a local stand-in (load tests); the pinned
+    # tavily-python 0.3.x posts directly to base_url
+    base_url = os.environ.get("TAVILY_BASE_URL")
+    if base_url:
+        client.base_url = base_url.rstrip("/") + "/search"
+    return client
@@ -0,0 +1,135 @@
+"""
+Request deadlines derived from the Lambda context.
+
+The handler turns `context.get_remaining_time_in_millis()` into a Deadline,
+holding back DEADLINE_RESERVE_SECONDS for writing the checkpoint, the bot
+message and the response. execute_workflow puts it in the graph config
+(`configurable.deadline`), where nodes and tools find it with
+current_deadline(). call_with_deadline sizes each client call's timeout from
+what is left, retries with backoff only while the budget allows, and raises
+DeadlineExceeded early enough for the node's fallback to run in time.
+"""
+
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Optional, TypeVar
+
+from langgraph.config import get_config
+
+from .circuit_breaker import CircuitOpenError, breaker_call
+from .metrics import put_metrics
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(TimeoutError):
+    """Not enough of the request budget is left to attempt the call."""
+
+
+class Deadline:
+    """A point on the monotonic clock by which the workflow must be done."""
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+
+    @classmethod
+    def from_lambda_context(cls, context: Any) -> Optional["Deadline"]:
+        """The invocation's remaining time less the reserve; None when the context has no clock."""
+        remaining = getattr(context, 'get_remaining_time_in_millis', None)
+        if not callable(remaining):
+            return None
+        reserve = float(os.environ.get('DEADLINE_RESERVE_SECONDS', '10'))
+        return cls(max(remaining() / 1000 - reserve, 0))
+
+    def remaining(self) -> float:
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, cap: float) -> float:
+        """Timeout for the next call: the cap, or less when the deadline is nearer."""
+        return min(cap, self.remaining())
+
+    def __repr__(self) -> str:
+        return f"Deadline(remaining={self.remaining():.1f}s)"
+
+
+def current_deadline() -> Optional[Deadline]:
+    """The deadline of the running workflow; None outside a graph run or when none was set."""
+    try:
+        config = get_config()
+    except RuntimeError:
+        return None
+    return config.get('configurable', {}).get('deadline')
+
+
+def run_with_timeout(fn: Callable[[], T], timeout: float) -> T:
+    """
+    Run a blocking call that has no timeout of its own, giving up after `timeout` seconds.
+
+    The call keeps running on a daemon thread after a timeout; its result is discarded.
+    """
+    outcome = {}
+    done = threading.Event()
+
+    def run():
+        try:
+            outcome['result'] = fn()
+        except Exception as e:
+            outcome['error'] = e
+        finally:
+            done.set()
+
+    threading.Thread(target=run, daemon=True).start()
+    if not done.wait(timeout):
+        raise DeadlineExceeded(f"call did not finish within {timeout:.1f}s")
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome['result']
+
+
+def call_with_deadline(operation: str, fn: Callable[[float], T], cap: float,
+                       min_seconds: float = 1.0, retries: Optional[int] = None,
+                       dependency: Optional[str] = None) -> T:
+    """
+    Call `fn(timeout)` within the current deadline, retrying failures while time allows.
+
+    Each attempt gets `cap` seconds or whatever is left of the deadline,
+    whichever is less. An attempt is only started (or retried, after an
+    exponential backoff with jitter) when at least `min_seconds` would
+    remain for it; otherwise DeadlineExceeded is raised, or the last error
+    once retries are exhausted. With `dependency`, every attempt goes
+    through that dependency's circuit breaker and an open breaker's
+    CircuitOpenError is raised straight away; a timeout counts against the
+    breaker only when the attempt had the full `cap`.
+    """
+    deadline = current_deadline()
+    if retries is None:
+        retries = int(os.environ.get('DEADLINE_MAX_RETRIES', '1'))
+    backoff = float(os.environ.get('DEADLINE_RETRY_BACKOFF_MS', '200')) / 1000
+
+    for attempt in range(retries + 1):
+        timeout = deadline.timeout(cap) if deadline else cap
+        if timeout < min_seconds:
+            print(f"⏱️ {operation}: {timeout:.1f}s left of the request budget, skipping the call")
+            put_metrics({"DeadlineExceeded": (1, "Count")}, {"Operation": operation})
+            raise DeadlineExceeded(f"{operation}: only {timeout:.1f}s left of the request budget")
+        try:
+            if dependency:
+                return breaker_call(dependency, lambda: fn(timeout), timeout_clipped=timeout < cap)
+            return fn(timeout)
+        except CircuitOpenError:
+            raise
+        except DeadlineExceeded:
+            put_metrics({"DeadlineExceeded": (1, "Count")}, {"Operation": operation})
+            raise
+        except Exception as e:
+            delay = backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+            if attempt == retries or (deadline and deadline.remaining() - delay < min_seconds):
+                raise
+            print(f"🔁 {operation} failed ({e}), retrying in {delay * 1000:.0f} ms")
+            put_metrics({"DeadlineRetry": (1, "Count")}, {"Operation": operation})
+            time.sleep(delay)
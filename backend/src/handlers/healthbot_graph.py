@@ -5,12 +5,56 @@ from langgraph_checkpoint_dynamodb import DynamoDBSaver, DynamoDBConfig, DynamoD
 
 # Import our modular components
 from .types import HealthBotState
+from .checkpoint_cache import CachingCheckpointSaver
+from .memory_profiler import profile_node
+from .progress import progress_node
+from .run_generation import guard_node
+from .session_manager import get_checkpoint_head, set_checkpoint_head
 from .tools import web_search
 from .routers import router, entry_router, tool_router, present_summary_router, present_question_router, generate_question_router, evaluate_router, handle_restart_router
 from .nodes.topic_nodes import node_collect_topic, node_search
 from .nodes.summary_nodes import node_summarize, node_present_summary
 from .nodes.quiz_nodes import node_generate_question, node_present_question, node_evaluate
 from .nodes.restart_nodes import node_handle_restart
+from ..utils.aws_clients import get_aws_session
+
+
+_default_checkpointer = None
+_default_graph = None
+
+
+def _get_default_checkpointer():
+    """
+    DynamoDB checkpointer shared by every invocation of the container.
+
+    Built once, so warm invocations skip the saver's table checks and client
+    construction. The saver creates its boto3 clients through boto3's default
+    session, which get_aws_session() replaces with the tuned shared one.
+    """
+    global _default_checkpointer
+    if _default_checkpointer is None:
+        get_aws_session()
+        table_config = DynamoDBTableConfig(
+            table_name=os.environ.get('SESSION_STATE_TABLE', 'healthbot-backend-session-state-v2-dev'),
+            billing_mode="PAY_PER_REQUEST",
+            enable_encryption=True,
+            enable_point_in_time_recovery=True,
+            ttl_days=None  # Disable TTL in langgraph since we handle it manually
+        )
+        
+        config = DynamoDBConfig(
+            table_config=table_config,
+            region_name=os.environ.get('AWS_REGION', 'us-east-1')
+        )
+        
+        # Use deploy=True to let LangGraph handle table configuration
+        # and serve warm-container reads from the in-memory checkpoint cache
+        _default_checkpointer = CachingCheckpointSaver(
+            DynamoDBSaver(config, deploy=True),
+            head_reader=get_checkpoint_head,
+            head_writer=set_checkpoint_head
+        )
+    return _default_checkpointer
 
 
 def build_graph(checkpointer=None):
@@ -18,15 +62,15 @@ def build_graph(checkpointer=None):
     graph = StateGraph(HealthBotState)
 
     # Add nodes
-    graph.add_node("collect_topic", node_collect_topic)
-    graph.add_node("search", node_search)
+    graph.add_node("collect_topic", guard_node("collect_topic", progress_node("collect_topic", profile_node("collect_topic", node_collect_topic))))
+    graph.add_node("search", guard_node("search", progress_node("search", profile_node("search", node_search))))
     graph.add_node("tools", ToolNode([web_search]))
-    graph.add_node("summarize", node_summarize)
-    graph.add_node("present_summary", node_present_summary)
-    graph.add_node("generate_question", node_generate_question)
-    graph.add_node("present_question", node_present_question)
-    graph.add_node("evaluate", node_evaluate)
-    graph.add_node("handle_restart", node_handle_restart)
+    graph.add_node("summarize", guard_node("summarize", progress_node("summarize", profile_node("summarize", node_summarize))))
+    graph.add_node("present_summary", guard_node("present_summary", progress_node("present_summary", profile_node("present_summary", node_present_summary))))
+    graph.add_node("generate_question", guard_node("generate_question", progress_node("generate_question", profile_node("generate_question", node_generate_question))))
+    graph.add_node("present_question", guard_node("present_question", progress_node("present_question", profile_node("present_question", node_present_question))))
+    graph.add_node("evaluate", guard_node("evaluate", progress_node("evaluate", profile_node("evaluate", node_evaluate))))
+    graph.add_node("handle_restart", guard_node("handle_restart", progress_node("handle_restart", profile_node("handle_restart", node_handle_restart))))
 
     # Add conditional entry edge to route based on current status
     graph.add_conditional_edges(
@@ -37,7 +81,12 @@ def build_graph(checkpointer=None):
     
     # Add sequential flow edges
     graph.add_edge("collect_topic", "search")
-    graph.add_edge("search", "tools")  # Search creates tool calls, so go directly to tools
+    # Search creates a tool call, unless it found this topic's search already done
+    graph.add_conditional_edges(
+        source="search",
+        path=tool_router,
+        path_map=["tools", "summarize"]
+    )
     graph.add_edge("tools", "summarize")  # Tools always go to summarize after execution
     graph.add_edge("summarize", "present_summary")
     
@@ -74,29 +123,22 @@ def build_graph(checkpointer=None):
 
     # Use provided checkpointer or default to DynamoDB
     if checkpointer is None:
-        # Use DynamoDB checkpointing with custom configuration
-        table_config = DynamoDBTableConfig(
-            table_name=os.environ.get('SESSION_STATE_TABLE', 'healthbot-backend-session-state-v2-dev'),
-            billing_mode="PAY_PER_REQUEST",
-            enable_encryption=True,
-            enable_point_in_time_recovery=True,
-            ttl_days=None  # Disable TTL in langgraph since we handle it manually
-        )
-        
-        config = DynamoDBConfig(
-            table_config=table_config,
-            region_name=os.environ.get('AWS_REGION', 'us-east-1')
-        )
-        
-        # Use deploy=True to let LangGraph handle table configuration
-        checkpointer = DynamoDBSaver(config, deploy=True)
+        checkpointer = _get_default_checkpointer()
     
     compiled_graph = graph.compile(checkpointer=checkpointer)
     print("✅ Graph compiled successfully with checkpointer")
     return compiled_graph
 
 
+def get_graph():
+    """The graph with the default checkpointer, compiled once per container."""
+    global _default_graph
+    if _default_graph is None:
+        _default_graph = build_graph()
+    return _default_graph
+
+
 # Export the build_graph function for use in other modules
-__all__ = ['build_graph', 'HealthBotState']
+__all__ = ['build_graph', 'get_graph', 'HealthBotState']
 
 
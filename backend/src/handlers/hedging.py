@@ -0,0 +1,205 @@
+"""
+Hedged LLM requests for the slow, user-facing completions.
+
+invoke_hedged streams the completion on a worker thread. If no token has
+arrived within the node's hedge threshold, an identical second request is
+sent and whichever completes first is returned; the other one is closed at
+its next chunk. The threshold is the recent p95 time-to-first-token for the
+node (HEDGE_DEFAULT_MS until enough samples exist), and hedges are paid for
+from a budget that only grows by HEDGE_BUDGET_RATIO per request, so a
+provider-wide slowdown cannot double our traffic.
+"""
+
+import contextvars
+import math
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from .deadline import DeadlineExceeded
+from .metrics import put_metrics
+
+# Samples needed before the learned p95 replaces HEDGE_DEFAULT_MS
+MIN_SAMPLES = 20
+
+
+def is_hedging_enabled() -> bool:
+    return os.environ.get('LLM_HEDGING_DISABLED', '').lower() not in {'1', 'true', 'yes'}
+
+
+class FirstTokenTracker:
+    """Rolling time-to-first-token samples per node."""
+
+    def __init__(self, window: int = 100):
+        self._samples: Dict[str, Deque[float]] = {}
+        self._window = window
+        self._lock = threading.Lock()
+
+    def record(self, node: str, seconds: float) -> None:
+        with self._lock:
+            self._samples.setdefault(node, deque(maxlen=self._window)).append(seconds)
+
+    def threshold(self, node: str) -> float:
+        """Seconds to wait for a first token before hedging."""
+        floor = float(os.environ.get('HEDGE_MIN_MS', '250')) / 1000
+        with self._lock:
+            samples = sorted(self._samples.get(node, ()))
+        if len(samples) < MIN_SAMPLES:
+            return max(floor, float(os.environ.get('HEDGE_DEFAULT_MS', '2000')) / 1000)
+        p95 = samples[min(len(samples) - 1, math.ceil(0.95 * len(samples)) - 1)]
+        return max(floor, p95)
+
+
+class HedgeBudget:
+    """Each request earns `ratio` of a hedge, up to `burst` saved hedges."""
+
+    def __init__(self, ratio: float, burst: float):
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = burst
+        self._lock = threading.Lock()
+
+    def earn(self) -> None:
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+
+_tracker = FirstTokenTracker()
+_budget: Optional[HedgeBudget] = None
+_budget_lock = threading.Lock()
+
+
+def _get_budget() -> HedgeBudget:
+    global _budget
+    with _budget_lock:
+        if _budget is None:
+            _budget = HedgeBudget(
+                ratio=float(os.environ.get('HEDGE_BUDGET_RATIO', '0.1')),
+                burst=float(os.environ.get('HEDGE_BUDGET_BURST', '2'))
+            )
+    return _budget
+
+
+class _Attempt:
+    """One streamed completion running on its own thread."""
+
+    def __init__(self, llm: Any, messages: List[Any], kwargs: Dict[str, Any], is_hedge: bool, done: "queue.Queue"):
+        self.llm = llm
+        self.messages = messages
+        self.kwargs = kwargs
+        self.is_hedge = is_hedge
+        self.first_token = threading.Event()
+        self.started_at: Optional[float] = None
+        self.first_token_at: Optional[float] = None
+        self.cancelled = False
+        self._done = done
+        # Carry the graph's callback config (recorder, tracing) onto the worker thread
+        context = contextvars.copy_context()
+        self._thread = threading.Thread(target=context.run, args=(self._run,), daemon=True)
+
+    def start(self) -> "_Attempt":
+        self.started_at = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def _mark_first_token(self) -> None:
+        if not self.first_token.is_set():
+            self.first_token_at = time.perf_counter()
+            self.first_token.set()
+
+    def _run(self) -> None:
+        try:
+            if not hasattr(self.llm, 'stream'):
+                result = self.llm.invoke(self.messages, **self.kwargs)
+                self._mark_first_token()
+            else:
+                result = None
+                stream = self.llm.stream(self.messages, **self.kwargs)
+                try:
+                    for chunk in stream:
+                        self._mark_first_token()
+                        if self.cancelled:
+                            return
+                        result = chunk if result is None else result + chunk
+                finally:
+                    # Closing the generator closes the HTTP stream of a losing attempt
+                    stream.close()
+            self._done.put((self, result, None))
+        except Exception as e:
+            self._done.put((self, None, e))
+
+
+def invoke_hedged(llm: Any, messages: List[Any], node: str, timeout: Optional[float] = None) -> Any:
+    """
+    Invoke the chat model, hedging with a duplicate request when the first token is late.
+
+    Returns the winning message (an AIMessageChunk when streamed); raises the
+    last error if every attempt fails, or DeadlineExceeded when nothing has
+    finished within `timeout` seconds.
+    """
+    kwargs = {'timeout': timeout} if timeout is not None else {}
+    if not is_hedging_enabled():
+        return llm.invoke(messages, **kwargs)
+
+    started = time.perf_counter()
+    budget = _get_budget()
+    budget.earn()
+    done: "queue.Queue" = queue.Queue()
+    attempts = [_Attempt(llm, messages, kwargs, False, done).start()]
+
+    threshold = _tracker.threshold(node)
+    # A hedge sent as the timeout runs out could never finish in time
+    can_hedge = timeout is None or threshold < timeout
+    finished = []
+    try:
+        finished.append(done.get(timeout=threshold if can_hedge else timeout))
+    except queue.Empty:
+        pass
+
+    if not finished and can_hedge and not attempts[0].first_token.is_set():
+        if budget.try_spend():
+            print(f"⏱️ No first token from {node} after {threshold * 1000:.0f} ms, sending hedged request")
+            put_metrics({"LLMHedgeSent": (1, "Count")}, {"Node": node})
+            attempts.append(_Attempt(llm, messages, kwargs, True, done).start())
+        else:
+            put_metrics({"LLMHedgeSuppressed": (1, "Count")}, {"Node": node})
+
+    error: Optional[Exception] = None
+    for _ in range(len(attempts)):
+        if finished:
+            attempt, result, attempt_error = finished.pop()
+        else:
+            try:
+                wait = None if timeout is None else max(timeout - (time.perf_counter() - started), 0)
+                attempt, result, attempt_error = done.get(timeout=wait)
+            except queue.Empty:
+                for other in attempts:
+                    other.cancelled = True
+                raise DeadlineExceeded(f"{node}: no completion within {timeout:.1f}s")
+        if attempt_error is not None:
+            error = attempt_error
+            continue
+        for other in attempts:
+            if other is not attempt:
+                other.cancelled = True
+        first_token_at = attempt.first_token_at or time.perf_counter()
+        # The threshold learns the attempt's own time to first token; counting
+        # a winning hedge's wait before it was sent would ratchet it upwards
+        _tracker.record(node, first_token_at - attempt.started_at)
+        # What the user waited for, including the time before a winning hedge went out
+        put_metrics({
+            "LLMTimeToFirstToken": ((first_token_at - started) * 1000, "Milliseconds"),
+            **({"LLMHedgeWon": (1, "Count")} if attempt.is_hedge else {})
+        }, {"Node": node})
+        return result
+    raise error
@@ -0,0 +1,175 @@
+"""
+Idempotent message submission.
+
+Clients may send an `idempotencyKey` with a message and reuse it when they
+retry. The first request claims the key in IdempotencyTable and, once it
+finishes, stores its response there for IDEMPOTENCY_TTL_SECONDS; duplicates
+get that response replayed instead of re-running the workflow. Duplicates
+that arrive while the original is still running wait for it rather than
+starting a second run.
+"""
+
+import hashlib
+import json
+import os
+import time
+import uuid
+from typing import Any, Dict, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+from .metrics import put_metrics
+from .response_builder import create_error_response, create_http_response
+from ..utils.aws_clients import get_aws_resource
+
+# DynamoDB items are capped at 400 KB; larger responses are not kept for replay
+MAX_STORED_BODY_BYTES = 350_000
+
+# Used when the Lambda context cannot tell us how long the original may run
+DEFAULT_LEASE_SECONDS = 200
+
+_dynamodb = None
+_idempotency_table = None
+
+
+def _get_idempotency_table():
+    """Get the idempotency table, creating the DynamoDB resource lazily."""
+    global _dynamodb, _idempotency_table
+    if _idempotency_table is None:
+        if _dynamodb is None:
+            _dynamodb = get_aws_resource('dynamodb')
+        _idempotency_table = _dynamodb.Table(os.environ['IDEMPOTENCY_TABLE'])
+    return _idempotency_table
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def _record_key(user_id: str, idempotency_key: str) -> str:
+    # Keys are scoped per user so one patient can never replay another's response
+    return f"{user_id}#{idempotency_key}"
+
+
+def request_fingerprint(message_data: Dict[str, Any]) -> str:
+    """Hash of the parts of a message that must match for a key to be reused."""
+    payload = [message_data['message_content'], message_data.get('session_id'), message_data['message_type']]
+    return hashlib.sha256(json.dumps(payload).encode()).hexdigest()
+
+
+def _lease_seconds(context: Any) -> float:
+    """The original run cannot outlive its own invocation, so lease it for exactly that long."""
+    remaining = getattr(context, 'get_remaining_time_in_millis', None)
+    if callable(remaining):
+        return remaining() / 1000 + 5
+    return DEFAULT_LEASE_SECONDS
+
+
+def _replay(item: Dict[str, Any]) -> Dict[str, Any]:
+    put_metrics({"IdempotentReplay": (1, "Count")})
+    return create_http_response(int(item['statusCode']), json.loads(item['responseBody']),
+                                {'Idempotent-Replayed': 'true'})
+
+
+def begin_request(user_id: str, idempotency_key: str, fingerprint: str,
+                  context: Any = None) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+    """
+    Claim an idempotency key for this request.
+
+    Returns:
+        Tuple of (claim_token, early_response). A claim token means this
+        request owns the key and must call finish_request; an early response
+        (replay, conflict or still-running) must be returned as-is.
+    """
+    table = _get_idempotency_table()
+    key = _record_key(user_id, idempotency_key)
+    token = str(uuid.uuid4())
+    lease = _lease_seconds(context)
+    wait_seconds = float(os.environ.get('IDEMPOTENCY_WAIT_SECONDS', '25'))
+    poll_seconds = float(os.environ.get('IDEMPOTENCY_POLL_MS', '500')) / 1000
+    deadline = time.monotonic() + wait_seconds
+
+    while True:
+        now_ms = _now_ms()
+        try:
+            table.put_item(
+                Item={
+                    'idempotencyKey': key,
+                    'claimToken': token,
+                    'fingerprint': fingerprint,
+                    'recordStatus': 'in_progress',
+                    'expiresAt': now_ms + int(lease * 1000),
+                    'ttl': int(now_ms / 1000 + lease) + 60
+                },
+                # Expired records are reusable: the replay window has passed, or
+                # the original crashed or timed out without finishing
+                ConditionExpression='attribute_not_exists(idempotencyKey) OR expiresAt < :now',
+                ExpressionAttributeValues={':now': now_ms}
+            )
+            return token, None
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+                raise
+
+        item = table.get_item(Key={'idempotencyKey': key}, ConsistentRead=True).get('Item')
+        if item is None:
+            continue
+        if item.get('fingerprint') != fingerprint:
+            put_metrics({"IdempotencyKeyReused": (1, "Count")})
+            return None, create_http_response(422, create_error_response(
+                422, 'Unprocessable Entity', 'idempotencyKey was already used for a different message'))
+        if item.get('recordStatus') == 'completed':
+            print(f"🔁 Replaying stored response for idempotency key {idempotency_key}")
+            return None, _replay(item)
+        if time.monotonic() >= deadline:
+            print(f"⏳ Original request for idempotency key {idempotency_key} is still running")
+            put_metrics({"IdempotentStillRunning": (1, "Count")})
+            return None, create_http_response(
+                409,
+                create_error_response(409, 'Conflict', 'The original request is still being processed'),
+                {'Retry-After': str(max(1, int(poll_seconds * 4))), 'Access-Control-Expose-Headers': 'Retry-After'}
+            )
+        put_metrics({"IdempotentWait": (1, "Count")})
+        time.sleep(poll_seconds)
+
+
+def finish_request(user_id: str, idempotency_key: str, token: str, response: Dict[str, Any]) -> None:
+    """
+    Store the response for replay, or release the key when the request should be retryable.
+
+    Server errors, rate limiting and other responses that ask to be retried
+    (Retry-After) are released rather than stored, so a retry with the same
+    key gets a fresh attempt.
+    """
+    table = _get_idempotency_table()
+    key = _record_key(user_id, idempotency_key)
+    status = int(response.get('statusCode', 500))
+    body = response.get('body') or '{}'
+    retryable = status >= 500 or status == 429 or 'Retry-After' in (response.get('headers') or {})
+    try:
+        if retryable or len(body) > MAX_STORED_BODY_BYTES:
+            table.delete_item(
+                Key={'idempotencyKey': key},
+                ConditionExpression='claimToken = :token',
+                ExpressionAttributeValues={':token': token}
+            )
+            return
+        ttl_seconds = int(os.environ.get('IDEMPOTENCY_TTL_SECONDS', '3600'))
+        table.update_item(
+            Key={'idempotencyKey': key},
+            UpdateExpression='SET recordStatus = :completed, statusCode = :status, responseBody = :body, '
+                             'expiresAt = :expires, #ttl = :ttl',
+            ConditionExpression='claimToken = :token',
+            ExpressionAttributeNames={'#ttl': 'ttl'},
+            ExpressionAttributeValues={
+                ':completed': 'completed',
+                ':status': status,
+                ':body': body,
+                ':expires': _now_ms() + ttl_seconds * 1000,
+                ':ttl': int(time.time()) + ttl_seconds,
+                ':token': token
+            }
+        )
+    except Exception as e:
+        # Losing the record only means a later duplicate runs again
+        print(f"⚠️ Could not record idempotent response for {idempotency_key}: {e}")
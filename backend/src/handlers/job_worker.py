@@ -0,0 +1,65 @@
+"""
+SQS-triggered worker for asynchronous message jobs.
+
+Runs each queued turn through the same path as the synchronous API handler
+and stores the response on the job for GET /api/jobs/{jobId}. A job whose
+message SQS will not deliver again (its last receive failed, or it reached
+the dead-letter queue, e.g. after the worker timed out, see
+jobs.dead_letter_handler) is marked failed with a 500 so pollers stop
+waiting for it.
+"""
+
+import json
+import os
+import time
+from typing import Any, Dict
+
+from .deadline import Deadline
+from .jobs import claim_job, complete_job, fail_job
+from .metrics import put_metrics
+from .process_user_message import run_message
+
+# A running job whose worker has been quiet this long (past the worker's own
+# timeout) is treated as abandoned and may be picked up again
+JOB_STALE_SECONDS = float(os.environ.get('JOB_STALE_SECONDS', '200'))
+
+# The queue's redrive maxReceiveCount: a failure on this delivery sends the
+# message to the dead-letter queue instead of back to the worker
+JOB_MAX_RECEIVE_COUNT = int(os.environ.get('JOB_MAX_RECEIVE_COUNT', '3'))
+
+
+def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """Process a batch of job messages, reporting failed records back to SQS individually."""
+    failures = []
+    for record in event.get('Records', []):
+        try:
+            _run_job(json.loads(record['body']), context)
+        except Exception as e:
+            print(f"❌ Job message {record.get('messageId')} failed: {e}")
+            import traceback
+            traceback.print_exc()
+            receive_count = int(record.get('attributes', {}).get('ApproximateReceiveCount', '1'))
+            if receive_count >= JOB_MAX_RECEIVE_COUNT:
+                fail_job(record, f"Job failed after {receive_count} attempts")
+            failures.append({'itemIdentifier': record['messageId']})
+    return {'batchItemFailures': failures}
+
+
+def _run_job(payload: Dict[str, Any], context: Any = None) -> None:
+    job_id = payload['jobId']
+    if not claim_job(job_id, JOB_STALE_SECONDS):
+        print(f"⏭️ Job {job_id} already claimed, skipping duplicate delivery")
+        return
+
+    started = time.time()
+    put_metrics({"JobQueueWait": ((started - payload.get('enqueuedAt', started)) * 1000, "Milliseconds")})
+    print(f"🛠️ Running job {job_id}")
+
+    response = run_message(payload['userInfo'], payload['messageData'], Deadline.from_lambda_context(context))
+    complete_job(job_id, response)
+
+    put_metrics({
+        "JobRunTime": ((time.time() - started) * 1000, "Milliseconds"),
+        "JobFailed" if response['statusCode'] >= 400 else "JobSucceeded": (1, "Count")
+    })
+    print(f"✅ Job {job_id} finished with status {response['statusCode']}")
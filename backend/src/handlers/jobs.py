@@ -0,0 +1,190 @@
+"""
+Asynchronous message jobs.
+
+A message submitted with `"async": true` is recorded in JobsTable and sent
+to JobQueue (SQS) instead of running inside the API request; the
+job_worker function runs it and stores the response on the job, which the
+client polls through GET /api/jobs/{jobId}. dead_letter_handler fails the
+jobs whose messages SQS gave up on; like the status endpoint it runs in a
+function of its own without the LangGraph workflow.
+"""
+
+import json
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from botocore.exceptions import ClientError
+
+from .metrics import put_metrics
+from .response_builder import create_error_response, create_http_response
+from ..utils.aws_clients import get_aws_client, get_aws_resource
+
+_dynamodb = None
+_jobs_table = None
+_sqs = None
+
+
+def _get_jobs_table():
+    """Get the jobs table, creating the DynamoDB resource lazily."""
+    global _dynamodb, _jobs_table
+    if _jobs_table is None:
+        if _dynamodb is None:
+            _dynamodb = get_aws_resource('dynamodb')
+        _jobs_table = _dynamodb.Table(os.environ['JOBS_TABLE'])
+    return _jobs_table
+
+
+def _get_sqs():
+    global _sqs
+    if _sqs is None:
+        _sqs = get_aws_client('sqs')
+    return _sqs
+
+
+def _job_ttl() -> int:
+    return int(time.time()) + int(os.environ.get('JOB_TTL_SECONDS', '86400'))
+
+
+def is_async_enabled() -> bool:
+    return bool(os.environ.get('JOB_QUEUE_URL'))
+
+
+def submit_job(user_info: Dict[str, Any], message_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Record a queued job and hand it to the worker queue.
+
+    Returns:
+        The stored job item
+    """
+    now = datetime.now(timezone.utc).isoformat()
+    job = {
+        'jobId': str(uuid.uuid4()),
+        'userId': user_info['user_id'],
+        'sessionId': message_data['session_id'],
+        'messageType': message_data['message_type'],
+        'jobStatus': 'queued',
+        'createdAt': now,
+        'updatedAt': now,
+        'ttl': _job_ttl()
+    }
+    _get_jobs_table().put_item(Item=job)
+
+    # The message carries everything the worker needs, so it never re-reads the request
+    _get_sqs().send_message(
+        QueueUrl=os.environ['JOB_QUEUE_URL'],
+        MessageBody=json.dumps({
+            'jobId': job['jobId'],
+            'userInfo': user_info,
+            'messageData': message_data,
+            'enqueuedAt': time.time()
+        })
+    )
+    print(f"📬 Queued job {job['jobId']} for session {job['sessionId']}")
+    return job
+
+
+def claim_job(job_id: str, stale_after_seconds: float) -> bool:
+    """
+    Move a job to running for this worker.
+
+    SQS delivers at least once, so a redelivered message only re-runs a job
+    whose previous worker has been silent for longer than its timeout.
+    """
+    now = datetime.now(timezone.utc)
+    stale_before = datetime.fromtimestamp(now.timestamp() - stale_after_seconds, timezone.utc).isoformat()
+    try:
+        _get_jobs_table().update_item(
+            Key={'jobId': job_id},
+            UpdateExpression='SET jobStatus = :running, updatedAt = :now',
+            ConditionExpression='jobStatus = :queued OR (jobStatus = :running AND updatedAt < :stale)',
+            ExpressionAttributeValues={
+                ':running': 'running',
+                ':queued': 'queued',
+                ':now': now.isoformat(),
+                ':stale': stale_before
+            }
+        )
+        return True
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+            return False
+        raise
+
+
+def complete_job(job_id: str, response: Dict[str, Any], unfinished_only: bool = False) -> bool:
+    """
+    Store the worker's HTTP-shaped response on the job.
+
+    With `unfinished_only`, a job that already succeeded or failed is left
+    as it is. Returns whether the response was stored.
+    """
+    status_code = int(response.get('statusCode', 500))
+    values = {
+        ':status': 'succeeded' if status_code < 400 else 'failed',
+        ':code': status_code,
+        ':body': response.get('body') or '{}',
+        ':now': datetime.now(timezone.utc).isoformat(),
+        ':ttl': _job_ttl()
+    }
+    condition = {}
+    if unfinished_only:
+        condition['ConditionExpression'] = 'jobStatus = :queued OR jobStatus = :running'
+        values.update({':queued': 'queued', ':running': 'running'})
+    try:
+        _get_jobs_table().update_item(
+            Key={'jobId': job_id},
+            UpdateExpression='SET jobStatus = :status, statusCode = :code, responseBody = :body, '
+                             'updatedAt = :now, #ttl = :ttl',
+            ExpressionAttributeNames={'#ttl': 'ttl'},
+            ExpressionAttributeValues=values,
+            **condition
+        )
+        return True
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+            return False
+        raise
+
+
+def fail_job(record: Dict[str, Any], reason: str) -> None:
+    """Finish the job of an SQS record that will not be delivered again with a 500; finished jobs keep their result."""
+    try:
+        job_id = json.loads(record['body'])['jobId']
+        response = create_http_response(500, create_error_response(500, 'Internal server error', reason))
+        if complete_job(job_id, response, unfinished_only=True):
+            put_metrics({"JobFailed": (1, "Count"), "JobAbandoned": (1, "Count")})
+            print(f"🪦 Job {job_id} marked failed: {reason}")
+    except Exception as e:
+        print(f"⚠️ Could not mark job from message {record.get('messageId')} failed: {e}")
+
+
+def dead_letter_handler(event: Dict[str, Any], context: Any) -> None:
+    """JobDeadLetterQueue consumer: fail every job whose message reached it, if nothing finished the job."""
+    for record in event.get('Records', []):
+        fail_job(record, "Job could not be processed")
+
+
+def get_job(job_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+    """Load a job for its owner; other users' jobs read as missing."""
+    item = _get_jobs_table().get_item(Key={'jobId': job_id}, ConsistentRead=True).get('Item')
+    if not item or item.get('userId') != user_id:
+        return None
+    return item
+
+
+def job_view(job: Dict[str, Any]) -> Dict[str, Any]:
+    """The client-facing shape of a job; finished jobs include the message response."""
+    view = {
+        'jobId': job['jobId'],
+        'sessionId': job.get('sessionId'),
+        'status': job['jobStatus'],
+        'createdAt': job.get('createdAt'),
+        'updatedAt': job.get('updatedAt')
+    }
+    if job['jobStatus'] in ('succeeded', 'failed'):
+        view['statusCode'] = int(job['statusCode'])
+        view['result'] = json.loads(job['responseBody'])
+    return view
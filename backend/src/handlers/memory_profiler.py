@@ -0,0 +1,157 @@
+"""
+Opt-in memory profiling for nodes, checkpoint I/O and whole invocations.
+
+Enable with MEMORY_PROFILING=true. Each profiled block emits its RSS, peak RSS,
+traced-allocation peak and net growth as EMF metrics (dimension "Scope") next
+to its duration, and logs the source lines with the largest net allocations.
+Tracing has a real CPU cost, so leave it off outside sizing and leak hunts.
+"""
+
+import functools
+import json
+import os
+import resource
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List
+
+from .metrics import put_metrics
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+_local = threading.local()
+
+# Warm invocations served by this container; a traced total that keeps rising
+# with this count is a leak
+_invocations = 0
+
+
+def is_memory_profiling_enabled() -> bool:
+    return os.environ.get("MEMORY_PROFILING", "").lower() in {"1", "true", "yes"}
+
+
+def current_rss_bytes() -> int:
+    """Resident set size right now (Linux), falling back to the lifetime peak."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes() -> int:
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class _Frame:
+    def __init__(self, scope: str):
+        self.scope = scope
+        self.peak = 0
+
+
+def _stack() -> List[_Frame]:
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def _observe_peak() -> int:
+    """Fold the traced peak since the last reset into every open block."""
+    current, peak = tracemalloc.get_traced_memory()
+    for frame in _stack():
+        frame.peak = max(frame.peak, peak)
+    return current
+
+
+def top_allocations(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot, limit: int) -> List[Dict[str, Any]]:
+    """Source lines with the largest net allocation growth between two snapshots."""
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    stats = after.filter_traces(filters).compare_to(before.filter_traces(filters), "lineno")
+    return [
+        {"location": str(stat.traceback[0]), "size_kb": round(stat.size_diff / 1024, 1), "count": stat.count_diff}
+        for stat in stats[:limit]
+        if stat.size_diff > 0
+    ]
+
+
+@contextmanager
+def profile_memory(scope: str) -> Iterator[None]:
+    """
+    Measure memory around a block when MEMORY_PROFILING is enabled.
+
+    Blocks nest: an invocation-level block still sees the peaks reached inside
+    the node blocks it contains.
+    """
+    if not is_memory_profiling_enabled():
+        yield
+        return
+
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    limit = int(os.environ.get("MEMORY_PROFILING_TOP", "5"))
+
+    traced_before = _observe_peak()
+    tracemalloc.reset_peak()
+    snapshot_before = tracemalloc.take_snapshot() if limit > 0 else None
+    rss_before = current_rss_bytes()
+    frame = _Frame(scope)
+    frame.peak = traced_before
+    _stack().append(frame)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration_ms = (time.perf_counter() - started) * 1000
+        traced_after = _observe_peak()
+        _stack().pop()
+        rss_after = current_rss_bytes()
+
+        put_metrics({
+            "MemoryRssMB": (rss_after / 1048576, "Megabytes"),
+            "MemoryRssGrowthMB": ((rss_after - rss_before) / 1048576, "Megabytes"),
+            "MemoryPeakRssMB": (peak_rss_bytes() / 1048576, "Megabytes"),
+            "MemoryTracedPeakKB": ((frame.peak - traced_before) / 1024, "Kilobytes"),
+            "MemoryTracedNetKB": ((traced_after - traced_before) / 1024, "Kilobytes"),
+            "ProfiledDuration": (duration_ms, "Milliseconds"),
+        }, {"Scope": scope})
+
+        if snapshot_before is not None:
+            allocations = top_allocations(snapshot_before, tracemalloc.take_snapshot(), limit)
+            print(f"🧠 {json.dumps({'memory_profile': scope, 'top_allocations': allocations})}")
+
+
+def profile_node(name: str, node: Callable) -> Callable:
+    """Wrap a graph node in profile_memory; returns the node untouched when profiling is off."""
+    if not is_memory_profiling_enabled():
+        return node
+
+    @functools.wraps(node)
+    def profiled(state):
+        with profile_memory(f"node:{name}"):
+            return node(state)
+
+    return profiled
+
+
+def profile_invocation(handler: Callable) -> Callable:
+    """Profile a whole Lambda invocation and track the warm-invocation count."""
+
+    @functools.wraps(handler)
+    def profiled(event, context):
+        global _invocations
+        if not is_memory_profiling_enabled():
+            return handler(event, context)
+        _invocations += 1
+        with profile_memory("invocation"):
+            result = handler(event, context)
+        # Traced bytes still alive after the invocation; steady growth across
+        # warm invocations points at a leak
+        put_metrics({
+            "MemoryTracedRetainedKB": (tracemalloc.get_traced_memory()[0] / 1024, "Kilobytes"),
+            "WarmInvocationNumber": (_invocations, "Count"),
+        }, {"Scope": "invocation"})
+        return result
+
+    return profiled
@@ -0,0 +1,65 @@
+"""
+Reducer for the `messages` state field that appends in O(new messages).
+
+LangGraph's add_messages re-coerces every message of the history, rebuilds
+an id index over it and copies it on each update, so even a node that adds
+one message pays for the whole conversation. append_messages returns a
+MessageHistory, a list that carries the position of each message id: when
+every incoming message is a plain message whose id is not in the history
+yet, the update is a lookup per new message plus a copy of the list's
+references. Anything else (replacing or removing messages, chunks, dicts or
+tuples) falls back to add_messages, and so does a history without an index,
+e.g. the plain list a checkpoint deserializes to, which is indexed once on
+the first update of a run.
+
+Histories derived from one another share a single id -> position map. A
+position, once recorded, holds in every history of the lineage that has the
+message, so siblings (LangGraph applies a task's writes to a copy of the
+channel for conditional edges before the channel itself) append alike. An
+update that would put an id at a different position, or a history that was
+changed in place since it was built, takes the add_messages path and starts
+a fresh index.
+"""
+
+import uuid
+from typing import Any, List
+
+from langchain_core.messages import BaseMessage, BaseMessageChunk, RemoveMessage
+from langgraph.graph.message import add_messages
+
+
+class MessageHistory(list):
+    """A message list that knows where each message id of its lineage sits."""
+
+    __slots__ = ("positions", "length")
+
+
+def indexed(messages: List[BaseMessage]) -> MessageHistory:
+    """Wrap messages that add_messages produced (unique ids, all set) with a fresh index."""
+    history = MessageHistory(messages)
+    history.positions = {message.id: position for position, message in enumerate(history)}
+    history.length = len(history)
+    return history
+
+
+def _appendable(message: Any) -> bool:
+    return isinstance(message, BaseMessage) and not isinstance(message, (BaseMessageChunk, RemoveMessage))
+
+
+def append_messages(left: Any, right: Any) -> MessageHistory:
+    """State reducer: add_messages semantics, appending new messages without rescanning the history."""
+    updates = right if isinstance(right, list) else [right]
+    positions = getattr(left, "positions", None)
+    if positions is not None and left.length == len(left) and all(_appendable(m) for m in updates):
+        for position, message in enumerate(updates, start=len(left)):
+            if message.id is None:
+                message.id = str(uuid.uuid4())
+            if positions.setdefault(message.id, position) != position:
+                break
+        else:
+            merged = MessageHistory(left)
+            merged.extend(updates)
+            merged.positions = positions
+            merged.length = len(merged)
+            return merged
+    return indexed(add_messages(left, right))
@@ -0,0 +1,35 @@
+import json
+import os
+import time
+from typing import Dict, Optional
+
+
+def put_metric(name: str, value: float, unit: str = "Count", dimensions: Optional[Dict[str, str]] = None) -> None:
+    """
+    Emit a single metric using the CloudWatch Embedded Metric Format.
+
+    Lambda ships stdout to CloudWatch Logs, which extracts EMF lines into
+    metrics without any extra API calls from the function.
+    """
+    put_metrics({name: (value, unit)}, dimensions)
+
+
+def put_metrics(metrics: Dict[str, tuple], dimensions: Optional[Dict[str, str]] = None) -> None:
+    """Emit several metrics that share the same dimensions as one EMF record."""
+    if os.environ.get("METRICS_DISABLED", "").lower() in {"1", "true", "yes"}:
+        return
+
+    dimensions = dimensions or {}
+    record = {
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": os.environ.get("METRICS_NAMESPACE", "HealthBot"),
+                "Dimensions": [list(dimensions.keys())],
+                "Metrics": [{"Name": name, "Unit": unit} for name, (_, unit) in metrics.items()]
+            }]
+        },
+        **dimensions,
+        **{name: value for name, (value, _) in metrics.items()}
+    }
+    print(json.dumps(record))
@@ -0,0 +1,46 @@
+"""
+Per-thread memo of the expensive nodes' work (search, summary, question).
+
+Each of those nodes records, in the checkpointed `node_memo` state field,
+a hash of the inputs its current outputs were produced from. The outputs
+themselves stay where they already live (the web_search ToolMessage, the
+`summary` and question fields), so the memo adds a few bytes per node to
+the checkpoint. When a turn is resumed or retried after dying part-way, a
+node whose inputs hash the same finds its earlier work instead of calling
+Tavily or the LLM again. collect_topic clears the memo when the topic
+changes.
+"""
+
+import hashlib
+from typing import Any, Dict, Optional
+
+from .metrics import put_metrics
+
+
+def update_memo(current: Optional[Dict[str, Any]], update: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """State reducer: merge per-node entries; an update of None clears the memo."""
+    if update is None:
+        return {}
+    return {**(current or {}), **update}
+
+
+def memo_key(*inputs: str) -> str:
+    """Stable hash of a node's (string) inputs."""
+    digest = hashlib.blake2b(digest_size=16)
+    for value in inputs:
+        digest.update(value.encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+def memo_lookup(state: Dict[str, Any], node: str, key: str) -> Optional[Dict[str, Any]]:
+    """The node's entry when it was recorded for these inputs, else None."""
+    entry = (state.get("node_memo") or {}).get(node)
+    hit = entry is not None and entry.get("key") == key
+    put_metrics({"NodeMemoHit" if hit else "NodeMemoMiss": (1, "Count")}, {"Node": node})
+    return entry if hit else None
+
+
+def memo_entry(node: str, key: str, **refs: Any) -> Dict[str, Any]:
+    """The `node_memo` update recording that the node's outputs came from `key`."""
+    return {node: {"key": key, **refs}}
@@ -1,24 +1,29 @@
 import json
 import uuid
 from langchain_core.messages import HumanMessage, AIMessage
-from langchain_core.prompts import ChatPromptTemplate
 from ..types import HealthBotState, MultipleChoiceQuestion
-from ..clients import get_llm
+from ..clients import get_llm, get_llm_profile
+from ..hedging import invoke_hedged
+from ..deadline import call_with_deadline
+from ..prompts import get_prompt
+from ..node_memo import memo_entry, memo_key, memo_lookup
 
 
 def node_generate_question(state: HealthBotState) -> HealthBotState:
     print("❓ Node: generate_question")
-    messages = state["messages"]
     summary = state.get("summary", "")
     topic = state.get("topic", "")
     user_message = (state.get("user_message") or "").strip()
     
-    # Check if we already have a question (continuing from previous state)
-    existing_question = state.get("question", "")
-    if existing_question:
+    # Generate question using LLM
+    llm = get_llm("generate_question")
+    
+    # Continue with the question already generated from this summary (a
+    # question left over from another topic or summary is regenerated)
+    key = memo_key(getattr(llm, "model_name", ""), topic, summary)
+    if state.get("question", "") and memo_lookup(state, "generate_question", key):
         print("❓ Continuing with existing question")
         return {
-            **state,
             "status": "present_question",
             "user_message": ""  # Clear consumed input
         }
@@ -29,29 +34,16 @@ def node_generate_question(state: HealthBotState) -> HealthBotState:
         name="patient",
         id=str(uuid.uuid4())
     )
-    messages.append(human_message)
-    
-    # Generate question using LLM
-    llm = get_llm()
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", "You are a medical educator. Generate multiple-choice questions in valid JSON format only. Do not include markdown formatting, code blocks, or any text outside the JSON."),
-        ("human", (
-            "Based on the following educational summary about '{topic}', create ONE multiple-choice question with 4 choices (A-D) and mark the correct answer.\n"
-            "The question should test understanding of key concepts from the summary.\n"
-            "Return ONLY valid JSON with this exact structure:\n"
-            "{{\n"
-            '  "question": "Your question text here",\n'
-            '  "choices": ["Choice A text", "Choice B text", "Choice C text", "Choice D text"],\n'
-            '  "correct_letter": "A"\n'
-            "}}\n"
-            "Make sure the question is clear and the choices are plausible but only one is correct.\n"
-            "Do not include any text before or after the JSON.\n\n"
-            "Summary:\n{summary}"
-        ))
-    ])
+    memo_update = {}
     
     try:
-        response = llm.invoke(prompt.format_messages(summary=summary, topic=topic))
+        prompt_messages = get_prompt("generate_question").template.format_messages(summary=summary, topic=topic)
+        response = call_with_deadline(
+            "generate_question",
+            lambda timeout: invoke_hedged(llm, prompt_messages, "generate_question", timeout),
+            get_llm_profile("generate_question")["timeout"],
+            dependency="openai"
+        )
         raw = response.content
         print(f"🔍 LLM response length: {len(raw)}")
         print(f"🔍 LLM response: {raw}")
@@ -111,6 +103,7 @@ def node_generate_question(state: HealthBotState) -> HealthBotState:
         
         # Format the question for display
         formatted_question = question_text + "\n\n" + "\n".join([f"{letter}. {text}" for letter, text in zip(["A","B","C","D"], choices)])
+        memo_update = {"node_memo": memo_entry("generate_question", key)}
         
     except Exception as e:
         print(f"Error parsing question JSON: {e}")
@@ -136,20 +129,20 @@ def node_generate_question(state: HealthBotState) -> HealthBotState:
     # Return the question directly and end execution
     print("❓ Question generated successfully, ending execution")
     return {
-        **state,
+        "messages": [human_message],
         "question": formatted_question,
         "correct_answer": correct_answer,
         "multiple_choice": multiple_choice,
         "status": "awaiting_answer",
         "bot_message": "Here's a quick comprehension check:\n\n" + formatted_question,
-        "response_type": "multiple_choice"
+        "response_type": "multiple_choice",
+        **memo_update
     }
 
 
 def node_present_question(state: HealthBotState) -> HealthBotState:
     """Present the generated question to the user and wait for their answer"""
     print("❓ Node: present_question")
-    messages = state["messages"]
     question = state.get("question", "")
     multiple_choice = state.get("multiple_choice", {})
     user_message = (state.get("user_message") or "").strip()
@@ -163,12 +156,11 @@ def node_present_question(state: HealthBotState) -> HealthBotState:
             name="patient",
             id=str(uuid.uuid4())
         )
-        messages.append(human_message)
         
         # Node just processes the input - router will handle routing
         print("❓ User provided answer, maintaining present_question status")
         return {
-            **state,
+            "messages": [human_message],
             "status": "present_question"
         }
     
@@ -179,11 +171,10 @@ def node_present_question(state: HealthBotState) -> HealthBotState:
         name="healthbot",
         id=str(uuid.uuid4())
     )
-    messages.append(ai_message)
     
     print("❓ Setting status to 'awaiting_answer' and ending execution")
     return {
-        **state,
+        "messages": [ai_message],
         "status": "awaiting_answer",
         "bot_message": "Here's a quick comprehension check:\n\n" + question,
         "response_type": "multiple_choice"
@@ -192,7 +183,6 @@ def node_present_question(state: HealthBotState) -> HealthBotState:
 
 def node_evaluate(state: HealthBotState) -> HealthBotState:
     print("📊 Node: evaluate")
-    messages = state["messages"]
     user_message = (state.get("user_message") or "").strip().upper()
     summary = state.get("summary", "")
     citations = state.get("citations", [])
@@ -206,39 +196,27 @@ def node_evaluate(state: HealthBotState) -> HealthBotState:
         name="patient",
         id=str(uuid.uuid4())
     )
-    messages.append(human_message)
     
     # Determine if the answer is correct
     is_correct = user_message == correct_letter
     grade = "Correct" if is_correct else "Incorrect"
     
     # Create explanation with citations
-    llm = get_llm()
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", "You are a medical educator providing feedback on a student's answer. Be encouraging and educational."),
-        ("human", (
-            "Student selected: {user_answer}\n"
-            "Correct answer: {correct_letter} ({correct_answer})\n"
-            "Grade: {grade}\n\n"
-            "Summary with citations:\n{summary}\n\n"
-            "Provide a 2-3 sentence explanation that:\n"
-            "1. Confirms if they were correct or explains why they were wrong\n"
-            "2. References relevant information from the summary using citations [1], [2], etc.\n"
-            "3. Reinforces the key learning points\n"
-            "4. Is encouraging and educational\n\n"
-            "Return only the explanation text, no JSON formatting."
-        ))
-    ])
+    llm = get_llm("evaluate")
     
     try:
-        response = llm.invoke(
-            prompt.format_messages(
-                user_answer=user_message,
-                correct_letter=correct_letter,
-                correct_answer=correct_answer,
-                grade=grade,
-                summary=summary
-            )
+        prompt_messages = get_prompt("evaluate").template.format_messages(
+            user_answer=user_message,
+            correct_letter=correct_letter,
+            correct_answer=correct_answer,
+            grade=grade,
+            summary=summary
+        )
+        response = call_with_deadline(
+            "evaluate",
+            lambda timeout: llm.invoke(prompt_messages, timeout=timeout),
+            get_llm_profile("evaluate")["timeout"],
+            dependency="openai"
         )
         explanation = response.content
     except Exception as e:
@@ -261,12 +239,11 @@ def node_evaluate(state: HealthBotState) -> HealthBotState:
         name="healthbot",
         id=str(uuid.uuid4())
     )
-    messages.append(ai_message)
     
     # Return the evaluation and end execution
     print("📊 Evaluation completed, ending execution")
     return {
-        **state,
+        "messages": [human_message, ai_message],
         "user_answer": user_message,
         "grade": grade,
         "explanation": explanation,
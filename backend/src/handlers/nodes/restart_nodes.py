@@ -5,7 +5,6 @@ from ..types import HealthBotState
 
 def node_handle_restart(state: HealthBotState) -> HealthBotState:
     print("🔄 Node: handle_restart")
-    messages = state["messages"]
     user_message = (state.get("user_message") or "").strip().lower()
     current_status = state.get("status", "ask_restart")
     
@@ -19,7 +18,6 @@ def node_handle_restart(state: HealthBotState) -> HealthBotState:
             name="patient",
             id=str(uuid.uuid4())
         )
-        messages.append(human_message)
         
         # Handle user response
         if user_message in {"yes", "y", "restart", "again", "another", "new topic"}:
@@ -30,11 +28,10 @@ def node_handle_restart(state: HealthBotState) -> HealthBotState:
                 name="healthbot",
                 id=str(uuid.uuid4())
             )
-            messages.append(ai_message)
             
             # Reset sensitive state for privacy and accuracy
             return {
-                **state,
+                "messages": [human_message, ai_message],
                 "status": "collecting_topic",
                 "bot_message": "Great! What health topic or medical condition would you like to learn about?",
                 "response_type": "text",
@@ -50,7 +47,8 @@ def node_handle_restart(state: HealthBotState) -> HealthBotState:
                 "user_answer": "",
                 "grade": "",
                 "explanation": "",
-                "confirmation_prompt": None
+                "confirmation_prompt": None,
+                "node_memo": None
             }
         elif user_message in {"no", "n", "end", "exit", "quit", "stop"}:
             print("🔄 User wants to end session")
@@ -60,10 +58,9 @@ def node_handle_restart(state: HealthBotState) -> HealthBotState:
                 name="healthbot",
                 id=str(uuid.uuid4())
             )
-            messages.append(ai_message)
             
             return {
-                **state,
+                "messages": [human_message, ai_message],
                 "status": "ended",
                 "bot_message": "Thanks for learning with HealthBot! Take care and stay healthy! 👋",
                 "response_type": "text"
@@ -76,10 +73,9 @@ def node_handle_restart(state: HealthBotState) -> HealthBotState:
                 name="healthbot",
                 id=str(uuid.uuid4())
             )
-            messages.append(ai_message)
             
             return {
-                **state,
+                "messages": [human_message, ai_message],
                 "status": "ask_restart",
                 "bot_message": "I didn't understand. Would you like to learn about another health topic?",
                 "response_type": "confirmation",
@@ -93,11 +89,10 @@ def node_handle_restart(state: HealthBotState) -> HealthBotState:
         name="healthbot",
         id=str(uuid.uuid4())
     )
-    messages.append(ai_message)
     
     print("🔄 Setting status to 'ask_restart' and ending execution")
     return {
-        **state,
+        "messages": [ai_message],
         "status": "ask_restart",
         "bot_message": "Would you like to learn about another health topic?",
         "response_type": "confirmation",
@@ -1,9 +1,16 @@
 import json
 import uuid
 from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
-from langchain_core.prompts import ChatPromptTemplate
 from ..types import HealthBotState, ConfirmationPrompt
-from ..clients import get_llm
+from ..clients import get_llm, get_llm_profile
+from ..metrics import put_metrics
+from ..prompts import get_prompt
+from ..passage_ranking import rank_passages
+from ..source_prep import prepare_sources
+from ..single_flight import flight_key, single_flight
+from ..hedging import invoke_hedged
+from ..deadline import call_with_deadline
+from ..node_memo import memo_entry, memo_key, memo_lookup
 
 
 def node_summarize(state: HealthBotState) -> HealthBotState:
@@ -36,6 +43,22 @@ def node_summarize(state: HealthBotState) -> HealthBotState:
     
     print(f"📋 Found {len(search_results)} search results")
     
+    # Strip boilerplate and near-duplicate passages, rank the rest against the topic
+    # and fit the most relevant ones into the prompt budget
+    if search_results:
+        search_results, prep_stats = prepare_sources(
+            search_results,
+            score_passages=lambda passages: rank_passages(passages, topic)
+        )
+        print(f"📋 Prepared {prep_stats['sources_out']} sources, ~{prep_stats['prompt_tokens']} tokens "
+              f"(saved ~{prep_stats['tokens_saved']}, {prep_stats['duplicates_removed']} duplicate passages)")
+        put_metrics({
+            "SourcePromptTokens": (prep_stats["prompt_tokens"], "Count"),
+            "SourceTokensSaved": (prep_stats["tokens_saved"], "Count"),
+            "SourceDuplicatePassages": (prep_stats["duplicates_removed"], "Count"),
+            "SourceBoilerplateLines": (prep_stats["boilerplate_lines_removed"], "Count"),
+        })
+    
     # If no results, provide fallback
     if not search_results:
         search_results = [{
@@ -45,32 +68,38 @@ def node_summarize(state: HealthBotState) -> HealthBotState:
         }]
     
     # Create summary using LLM
-    llm = get_llm()
+    llm = get_llm("summarize")
     sources_block = "\n\n".join(
-        [f"Source {i+1}: {r.get('title','').strip()} — {r.get('url','').strip()}\n{(r.get('content','') or '')[:1500]}" 
+        [f"Source {i+1}: {r.get('title','').strip()} — {r.get('url','').strip()}\n{r.get('content','') or ''}" 
          for i, r in enumerate(search_results)]
     )
     
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", "You are a careful medical educator. Write at a 7th–9th grade reading level. Include citations as [1], [2], etc. referencing the sources list order."),
-        ("human", (
-            "Summarize the most relevant, evidence-based information for a patient about the topic: '{topic}'.\n"
-            "- Be accurate and neutral; avoid giving medical advice.\n"
-            "- Use short paragraphs and clear language.\n"
-            "- Add a 'Key Points' section at the end.\n"
-            "- Include in-text citation markers like [1], [2] that map to the sources list order.\n"
-            "- Keep the summary comprehensive but readable (aim for 300-500 words).\n\n"
-            "Sources (ordered):\n{sources}\n"
-        ))
-    ])
-    
-    try:
-        response = llm.invoke(prompt.format_messages(topic=topic, sources=sources_block))
-        summary = response.content
-        print("📋 Summary generated successfully")
-    except Exception as e:
-        print(f"Error calling LLM: {e}")
-        summary = f"Unable to generate summary due to technical issues. Please try again later. Error: {str(e)}"
+    prompt_messages = get_prompt("summarize").template.format_messages(topic=topic, sources=sources_block)
+    prompt_contents = [m.content for m in prompt_messages]
+    key = memo_key(getattr(llm, "model_name", ""), *prompt_contents)
+    memo_update = {}
+    if memo_lookup(state, "summarize", key) and state.get("summary"):
+        # A resumed or retried turn with the same sources already has its summary
+        print("📋 Reusing the summary already generated from these sources")
+        summary = state["summary"]
+    else:
+        try:
+            # Identical topic + sources produce the same prompt; summarize it once
+            summary = single_flight(
+                "summary",
+                flight_key("summary", getattr(llm, "model_name", ""), prompt_contents),
+                lambda: call_with_deadline(
+                    "summarize",
+                    lambda timeout: invoke_hedged(llm, prompt_messages, "summarize", timeout).content,
+                    get_llm_profile("summarize")["timeout"],
+                    dependency="openai"
+                )
+            )
+            print("📋 Summary generated successfully")
+            memo_update = {"node_memo": memo_entry("summarize", key)}
+        except Exception as e:
+            print(f"Error calling LLM: {e}")
+            summary = f"Unable to generate summary due to technical issues. Please try again later. Error: {str(e)}"
     
     # Build citations
     citations = [r.get("url", "") for r in search_results if r.get("url")]
@@ -81,23 +110,22 @@ def node_summarize(state: HealthBotState) -> HealthBotState:
         name="healthbot",
         id=str(uuid.uuid4())
     )
-    messages.append(ai_message)
     
     print("📋 Setting status to 'presenting_summary'")
     return {
-        **state,
+        "messages": [ai_message],
         "search_results": search_results,
         "summary": summary,
         "citations": citations,
         "status": "presenting_summary",
         "bot_message": summary,
-        "response_type": "text"
+        "response_type": "text",
+        **memo_update
     }
 
 
 def node_present_summary(state: HealthBotState) -> HealthBotState:
     print("📄 Node: present_summary")
-    messages = state["messages"]
     summary = state.get("summary", "")
     user_message = (state.get("user_message") or "").strip()
     
@@ -110,12 +138,11 @@ def node_present_summary(state: HealthBotState) -> HealthBotState:
             name="patient",
             id=str(uuid.uuid4())
         )
-        messages.append(human_message)
         
         # Node just processes the input and sets status - router will handle routing
         print("📄 User responded, maintaining presenting_summary status")
         return {
-            **state,
+            "messages": [human_message],
             "status": "presenting_summary"
         }
     
@@ -123,7 +150,6 @@ def node_present_summary(state: HealthBotState) -> HealthBotState:
     if state.get("confirmation_prompt"):
         print("📄 Summary already presented, waiting for user interaction")
         return {
-            **state,
             "status": "presenting_summary"
         }
     
@@ -145,11 +171,10 @@ def node_present_summary(state: HealthBotState) -> HealthBotState:
         name="healthbot",
         id=str(uuid.uuid4())
     )
-    messages.append(ai_message)
     
     print("📄 Setting status to 'presenting_summary' and ending execution")
     return {
-        **state, 
+        "messages": [ai_message],
         "status": "presenting_summary",
         "bot_message": full_message,
         "response_type": "confirmation",
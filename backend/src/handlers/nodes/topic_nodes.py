@@ -1,18 +1,20 @@
+import json
 import uuid
-from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
+from langchain_core.messages import HumanMessage, SystemMessage, AIMessage, ToolMessage
 from ..types import HealthBotState
+from ..node_memo import memo_entry, memo_key, memo_lookup
 
 
 def node_collect_topic(state: HealthBotState) -> HealthBotState:
     print("📝 Node: collect_topic")
     messages = state["messages"]
+    new_messages = []
     user_message = (state.get("user_message") or "").strip()
     
     # Validate that we have a user message
     if not user_message:
         print("❌ No user message provided, cannot proceed")
         return {
-            **state,
             "status": "collecting_topic",
             "bot_message": "I didn't catch that. What health topic would you like to learn about?",
             "response_type": "text"
@@ -34,7 +36,7 @@ def node_collect_topic(state: HealthBotState) -> HealthBotState:
             content=system_prompt,
             name="system"
         )
-        messages.append(sys_message)
+        new_messages.append(sys_message)
     
     # Create human message from user input
     human_message = HumanMessage(
@@ -42,53 +44,81 @@ def node_collect_topic(state: HealthBotState) -> HealthBotState:
         name="patient",
         id=str(uuid.uuid4())
     )
-    messages.append(human_message)
+    new_messages.append(human_message)
     
     print(f"📝 Setting status to 'searching' for topic: {user_message}")
-    return {
-        **state,
+    # Only return the new messages; the add_messages reducer appends them
+    update = {
+        "messages": new_messages,
         "topic": user_message,
         "status": "searching",
         "bot_message": f"Got it! I'll search for trusted, up-to-date medical information on: {user_message}. This may take a moment...",
         "response_type": "text",
         "user_message": ""  # Clear consumed input
     }
+    # A new topic invalidates earlier searches, summaries and questions; a
+    # resent topic keeps them so the retried turn can reuse them
+    if user_message != state.get("topic"):
+        update["node_memo"] = None
+    return update
+
+
+def _completed_search(messages, tool_call_id: str) -> bool:
+    """Whether the web_search call with this ID returned results."""
+    for message in reversed(messages):
+        if isinstance(message, ToolMessage) and message.tool_call_id == tool_call_id:
+            try:
+                result = json.loads(message.content)
+            except (TypeError, ValueError):
+                return False
+            return bool(result.get("results")) and not result.get("error")
+    return False
 
 
 def node_search(state: HealthBotState) -> HealthBotState:
     print("🔍 Node: search")
-    messages = state["messages"]
     topic = state.get("topic", "").strip()
     
     # Validate topic before proceeding
     if not topic:
         print("❌ No topic provided for search")
         return {
-            **state,
             "status": "collecting_topic",
             "bot_message": "I need a health topic to search for. What would you like to learn about?",
             "response_type": "text"
         }
     
+    # A resumed or retried turn reuses this topic's completed search
+    key = memo_key(" ".join(topic.lower().split()))
+    memo = memo_lookup(state, "search", key)
+    if memo and _completed_search(state["messages"], memo["tool_call_id"]):
+        print(f"🔍 Reusing the completed search for '{topic}'")
+        return {
+            "status": "searching",
+            "bot_message": f"Searching for information about {topic}...",
+            "response_type": "text"
+        }
+    
     # Create AI message that will call the search tool
+    tool_call_id = str(uuid.uuid4())
     search_prompt = f"Search for up-to-date medical information about: {topic}"
     ai_message = AIMessage(
         content=search_prompt,
         name="healthbot",
         id=str(uuid.uuid4()),
         tool_calls=[{
-            "id": str(uuid.uuid4()),
+            "id": tool_call_id,
             "type": "tool_call",
             "name": "web_search",
             "args": {"question": topic}
         }]
     )
-    messages.append(ai_message)
     
     print(f"🔍 Created tool call for topic: '{topic}'")
     return {
-        **state,
+        "messages": [ai_message],
         "status": "searching",  # This will trigger router to check for tool calls
         "bot_message": f"Searching for information about {topic}...",
-        "response_type": "text"
+        "response_type": "text",
+        "node_memo": memo_entry("search", key, tool_call_id=tool_call_id)
     }
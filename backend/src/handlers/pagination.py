@@ -0,0 +1,54 @@
+"""
+Opaque continuation cursors and HTTP caching headers for paginated reads.
+
+A cursor is the DynamoDB LastEvaluatedKey of the previous page, JSON-encoded
+and base64url'd so clients treat it as an opaque token.
+"""
+
+import base64
+import hashlib
+import json
+from typing import Any, Dict, Optional
+
+
+def encode_cursor(last_evaluated_key: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Turn a LastEvaluatedKey into an opaque cursor (None when there is no next page)."""
+    if not last_evaluated_key:
+        return None
+    raw = json.dumps(last_evaluated_key, separators=(",", ":"), sort_keys=True, default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Optional[Dict[str, str]]:
+    """Decode a cursor back into an ExclusiveStartKey; returns None if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(key, dict) or not key or not all(
+        isinstance(k, str) and isinstance(v, str) for k, v in key.items()
+    ):
+        return None
+    return key
+
+
+def page_cache_headers(body: Dict[str, Any], max_age: int = 0) -> Dict[str, str]:
+    """
+    Caching headers for a page of results.
+
+    No page is final: messages are deleted by users and expire with the
+    table's TTL, so the browser may reuse a page for at most `max_age`
+    seconds and then revalidates it with the ETag, which costs a 304
+    instead of a full body when nothing changed.
+    """
+    etag = '"' + hashlib.sha256(json.dumps(body, sort_keys=True, default=str).encode()).hexdigest()[:32] + '"'
+    cache_control = f"private, max-age={max_age}" if max_age > 0 else "private, no-cache"
+    return {"Cache-Control": cache_control, "ETag": etag, "Vary": "Authorization", "Access-Control-Expose-Headers": "ETag"}
+
+
+def is_not_modified(event: Dict[str, Any], etag: str) -> bool:
+    """True when the request's If-None-Match already names this ETag."""
+    headers = {k.lower(): v for k, v in (event.get("headers") or {}).items()}
+    candidates = [tag.strip().removeprefix("W/") for tag in (headers.get("if-none-match") or "").split(",")]
+    return etag in candidates or "*" in candidates
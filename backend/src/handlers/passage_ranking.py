@@ -0,0 +1,119 @@
+"""
+Lexical (BM25) ranking of search result passages against the patient's topic.
+
+Runs inside node_summarize on every topic turn, so it is plain Python with no
+index to build: a result set is a few dozen passages and scoring takes well
+under 10 ms.
+"""
+
+import math
+import re
+from typing import Dict, Iterable, List
+
+from .source_prep import Passage
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+SYNONYM_WEIGHT = 0.5
+# Small nudge so ties keep Tavily's ordering
+RANK_PRIOR_WEIGHT = 0.05
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it me my of on or "
+    "should tell the to what when which who why with about your you".split()
+)
+
+# Canonical names for the topics patients most often phrase colloquially
+CANONICAL_SYNONYMS: Dict[str, List[str]] = {
+    "high blood pressure": ["hypertension"],
+    "hypertension": ["high blood pressure"],
+    "heart attack": ["myocardial infarction", "coronary"],
+    "myocardial infarction": ["heart attack"],
+    "stroke": ["cerebrovascular", "brain attack"],
+    "diabetes": ["blood sugar", "glucose", "insulin"],
+    "high cholesterol": ["hyperlipidemia", "ldl"],
+    "cholesterol": ["lipids", "ldl", "hdl"],
+    "flu": ["influenza"],
+    "influenza": ["flu"],
+    "cold": ["upper respiratory infection", "rhinovirus"],
+    "covid": ["coronavirus", "sars cov 2"],
+    "heartburn": ["acid reflux", "gerd"],
+    "acid reflux": ["gerd", "heartburn"],
+    "gerd": ["acid reflux", "heartburn"],
+    "kidney stones": ["nephrolithiasis", "renal calculi"],
+    "arthritis": ["joint inflammation", "osteoarthritis", "rheumatoid"],
+    "depression": ["major depressive disorder", "mood"],
+    "anxiety": ["anxiety disorder", "panic"],
+    "adhd": ["attention deficit hyperactivity disorder"],
+    "copd": ["chronic obstructive pulmonary disease", "emphysema", "chronic bronchitis"],
+    "asthma": ["airway inflammation", "wheezing"],
+    "migraine": ["headache"],
+    "thyroid": ["hypothyroidism", "hyperthyroidism"],
+    "obesity": ["overweight", "bmi"],
+    "cancer": ["tumor", "malignancy", "oncology"],
+    "dementia": ["alzheimer", "cognitive decline"],
+    "uti": ["urinary tract infection"],
+    "pneumonia": ["lung infection"],
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def expand_query(topic: str) -> Dict[str, float]:
+    """Topic terms at full weight plus canonical synonym terms at SYNONYM_WEIGHT."""
+    weights: Dict[str, float] = {term: 1.0 for term in tokenize(topic)}
+    normalized = " ".join(_TOKEN_RE.findall(topic.lower()))
+    for phrase, synonyms in CANONICAL_SYNONYMS.items():
+        if re.search(rf"\b{re.escape(phrase)}\b", normalized):
+            for synonym in synonyms:
+                for term in tokenize(synonym):
+                    weights.setdefault(term, SYNONYM_WEIGHT)
+    return weights
+
+
+def bm25_scores(query: Dict[str, float], documents: Iterable[List[str]]) -> List[float]:
+    documents = list(documents)
+    if not documents:
+        return []
+    n = len(documents)
+    avg_len = sum(len(d) for d in documents) / n or 1.0
+
+    frequencies = []
+    doc_freq: Dict[str, int] = {}
+    for doc in documents:
+        tf: Dict[str, int] = {}
+        for term in doc:
+            if term in query:
+                tf[term] = tf.get(term, 0) + 1
+        frequencies.append(tf)
+        for term in tf:
+            doc_freq[term] = doc_freq.get(term, 0) + 1
+
+    idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in doc_freq.items()}
+
+    scores = []
+    for doc, tf in zip(documents, frequencies):
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * len(doc) / avg_len)
+        scores.append(sum(
+            query[term] * idf[term] * count * (BM25_K1 + 1) / (count + norm)
+            for term, count in tf.items()
+        ))
+    return scores
+
+
+def rank_passages(passages: List[Passage], topic: str) -> None:
+    """
+    Set passage["score"] in place to the BM25 relevance of each passage to the
+    topic (and its canonical synonyms), with a small prior for Tavily's order.
+
+    Suitable as the `score_passages` callback of `prepare_sources`; each passage
+    keeps its source_index, so citations still map to the right result.
+    """
+    query = expand_query(topic)
+    scores = bm25_scores(query, (tokenize(p["text"]) for p in passages))
+    for passage, score in zip(passages, scores):
+        passage["score"] = score + RANK_PRIOR_WEIGHT / (1 + passage["source_index"] + passage["position"])
@@ -1,20 +1,42 @@
 import json
-from typing import Dict, Any
+import os
+from typing import Dict, Any, Optional
 
 # Import our modular components
 from .request_validator import validate_request, validate_message_body, validate_environment
-from .session_manager import generate_session_id, upsert_chat_session, save_user_message, save_bot_message
+from .session_manager import (generate_session_id, upsert_chat_session, save_user_message, save_bot_message,
+                              set_session_topic, start_run, delete_user_message)
 from .workflow_engine import execute_workflow, setup_environment
+from .memory_profiler import profile_invocation
+from .rate_limiter import check_rate_limit
+from .idempotency import begin_request, finish_request, request_fingerprint
+from .jobs import is_async_enabled, job_view, submit_job
+from .progress import progress_context
+from .deadline import Deadline
+from .run_generation import RunGuard, RunSuperseded, is_supersede_enabled
+from .checkpoint_cache import CheckpointConflict
+from .session_turns import SessionBusy, session_turn
+from .warmup import handle_warmup, initialize, is_warmup_event
 from .response_builder import (
     extract_response_data, 
     build_response_data, 
     create_api_response, 
     create_error_response, 
-    create_health_response
+    create_health_response,
+    create_http_response
 )
 
+# Do the first request's setup during INIT (a no-op outside Lambda)
+initialize()
+
+@profile_invocation
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    # Keep-warm pings never reach the workflow
+    if is_warmup_event(event):
+        return handle_warmup(context)
     print("🚀 ===== HANDLER STARTED =====")
+    # Everything the turn does has to fit in this invocation, with room left to save the result
+    deadline = Deadline.from_lambda_context(context)
     print(f"📝 Event type: {type(event)}")
     print(f"📝 Event keys: {list(event.keys()) if isinstance(event, dict) else 'Not a dict'}")
     
@@ -36,6 +58,81 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             print("✅ Health check request")
             return _response(200, create_health_response())
         
+        # Validate message body
+        print("🔍 Validating message body...")
+        body_valid, message_data, body_error = validate_message_body(event)
+        print(f"🔍 Body validation: valid={body_valid}, error={body_error}")
+        
+        if not body_valid:
+            print(f"❌ Message body validation failed: {body_error}")
+            return _response(400, create_error_response(400, 'Bad Request', body_error))
+        
+        # A retried message replays (or waits on) the original instead of running twice
+        idempotency_key = message_data['idempotency_key']
+        claim_token = None
+        if idempotency_key and os.environ.get('IDEMPOTENCY_TABLE'):
+            try:
+                claim_token, early_response = begin_request(
+                    user_info['user_id'], idempotency_key, request_fingerprint(message_data), context
+                )
+            except Exception as idempotency_error:
+                print(f"⚠️ Idempotency store unavailable, processing without it: {idempotency_error}")
+                early_response = None
+            if early_response is not None:
+                return early_response
+        
+        response = _process_message(user_info, message_data, deadline)
+        if claim_token:
+            finish_request(user_info['user_id'], idempotency_key, claim_token, response)
+        return response
+        
+    except Exception as e:
+        print(f"❌ Error processing message: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return _response(500, create_error_response(500, 'Internal server error', str(e)))
+
+
+def _process_message(user_info: Dict[str, Any], message_data: Dict[str, Any],
+                     deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+    """Admit a validated message, then queue it as a job or run it inline."""
+    try:
+        # Shed over-limit users before loading secrets or touching the workflow
+        allowed, retry_after = check_rate_limit(user_info['user_id'], message_data['message_type'])
+        if not allowed:
+            print(f"🚦 Rate limit exceeded for user {user_info['user_id']}, retry after {retry_after}s")
+            return _response(429, create_error_response(429, 'Too Many Requests', 'Rate limit exceeded, please slow down'),
+                             {'Retry-After': str(retry_after), 'Access-Control-Expose-Headers': 'Retry-After'})
+        
+        # Async mode: hand the turn to the job worker and answer before API Gateway's timeout
+        if message_data['async_mode'] and is_async_enabled():
+            if not message_data['session_id']:
+                message_data = {**message_data, 'session_id': generate_session_id()}
+            try:
+                job = submit_job(user_info, message_data)
+                status_url = f"/api/jobs/{job['jobId']}"
+                return _response(202, {**job_view(job), 'statusUrl': status_url},
+                                 {'Location': status_url, 'Access-Control-Expose-Headers': 'Location'})
+            except Exception as queue_error:
+                print(f"⚠️ Could not queue job, running inline: {queue_error}")
+        
+        return run_message(user_info, message_data, deadline)
+        
+    except Exception as e:
+        print(f"❌ Error processing message: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return _response(500, create_error_response(500, 'Internal server error', str(e)))
+
+
+def run_message(user_info: Dict[str, Any], message_data: Dict[str, Any],
+                deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+    """
+    Run one admitted message through the workflow; shared by the API handler and the job worker.
+
+    `deadline` bounds the workflow's LLM and search calls (see deadline.py).
+    """
+    try:
         # Set up environment and load secrets FIRST
         print("🔐 Setting up environment and loading secrets...")
         setup_environment()
@@ -49,15 +146,6 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             print(f"❌ Environment validation failed: {env_error}")
             return _response(500, create_error_response(500, 'Configuration error', env_error))
         
-        # Validate message body
-        print("🔍 Validating message body...")
-        body_valid, message_data, body_error = validate_message_body(event)
-        print(f"🔍 Body validation: valid={body_valid}, error={body_error}")
-        
-        if not body_valid:
-            print(f"❌ Message body validation failed: {body_error}")
-            return _response(400, create_error_response(400, 'Bad Request', body_error))
-        
         message_content = message_data['message_content']
         session_id = message_data['session_id']
         message_type = message_data['message_type']
@@ -75,34 +163,25 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             session_id = generate_session_id()
             print(f"Generated new session ID: {session_id}")
         
-        # Manage session and save user message
-        print("💾 Managing session and saving user message...")
-        upsert_chat_session(session_id, user_id, user_email)
-        message_id = save_user_message(session_id, user_id, message_content)
-        print(f"✅ Session managed, message ID: {message_id}")
+        # Claim the next run generation first: a run of this session already
+        # in progress sees it and stops at its next step
+        generation = start_run(session_id, message_data.get('idempotency_key'))
+        print(f"🔢 Run generation: {generation}")
+        run_guard = RunGuard(session_id, generation) if is_supersede_enabled() else None
         
-        # Execute workflow (without setup_environment since we already did it)
-        print("🔄 Executing workflow...")
+        # One run per session at a time; nothing of this message is saved
+        # until it holds the session's turn
         try:
-            new_state = execute_workflow(session_id, message_content, message_type, skip_environment_setup=True)
-            print(f"✅ Workflow executed successfully")
-        except Exception as workflow_error:
-            print(f"❌ Workflow execution failed: {workflow_error}")
-            return _response(500, create_error_response(500, 'Workflow execution failed', str(workflow_error)))
-        
-        # Extract and build response
-        print("🔍 Extracting and building response...")
-        response_data = extract_response_data(new_state)
-        bot_metadata = save_bot_message(session_id, user_id, response_data['bot_response'])
-        final_response_data = build_response_data(response_data, bot_metadata)
-        
-        # Create API response
-        api_response = create_api_response(session_id, message_id, final_response_data)
-        
-        print(f"🔍 Response data keys: {list(api_response.keys())}")
-        print(f"🔍 About to return response...")
-        
-        return _response(200, api_response)
+            with session_turn(session_id, deadline, run_guard):
+                return _run_turn(user_id, user_email, session_id, message_content, message_type,
+                                 deadline, run_guard)
+        except SessionBusy as busy:
+            print(f"⏳ {busy}")
+            return _busy_response()
+        except RunSuperseded as superseded:
+            print(f"🛑 {superseded}")
+            return _response(409, create_error_response(
+                409, 'Conflict', 'Superseded by a newer message in this session before it was processed'))
         
     except Exception as e:
         print(f"❌ Error processing message: {str(e)}")
@@ -111,14 +190,70 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         return _response(500, create_error_response(500, 'Internal server error', str(e)))
 
 
-def _response(status: int, body: Dict[str, Any]) -> Dict[str, Any]:
-    return {
-        'statusCode': status,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-            'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
-        },
-        'body': json.dumps(body)
-    }
+def _run_turn(user_id: str, user_email: str, session_id: str, message_content: str, message_type: str,
+              deadline: Optional[Deadline], run_guard: Optional[RunGuard]) -> Dict[str, Any]:
+    """Save the message, run the workflow and save its reply; called holding the session's turn."""
+    # Manage session and save user message
+    print("💾 Managing session and saving user message...")
+    upsert_chat_session(session_id, user_id, user_email)
+    user_message = save_user_message(session_id, user_id, message_content)
+    message_id = user_message['message_id']
+    print(f"✅ Session managed, message ID: {message_id}")
+    
+    # Execute workflow (without setup_environment since we already did it)
+    print("🔄 Executing workflow...")
+    try:
+        # Nodes push progress events to the user's WebSocket connections as they run
+        with progress_context(user_id, session_id):
+            new_state = execute_workflow(session_id, message_content, message_type,
+                                         skip_environment_setup=True, deadline=deadline, run_guard=run_guard)
+        print(f"✅ Workflow executed successfully")
+        # The newer run owns the session's topic and transcript from here on
+        if run_guard:
+            run_guard.check("final_writes", force=True)
+    except RunSuperseded as superseded:
+        print(f"🛑 {superseded}")
+        return _response(409, create_error_response(409, 'Conflict', 'Superseded by a newer message in this session'))
+    except CheckpointConflict as conflict:
+        # Another run wrote the session's state first and none of this run's
+        # was kept; take the message back too so a resend is not shown twice
+        print(f"⚔️ {conflict}")
+        try:
+            delete_user_message(session_id, user_message['timestamp'])
+        except Exception as delete_error:
+            print(f"⚠️ Failed to remove the user message of the conflicting run: {delete_error}")
+        return _busy_response()
+    except Exception as workflow_error:
+        print(f"❌ Workflow execution failed: {workflow_error}")
+        return _response(500, create_error_response(500, 'Workflow execution failed', str(workflow_error)))
+    
+    # Keep the session list's topic current; only topic turns can change it
+    if message_type == 'topic' and new_state.get('topic'):
+        try:
+            set_session_topic(session_id, new_state['topic'])
+        except Exception as topic_error:
+            print(f"⚠️ Failed to record session topic: {topic_error}")
+    
+    # Extract and build response
+    print("🔍 Extracting and building response...")
+    response_data = extract_response_data(new_state)
+    bot_metadata = save_bot_message(session_id, user_id, response_data['bot_response'])
+    final_response_data = build_response_data(response_data, bot_metadata)
+    
+    # Create API response
+    api_response = create_api_response(session_id, message_id, final_response_data)
+    
+    print(f"🔍 Response data keys: {list(api_response.keys())}")
+    print(f"🔍 About to return response...")
+    
+    return _response(200, api_response)
+
+
+def _busy_response() -> Dict[str, Any]:
+    """409 for a message that was not run because another one held the session; safe to resend."""
+    return _response(409, create_error_response(409, 'Conflict', 'Another message in this session is still being processed'),
+                     {'Retry-After': '2', 'Access-Control-Expose-Headers': 'Retry-After'})
+
+
+def _response(status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    return create_http_response(status, body, headers)
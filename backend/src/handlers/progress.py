@@ -0,0 +1,187 @@
+"""
+Progress events pushed over the WebSocket API while a turn runs.
+
+run_message opens a progress_context for the turn; graph nodes (wrapped by
+progress_node) and the search tool then call emit_progress as they start
+and finish. Emitting only enqueues the event: a background thread looks up
+the user's connections and posts to them, so node execution never waits on
+the network. The queue is flushed for up to PROGRESS_FLUSH_SECONDS when
+the turn ends, before Lambda freezes the container.
+"""
+
+import functools
+import json
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from botocore.exceptions import ClientError
+
+from .metrics import put_metrics
+from .websocket_connections import delete_connection, get_user_connections
+from ..utils.aws_clients import get_aws_client
+
+# What the user sees while each node runs
+NODE_LABELS = {
+    'collect_topic': 'Reading your topic',
+    'search': 'Planning the search',
+    'tools': 'Searching trusted medical sources',
+    'summarize': 'Writing your summary',
+    'present_summary': 'Preparing the summary',
+    'generate_question': 'Writing a comprehension question',
+    'present_question': 'Preparing the question',
+    'evaluate': 'Checking your answer',
+    'handle_restart': 'Wrapping up'
+}
+
+# Node messages longer than this (the summary itself) arrive with the HTTP response instead
+MAX_EVENT_MESSAGE_CHARS = 500
+
+_management_api = None
+_sender = None
+_sender_lock = threading.Lock()
+_channel: ContextVar[Optional["ProgressChannel"]] = ContextVar('progress_channel', default=None)
+
+
+def _get_management_api():
+    global _management_api
+    if _management_api is None:
+        _management_api = get_aws_client('apigatewaymanagementapi', endpoint_url=os.environ['WEBSOCKET_ENDPOINT'])
+    return _management_api
+
+
+def is_progress_enabled() -> bool:
+    return bool(os.environ.get('WEBSOCKET_ENDPOINT')) or _management_api is not None
+
+
+class ProgressChannel:
+    """One turn's events for one user and session."""
+
+    def __init__(self, user_id: str, session_id: str):
+        self.user_id = user_id
+        self.session_id = session_id
+        self.started = time.monotonic()
+        self._seq = 0
+        self._seq_lock = threading.Lock()
+        # Resolved once per turn, on the sender thread
+        self.connections: Optional[List[str]] = None
+        self.sent = 0
+
+    def event(self, node: str, phase: str, message: Optional[str]) -> Dict[str, Any]:
+        with self._seq_lock:
+            self._seq += 1
+            seq = self._seq
+        event = {
+            'type': 'progress',
+            'sessionId': self.session_id,
+            'seq': seq,
+            'node': node,
+            'phase': phase,
+            'label': NODE_LABELS.get(node, node),
+            'elapsedMs': int((time.monotonic() - self.started) * 1000)
+        }
+        if message and len(message) <= MAX_EVENT_MESSAGE_CHARS:
+            event['message'] = message
+        return event
+
+
+class _ProgressSender:
+    """Single background thread draining a bounded queue of events."""
+
+    def __init__(self, max_queued: int):
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queued)
+        self._thread = threading.Thread(target=self._run, name='progress-sender', daemon=True)
+        self._thread.start()
+
+    def submit(self, channel: ProgressChannel, event: Dict[str, Any]) -> None:
+        try:
+            self._queue.put_nowait((channel, event))
+        except queue.Full:
+            put_metrics({"ProgressEventsDropped": (1, "Count")})
+
+    def flush(self, timeout: float) -> bool:
+        """Wait until every queued event has been sent (or timeout); True when drained."""
+        deadline = time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def _run(self) -> None:
+        while True:
+            channel, event = self._queue.get()
+            try:
+                self._send(channel, event)
+            except Exception as e:
+                print(f"⚠️ Failed to push progress event: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _send(self, channel: ProgressChannel, event: Dict[str, Any]) -> None:
+        if channel.connections is None:
+            channel.connections = get_user_connections(channel.user_id)
+        data = json.dumps(event).encode()
+        for connection_id in list(channel.connections):
+            try:
+                _get_management_api().post_to_connection(ConnectionId=connection_id, Data=data)
+                channel.sent += 1
+            except ClientError as e:
+                if e.response.get('Error', {}).get('Code') != 'GoneException':
+                    raise
+                # The client went away without a clean $disconnect
+                channel.connections.remove(connection_id)
+                delete_connection(connection_id)
+
+
+def _get_sender() -> _ProgressSender:
+    global _sender
+    with _sender_lock:
+        if _sender is None:
+            _sender = _ProgressSender(int(os.environ.get('PROGRESS_QUEUE_SIZE', '256')))
+    return _sender
+
+
+@contextmanager
+def progress_context(user_id: str, session_id: str) -> Iterator[None]:
+    """Route emit_progress calls in this turn to the user's WebSocket connections."""
+    if not is_progress_enabled():
+        yield
+        return
+
+    channel = ProgressChannel(user_id, session_id)
+    token = _channel.set(channel)
+    try:
+        yield
+    finally:
+        _channel.reset(token)
+        if not _get_sender().flush(float(os.environ.get('PROGRESS_FLUSH_SECONDS', '1.0'))):
+            print("⚠️ Progress events still queued at end of turn")
+        put_metrics({"ProgressEventsSent": (channel.sent, "Count")})
+
+
+def emit_progress(node: str, phase: str, message: Optional[str] = None) -> None:
+    """Queue a progress event for the current turn; a no-op outside progress_context."""
+    channel = _channel.get()
+    if channel is None:
+        return
+    _get_sender().submit(channel, channel.event(node, phase, message))
+
+
+def progress_node(name: str, node: Callable) -> Callable:
+    """Wrap a graph node so it reports when it starts and finishes."""
+
+    @functools.wraps(node)
+    def reporting(state):
+        emit_progress(name, 'started')
+        result = node(state)
+        emit_progress(name, 'finished', (result or {}).get('bot_message'))
+        return result
+
+    return reporting
@@ -0,0 +1,92 @@
+"""
+Versioned prompt registry, compiled once at import.
+
+Every prompt is laid out for provider-side prefix caching: the long static
+instructions come first, then the content that repeats within a session,
+then what changes per request. The quiz prompts go further and share their
+first two messages (quiz instructions + the session's summary), so the
+evaluate call of an answer turn can reuse the prefix cached by the
+generate_question call of the turn before.
+
+Bump a prompt's version with any wording change; the version is a metric
+dimension, so latency and cached-token ratios can be compared across
+revisions.
+"""
+
+from typing import Dict, NamedTuple
+
+from langchain_core.prompts import ChatPromptTemplate
+
+
+class Prompt(NamedTuple):
+    name: str
+    version: str
+    template: ChatPromptTemplate
+
+
+SUMMARY_SYSTEM = (
+    "You are a careful medical educator. Write at a 7th–9th grade reading level. "
+    "Include citations as [1], [2], etc. referencing the sources list order.\n\n"
+    "Summarize the most relevant, evidence-based information for a patient about the topic given below.\n"
+    "- Be accurate and neutral; avoid giving medical advice.\n"
+    "- Use short paragraphs and clear language.\n"
+    "- Add a 'Key Points' section at the end.\n"
+    "- Include in-text citation markers like [1], [2] that map to the sources list order.\n"
+    "- Keep the summary comprehensive but readable (aim for 300-500 words)."
+)
+
+QUIZ_SYSTEM = (
+    "You are a medical educator checking a patient's understanding of an educational summary. "
+    "Be accurate, encouraging and educational, and base everything on the summary you are given."
+)
+
+QUIZ_SUMMARY = "Summary with citations:\n{summary}"
+
+QUESTION_TASK = (
+    "Based on the summary above, create ONE multiple-choice question with 4 choices (A-D) about '{topic}' "
+    "and mark the correct answer.\n"
+    "The question should test understanding of key concepts from the summary.\n"
+    "Return ONLY valid JSON with this exact structure, without markdown formatting or code blocks:\n"
+    "{{\n"
+    '  "question": "Your question text here",\n'
+    '  "choices": ["Choice A text", "Choice B text", "Choice C text", "Choice D text"],\n'
+    '  "correct_letter": "A"\n'
+    "}}\n"
+    "Make sure the question is clear and the choices are plausible but only one is correct.\n"
+    "Do not include any text before or after the JSON."
+)
+
+EVALUATE_TASK = (
+    "Provide a 2-3 sentence explanation that:\n"
+    "1. Confirms if they were correct or explains why they were wrong\n"
+    "2. References relevant information from the summary using citations [1], [2], etc.\n"
+    "3. Reinforces the key learning points\n"
+    "4. Is encouraging and educational\n"
+    "Return only the explanation text, no JSON formatting.\n\n"
+    "Student selected: {user_answer}\n"
+    "Correct answer: {correct_letter} ({correct_answer})\n"
+    "Grade: {grade}"
+)
+
+
+def _compile(name: str, version: str, *messages) -> Prompt:
+    return Prompt(name, version, ChatPromptTemplate.from_messages(list(messages)))
+
+
+PROMPTS: Dict[str, Prompt] = {prompt.name: prompt for prompt in (
+    _compile("summarize", "2",
+             ("system", SUMMARY_SYSTEM),
+             ("human", "Topic: {topic}\n\nSources (ordered):\n{sources}")),
+    _compile("generate_question", "2",
+             ("system", QUIZ_SYSTEM),
+             ("human", QUIZ_SUMMARY),
+             ("human", QUESTION_TASK)),
+    _compile("evaluate", "2",
+             ("system", QUIZ_SYSTEM),
+             ("human", QUIZ_SUMMARY),
+             ("human", EVALUATE_TASK)),
+)}
+
+
+def get_prompt(name: str) -> Prompt:
+    return PROMPTS[name]
@@ -0,0 +1,217 @@
+"""
+Per-user admission control with a token bucket shared through DynamoDB.
+
+Each user (Cognito `sub`) has one bucket of RATE_LIMIT_CAPACITY tokens that
+refills at RATE_LIMIT_REFILL_PER_SECOND. A turn spends tokens according to
+its message type, so topic turns (search + summary) cost far more than a
+restart.
+
+The shared bucket lives in RateLimitTable and is updated with optimistic
+conditional writes against its `version`, which every write increments
+(`updatedAt` only feeds the refill math: two writes in the same millisecond
+share it). Every container also keeps the last bucket state it saw:
+other containers can only have spent tokens since then, so when that local
+view already cannot cover a turn we reject without touching DynamoDB, and
+when it can we write against it directly instead of reading first.
+Contention is not a verdict on the user: a bucket still contended after
+MAX_ATTEMPTS conditional writes admits the turn, as an unreachable table
+does, rather than answering 429 while tokens remain.
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from decimal import Decimal
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+from .metrics import put_metrics
+from ..utils.aws_clients import get_aws_resource
+
+DEFAULT_COSTS = {
+    'topic': 5,
+    'confirmation': 2,
+    'answer': 2,
+    'restart': 1
+}
+
+# Conditional write attempts before admitting a turn on a heavily contended bucket
+MAX_ATTEMPTS = 3
+
+_dynamodb = None
+_rate_limit_table = None
+_limiter = None
+
+
+class BucketState(NamedTuple):
+    tokens: float
+    updated_ms: int
+    # 0 for a bucket written before versions were kept
+    version: int = 0
+
+
+def _get_rate_limit_table():
+    """Get the rate limit table, creating the DynamoDB resource lazily."""
+    global _dynamodb, _rate_limit_table
+    if _rate_limit_table is None:
+        if _dynamodb is None:
+            _dynamodb = get_aws_resource('dynamodb')
+        _rate_limit_table = _dynamodb.Table(os.environ['RATE_LIMIT_TABLE'])
+    return _rate_limit_table
+
+
+def is_rate_limiting_enabled() -> bool:
+    return os.environ.get('RATE_LIMIT_DISABLED', '').lower() not in {'1', 'true', 'yes'}
+
+
+def get_message_costs() -> Dict[str, int]:
+    """Token cost per message type; RATE_LIMIT_COSTS (JSON) overrides the defaults."""
+    costs = dict(DEFAULT_COSTS)
+    override = os.environ.get('RATE_LIMIT_COSTS')
+    if override:
+        costs.update({k: int(v) for k, v in json.loads(override).items()})
+    return costs
+
+
+class TokenBucketLimiter:
+    """Token buckets stored in DynamoDB with an in-container view of each one."""
+
+    def __init__(self, capacity: float, refill_per_second: float, table_getter=_get_rate_limit_table, clock=time.time):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.table_getter = table_getter
+        self.clock = clock
+        self._local: Dict[str, BucketState] = {}
+        self._lock = threading.Lock()
+
+    def _refilled(self, state: BucketState, now_ms: int) -> float:
+        elapsed = max(now_ms - state.updated_ms, 0) / 1000
+        return min(self.capacity, state.tokens + elapsed * self.refill_per_second)
+
+    def _retry_after(self, available: float, cost: float) -> int:
+        if self.refill_per_second <= 0:
+            return 60
+        return max(1, math.ceil((cost - available) / self.refill_per_second))
+
+    def _remember(self, key: str, state: BucketState) -> None:
+        with self._lock:
+            self._local[key] = state
+
+    def _read(self, key: str) -> Optional[BucketState]:
+        item = self.table_getter().get_item(
+            Key={'bucketKey': key},
+            ProjectionExpression='tokens, updatedAt, #version',
+            ExpressionAttributeNames={'#version': 'version'},
+            ConsistentRead=True
+        ).get('Item')
+        if not item:
+            return None
+        return BucketState(float(item['tokens']), int(item['updatedAt']), int(item.get('version', 0)))
+
+    def _write(self, key: str, observed: Optional[BucketState], tokens: float, now_ms: int) -> int:
+        """Store the new token count only if nobody has touched the bucket since `observed`; returns its new version."""
+        values: Dict[str, Any] = {
+            ':tokens': Decimal(str(round(tokens, 4))),
+            ':now': now_ms,
+            ':one': 1,
+            # Once the bucket would be full again the item carries no information
+            ':ttl': int(now_ms / 1000 + self.capacity / max(self.refill_per_second, 1e-6)) + 60
+        }
+        if observed is None:
+            condition = 'attribute_not_exists(bucketKey)'
+        elif observed.version == 0:
+            condition = 'attribute_exists(bucketKey) AND attribute_not_exists(#version)'
+        else:
+            condition = '#version = :observed'
+            values[':observed'] = observed.version
+
+        self.table_getter().update_item(
+            Key={'bucketKey': key},
+            UpdateExpression='SET tokens = :tokens, updatedAt = :now, #ttl = :ttl ADD #version :one',
+            ConditionExpression=condition,
+            ExpressionAttributeNames={'#ttl': 'ttl', '#version': 'version'},
+            ExpressionAttributeValues=values
+        )
+        return (observed.version if observed else 0) + 1
+
+    def acquire(self, key: str, cost: float) -> Tuple[bool, int]:
+        """
+        Try to spend `cost` tokens from the bucket for `key`.
+
+        Returns:
+            Tuple of (allowed, retry_after_seconds)
+        """
+        now_ms = int(self.clock() * 1000)
+        with self._lock:
+            observed = self._local.get(key)
+
+        # Fast path: our last view is an upper bound on what is left
+        if observed is not None:
+            available = self._refilled(observed, now_ms)
+            if available < cost:
+                put_metrics({"RateLimitLocalReject": (1, "Count")})
+                return False, self._retry_after(available, cost)
+
+        for attempt in range(MAX_ATTEMPTS):
+            available = self._refilled(observed, now_ms) if observed else self.capacity
+            if available < cost:
+                return False, self._retry_after(available, cost)
+            try:
+                version = self._write(key, observed, available - cost, now_ms)
+                self._remember(key, BucketState(available - cost, now_ms, version))
+                return True, 0
+            except ClientError as e:
+                if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+                    raise
+                put_metrics({"RateLimitConflict": (1, "Count")})
+                observed = self._read(key)
+                if observed is not None:
+                    self._remember(key, observed)
+                now_ms = max(now_ms, observed.updated_ms if observed else now_ms)
+
+        # Still contended, but every read showed enough tokens: fail open like an
+        # unreachable table instead of shedding a turn the bucket could cover
+        print(f"⚠️ Rate limit bucket still contended after {MAX_ATTEMPTS} attempts, admitting request")
+        put_metrics({"RateLimitContention": (1, "Count")})
+        return True, 0
+
+
+def _get_limiter() -> TokenBucketLimiter:
+    global _limiter
+    if _limiter is None:
+        _limiter = TokenBucketLimiter(
+            capacity=float(os.environ.get('RATE_LIMIT_CAPACITY', '20')),
+            refill_per_second=float(os.environ.get('RATE_LIMIT_REFILL_PER_SECOND', '0.2'))
+        )
+    return _limiter
+
+
+def check_rate_limit(user_id: str, message_type: str) -> Tuple[bool, int]:
+    """
+    Admit or shed a turn for this user.
+
+    Fails open when the shared bucket cannot be reached, so a DynamoDB hiccup
+    degrades to no limiting instead of rejecting every patient.
+
+    Returns:
+        Tuple of (allowed, retry_after_seconds)
+    """
+    if not is_rate_limiting_enabled():
+        return True, 0
+
+    cost = get_message_costs().get(message_type, 1)
+    try:
+        allowed, retry_after = _get_limiter().acquire(user_id, cost)
+    except Exception as e:
+        print(f"⚠️ Rate limiter unavailable, admitting request: {e}")
+        put_metrics({"RateLimitError": (1, "Count")})
+        return True, 0
+
+    put_metrics(
+        {"RateLimitAllowed" if allowed else "RateLimitRejected": (1, "Count")},
+        {"MessageType": message_type}
+    )
+    return allowed, retry_after
@@ -1,7 +1,14 @@
 import json
 import os
+import re
 from typing import Dict, Any, Tuple, Optional
 
+from .pagination import decode_cursor
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+IDEMPOTENCY_KEY_PATTERN = re.compile(r'[A-Za-z0-9_\-:.]{8,128}')
+
 def validate_request(event: Dict[str, Any]) -> Tuple[bool, Optional[Dict[str, Any]], Optional[str]]:
     """
     Validate the incoming request and extract user information.
@@ -51,15 +58,103 @@ def validate_message_body(event: Dict[str, Any]) -> Tuple[bool, Optional[Dict[st
         if message_type not in valid_message_types:
             return False, None, f'Invalid messageType. Must be one of: {valid_message_types}'
         
+        # Optional client-chosen key that makes retries of this message safe
+        idempotency_key = body.get('idempotencyKey')
+        if idempotency_key is not None and (
+            not isinstance(idempotency_key, str) or not IDEMPOTENCY_KEY_PATTERN.fullmatch(idempotency_key)
+        ):
+            return False, None, 'idempotencyKey must be 8-128 characters of letters, digits, "-", "_", ":" or "."'
+        
+        # Opt-in: answer 202 with a job id and run the turn on the job worker
+        async_mode = body.get('async', False)
+        if not isinstance(async_mode, bool):
+            return False, None, 'async must be a boolean'
+        
         return True, {
             'message_content': message_content,
             'session_id': session_id,
-            'message_type': message_type
+            'message_type': message_type,
+            'idempotency_key': idempotency_key,
+            'async_mode': async_mode
         }, None
         
     except json.JSONDecodeError:
         return False, None, 'Invalid JSON in request body'
 
+def validate_page_params(event: Dict[str, Any]) -> Tuple[bool, Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Validate the pagination query string shared by the read endpoints.
+    
+    Returns:
+        Tuple of (is_valid, page_params, error_message)
+    """
+    params = event.get('queryStringParameters') or {}
+    
+    try:
+        limit = int(params.get('limit', DEFAULT_PAGE_SIZE))
+    except (TypeError, ValueError):
+        return False, None, 'limit must be an integer'
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        return False, None, f'limit must be between 1 and {MAX_PAGE_SIZE}'
+    
+    start_key = None
+    if params.get('cursor'):
+        start_key = decode_cursor(params['cursor'])
+        if start_key is None:
+            return False, None, 'Invalid cursor'
+    
+    return True, {'limit': limit, 'start_key': start_key}, None
+
+def validate_transcript_query(event: Dict[str, Any]) -> Tuple[bool, Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Validate a GET /api/sessions/{sessionId}/messages request.
+    
+    Returns:
+        Tuple of (is_valid, query_data, error_message)
+    """
+    session_id = (event.get('pathParameters') or {}).get('sessionId', '')
+    if not session_id:
+        return False, None, 'sessionId is required'
+    
+    page_valid, page, page_error = validate_page_params(event)
+    if not page_valid:
+        return False, None, page_error
+    
+    # A cursor from another session would silently read the wrong transcript
+    if page['start_key'] and page['start_key'].get('sessionId') != session_id:
+        return False, None, 'Cursor does not belong to this session'
+    
+    params = event.get('queryStringParameters') or {}
+    order = params.get('order', 'asc')
+    if order not in ('asc', 'desc'):
+        return False, None, "order must be 'asc' or 'desc'"
+    
+    return True, {
+        'session_id': session_id,
+        'limit': page['limit'],
+        'start_key': page['start_key'],
+        'ascending': order == 'asc',
+        'since': params.get('since'),
+        'until': params.get('until')
+    }, None
+
+def validate_session_list_query(event: Dict[str, Any], user_id: str) -> Tuple[bool, Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Validate a GET /api/sessions request.
+    
+    Returns:
+        Tuple of (is_valid, query_data, error_message)
+    """
+    page_valid, page, page_error = validate_page_params(event)
+    if not page_valid:
+        return False, None, page_error
+    
+    # Cursors carry the index key, including whose sessions they page through
+    if page['start_key'] and page['start_key'].get('userId') != user_id:
+        return False, None, 'Cursor does not belong to this user'
+    
+    return True, page, None
+
 def validate_environment() -> Tuple[bool, Optional[str]]:
     """
     Validate that required environment variables are set.
@@ -74,3 +169,15 @@ def validate_environment() -> Tuple[bool, Optional[str]]:
         return False, f'Missing environment variables: {missing_vars}'
     
     return True, None
+
+def validate_job_path(event: Dict[str, Any]) -> Tuple[bool, Optional[str], Optional[str]]:
+    """
+    Validate a GET /api/jobs/{jobId} request.
+    
+    Returns:
+        Tuple of (is_valid, job_id, error_message)
+    """
+    job_id = (event.get('pathParameters') or {}).get('jobId')
+    if not job_id or len(job_id) > 64:
+        return False, None, 'jobId is required'
+    return True, job_id, None
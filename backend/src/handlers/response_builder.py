@@ -1,5 +1,5 @@
 import json
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 from .response_types import (
     create_text_response,
@@ -70,3 +70,17 @@ def create_health_response() -> Dict[str, Any]:
         'status': 'healthy',
         'message': 'HealthBot API is running'
     }
+
+def create_http_response(status: int, body: Dict[str, Any], extra_headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Wrap a body in an API Gateway proxy response with CORS headers."""
+    return {
+        'statusCode': status,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
+            'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS',
+            **(extra_headers or {})
+        },
+        'body': json.dumps(body, default=str)
+    }
@@ -1,6 +1,16 @@
 from langgraph.graph import END
 from .types import HealthBotState
 
+# Node that continues a turn left in each resumable status
+RESUME_NODES = {
+    "presenting_summary": "present_summary",
+    "present_question": "present_question",
+    "ask_restart": "handle_restart",
+    "generate_question": "generate_question",
+    "searching": "search",
+    "summarizing": "summarize",
+}
+
 
 def router(state: HealthBotState) -> str:
     """Main router for user interaction points - routes based on message_type"""
@@ -95,9 +105,9 @@ def entry_router(state: HealthBotState) -> str:
             return "handle_restart"
     
     # If no user message, continue from current status
-    if status in ["presenting_summary", "present_question", "ask_restart", "generate_question", "searching", "summarizing"]:
+    if status in RESUME_NODES:
         print(f"🔄 Continuing from {status}")
-        return status
+        return RESUME_NODES[status]
     
     # Default: start new workflow
     print("🆕 Starting new workflow from collect_topic")
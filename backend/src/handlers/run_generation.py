@@ -0,0 +1,98 @@
+"""
+Cooperative cancellation of superseded runs.
+
+Every message claims the next value of the session's `runGeneration`
+counter on its ChatSessions item (start_run; a retry of the same message
+keeps its claim) and runs with a RunGuard holding that generation. The
+claim is made before waiting for the session's turn, so the run holding
+the turn stops early and the newer message gets it sooner. execute_workflow puts the guard in the graph config
+(`configurable.run_guard`); every node checks it before it starts, i.e.
+between supersteps and ahead of the LLM calls, and web_search checks it
+before calling Tavily. Once a newer message has arrived the old run raises
+RunSuperseded, and run_message answers it without writing the topic, the
+bot message or any further checkpoints.
+"""
+
+import functools
+import os
+import time
+from typing import Callable, Optional
+
+from langgraph.config import get_config
+
+from .metrics import put_metrics
+from .session_manager import get_run_generation
+
+
+class RunSuperseded(Exception):
+    """A newer message for the same session has started; this run should stop."""
+
+    def __init__(self, session_id: str, generation: int, current: int, where: str):
+        super().__init__(f"run {generation} of session {session_id} superseded by run {current} (at {where})")
+        self.session_id = session_id
+        self.generation = generation
+        self.current = current
+
+
+def is_supersede_enabled() -> bool:
+    return os.environ.get('RUN_SUPERSEDE_DISABLED', '').lower() not in {'1', 'true', 'yes'}
+
+
+class RunGuard:
+    """One run's generation, checked against the session's current one."""
+
+    def __init__(self, session_id: str, generation: int):
+        self.session_id = session_id
+        self.generation = generation
+        # Back-to-back cheap nodes share one read
+        self._interval = float(os.environ.get('RUN_GENERATION_CHECK_INTERVAL_MS', '100')) / 1000
+        self._checked_at: Optional[float] = None
+
+    def check(self, where: str, force: bool = False) -> None:
+        """Raise RunSuperseded if a newer run has started for the session; `force` skips the throttle."""
+        now = time.monotonic()
+        if not force and self._checked_at is not None and now - self._checked_at < self._interval:
+            return
+        try:
+            current = get_run_generation(self.session_id)
+        except Exception as e:
+            # Never fail a run because the check could not be made
+            print(f"⚠️ Run generation check failed at {where}: {e}")
+            return
+        self._checked_at = now
+        if current is not None and current > self.generation:
+            print(f"🛑 Run {self.generation} of session {self.session_id} superseded by run {current}, stopping at {where}")
+            put_metrics({"RunSuperseded": (1, "Count")}, {"Where": where})
+            raise RunSuperseded(self.session_id, self.generation, current, where)
+
+    def __repr__(self) -> str:
+        return f"RunGuard(generation={self.generation})"
+
+
+def current_run_guard() -> Optional[RunGuard]:
+    """The guard of the running workflow; None outside a graph run or when none was set."""
+    try:
+        config = get_config()
+    except RuntimeError:
+        return None
+    return config.get('configurable', {}).get('run_guard')
+
+
+def ensure_current_run(where: str) -> None:
+    """Stop the running workflow here if it has been superseded."""
+    guard = current_run_guard()
+    if guard is not None:
+        guard.check(where)
+
+
+def guard_node(name: str, node: Callable) -> Callable:
+    """Wrap a graph node so a superseded run stops before it; returns the node untouched when disabled."""
+    if not is_supersede_enabled():
+        return node
+
+    @functools.wraps(node)
+    def guarded(state):
+        ensure_current_run(name)
+        return node(state)
+
+    return guarded
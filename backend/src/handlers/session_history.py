@@ -0,0 +1,164 @@
+"""
+Read-only session and job endpoints.
+
+These run in their own Lambda functions and never import the LangGraph
+workflow, so reloading a conversation costs one DynamoDB Query instead of a
+checkpoint load and a cold start of the whole graph.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from .jobs import get_job, job_view
+from .metrics import put_metrics
+from .pagination import encode_cursor, is_not_modified, page_cache_headers
+from .request_validator import validate_job_path, validate_request, validate_session_list_query, validate_transcript_query
+from .response_builder import create_error_response, create_http_response
+from .session_manager import get_session_messages, get_user_sessions
+
+# Short-lived per-user cache of session list pages. Writes happen in the
+# message function, so entries simply expire rather than being invalidated.
+SESSION_LIST_CACHE_SECONDS = float(os.environ.get("SESSION_LIST_CACHE_SECONDS", "10"))
+SESSION_LIST_CACHE_SIZE = int(os.environ.get("SESSION_LIST_CACHE_SIZE", "256"))
+_session_list_cache: "OrderedDict[Tuple[str, int, str], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+_session_list_lock = threading.Lock()
+
+# How long a browser may reuse a transcript page before revalidating it
+TRANSCRIPT_CACHE_SECONDS = int(os.environ.get("TRANSCRIPT_CACHE_SECONDS", "10"))
+
+
+def _cached_session_list(key: Tuple[str, int, str]) -> Optional[Dict[str, Any]]:
+    with _session_list_lock:
+        entry = _session_list_cache.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del _session_list_cache[key]
+            return None
+        _session_list_cache.move_to_end(key)
+        return entry[1]
+
+
+def _cache_session_list(key: Tuple[str, int, str], body: Dict[str, Any]) -> None:
+    if SESSION_LIST_CACHE_SECONDS <= 0:
+        return
+    with _session_list_lock:
+        _session_list_cache[key] = (time.monotonic() + SESSION_LIST_CACHE_SECONDS, body)
+        _session_list_cache.move_to_end(key)
+        while len(_session_list_cache) > SESSION_LIST_CACHE_SIZE:
+            _session_list_cache.popitem(last=False)
+
+
+def transcript_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """GET /api/sessions/{sessionId}/messages: one page of a session transcript."""
+    try:
+        is_valid, user_info, error_msg = validate_request(event)
+        if not is_valid or user_info.get('is_health_check'):
+            return create_http_response(401, create_error_response(401, 'Unauthorized', error_msg or 'Authentication required'))
+
+        query_valid, query, query_error = validate_transcript_query(event)
+        if not query_valid:
+            return create_http_response(400, create_error_response(400, 'Bad Request', query_error))
+
+        messages, last_key = get_session_messages(
+            query['session_id'],
+            user_info['user_id'],
+            query['limit'],
+            ascending=query['ascending'],
+            start_key=query['start_key'],
+            since=query['since'],
+            until=query['until']
+        )
+        print(f"📜 Transcript page for {query['session_id']}: {len(messages)} messages, more={last_key is not None}")
+
+        next_cursor = encode_cursor(last_key)
+        body = {
+            'sessionId': query['session_id'],
+            'messages': messages,
+            'nextCursor': next_cursor
+        }
+
+        # Even a page with newer messages after it can change: messages are
+        # deleted (delete_user_message) and expire, so every page revalidates
+        headers = page_cache_headers(body, max_age=TRANSCRIPT_CACHE_SECONDS)
+        if is_not_modified(event, headers['ETag']):
+            response = create_http_response(304, {}, headers)
+            response['body'] = ''
+            return response
+        return create_http_response(200, body, headers)
+
+    except Exception as e:
+        print(f"❌ Error loading transcript: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return create_http_response(500, create_error_response(500, 'Internal server error', str(e)))
+
+
+def list_sessions_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """GET /api/sessions: the caller's sessions, most recently active first."""
+    try:
+        is_valid, user_info, error_msg = validate_request(event)
+        if not is_valid or user_info.get('is_health_check'):
+            return create_http_response(401, create_error_response(401, 'Unauthorized', error_msg or 'Authentication required'))
+        user_id = user_info['user_id']
+
+        query_valid, query, query_error = validate_session_list_query(event, user_id)
+        if not query_valid:
+            return create_http_response(400, create_error_response(400, 'Bad Request', query_error))
+
+        cursor = (event.get('queryStringParameters') or {}).get('cursor') or ''
+        cache_key = (user_id, query['limit'], cursor)
+        body = _cached_session_list(cache_key)
+        put_metrics({"SessionListCacheHit" if body is not None else "SessionListCacheMiss": (1, "Count")})
+
+        if body is None:
+            sessions, last_key = get_user_sessions(user_id, query['limit'], start_key=query['start_key'])
+            print(f"🗂️ Session list page for {user_id}: {len(sessions)} sessions, more={last_key is not None}")
+            body = {'sessions': sessions, 'nextCursor': encode_cursor(last_key)}
+            _cache_session_list(cache_key, body)
+
+        # Any session can move to the top at any time
+        headers = page_cache_headers(body, max_age=int(SESSION_LIST_CACHE_SECONDS))
+        if is_not_modified(event, headers['ETag']):
+            response = create_http_response(304, {}, headers)
+            response['body'] = ''
+            return response
+        return create_http_response(200, body, headers)
+
+    except Exception as e:
+        print(f"❌ Error listing sessions: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return create_http_response(500, create_error_response(500, 'Internal server error', str(e)))
+
+
+def job_status_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """GET /api/jobs/{jobId}: status of an async message, with its response once finished."""
+    try:
+        is_valid, user_info, error_msg = validate_request(event)
+        if not is_valid or user_info.get('is_health_check'):
+            return create_http_response(401, create_error_response(401, 'Unauthorized', error_msg or 'Authentication required'))
+
+        path_valid, job_id, path_error = validate_job_path(event)
+        if not path_valid:
+            return create_http_response(400, create_error_response(400, 'Bad Request', path_error))
+
+        job = get_job(job_id, user_info['user_id'])
+        if job is None:
+            return create_http_response(404, create_error_response(404, 'Not Found', 'Job not found'))
+
+        body = job_view(job)
+        headers = {'Cache-Control': 'private, no-store'}
+        if body['status'] in ('queued', 'running'):
+            # Polling hint for clients; a topic turn usually takes several seconds
+            headers.update({'Retry-After': '1', 'Access-Control-Expose-Headers': 'Retry-After'})
+        return create_http_response(200, body, headers)
+
+    except Exception as e:
+        print(f"❌ Error loading job: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return create_http_response(500, create_error_response(500, 'Internal server error', str(e)))
@@ -1,8 +1,11 @@
-import boto3
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.exceptions import ClientError
 import os
+import time
 import uuid
 from datetime import datetime, timezone
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
+from ..utils.aws_clients import get_aws_resource
 
 # Initialize AWS clients lazily to avoid import-time region issues
 _dynamodb = None
@@ -13,8 +16,7 @@ def _get_dynamodb():
     """Get DynamoDB resource with proper region configuration."""
     global _dynamodb
     if _dynamodb is None:
-        region = os.environ.get('AWS_REGION', 'us-east-1')
-        _dynamodb = boto3.resource('dynamodb', region_name=region)
+        _dynamodb = get_aws_resource('dynamodb')
     return _dynamodb
 
 def _get_chat_sessions_table():
@@ -64,8 +66,37 @@ def upsert_chat_session(session_id: str, user_id: str, user_email: str) -> None:
         }
     )
 
-def save_user_message(session_id: str, user_id: str, message_content: str) -> str:
-    """Save user message to DynamoDB and return message ID."""
+def start_run(session_id: str, run_key: Optional[str] = None) -> int:
+    """
+    Claim the session's next run generation for a message; returns it.
+
+    A retry of the same message (same `run_key`, its idempotency key) gets
+    the generation it already claimed rather than superseding its own run,
+    or 0 if a newer message has claimed one since.
+    """
+    run_key = run_key or str(uuid.uuid4())
+    table = _get_chat_sessions_table()
+    try:
+        response = table.update_item(
+            Key={'sessionId': session_id},
+            UpdateExpression='SET runKey=:key ADD runGeneration :one',
+            ConditionExpression='attribute_not_exists(runKey) OR runKey <> :key',
+            ExpressionAttributeValues={':key': run_key, ':one': 1},
+            ReturnValues='UPDATED_NEW'
+        )
+        return int(response['Attributes']['runGeneration'])
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+            raise
+    item = table.get_item(
+        Key={'sessionId': session_id},
+        ProjectionExpression='runGeneration, runKey',
+        ConsistentRead=True
+    ).get('Item', {})
+    return int(item['runGeneration']) if item.get('runKey') == run_key else 0
+
+def save_user_message(session_id: str, user_id: str, message_content: str) -> Dict[str, str]:
+    """Save user message to DynamoDB and return its ID and timestamp."""
     message_id = str(uuid.uuid4())
     now_iso = get_current_timestamp()
     ttl_30d = get_ttl_timestamp()
@@ -80,7 +111,14 @@ def save_user_message(session_id: str, user_id: str, message_content: str) -> st
         'ttl': ttl_30d
     })
     
-    return message_id
+    return {
+        'message_id': message_id,
+        'timestamp': now_iso
+    }
+
+def delete_user_message(session_id: str, timestamp: str) -> None:
+    """Delete a saved user message whose turn was given up, so a resend is not shown twice."""
+    _get_user_messages_table().delete_item(Key={'sessionId': session_id, 'timestamp': timestamp})
 
 def save_bot_message(session_id: str, user_id: str, bot_response: str) -> Dict[str, str]:
     """Save bot message to DynamoDB and return message metadata."""
@@ -105,3 +143,172 @@ def save_bot_message(session_id: str, user_id: str, bot_response: str) -> Dict[s
         'message_id': bot_message_id,
         'timestamp': bot_timestamp
     }
+
+def set_session_topic(session_id: str, topic: str) -> None:
+    """Record the session's current topic for the session list."""
+    _get_chat_sessions_table().update_item(
+        Key={'sessionId': session_id},
+        UpdateExpression='SET topic=:topic',
+        ExpressionAttributeValues={':topic': topic}
+    )
+
+def get_run_generation(session_id: str) -> Optional[int]:
+    """Get the generation of the session's newest run."""
+    response = _get_chat_sessions_table().get_item(
+        Key={'sessionId': session_id},
+        ProjectionExpression='runGeneration',
+        ConsistentRead=True
+    )
+    generation = response.get('Item', {}).get('runGeneration')
+    return int(generation) if generation is not None else None
+
+def get_checkpoint_head(session_id: str) -> Optional[str]:
+    """Get the ID of the latest checkpoint written for a session."""
+    response = _get_chat_sessions_table().get_item(
+        Key={'sessionId': session_id},
+        ProjectionExpression='checkpointId',
+        ConsistentRead=True
+    )
+    return response.get('Item', {}).get('checkpointId')
+
+def set_checkpoint_head(session_id: str, checkpoint_id: str, expected_id: Optional[str] = None,
+                        dangling_id: Optional[str] = None) -> bool:
+    """
+    Move the session's checkpoint head to `checkpoint_id` if it is still at `expected_id`.
+
+    `expected_id` is the checkpoint the write builds on (None for a new
+    thread); sessions without a head accept any write. `dangling_id` also
+    allows replacing that head once it is CHECKPOINT_HEAD_GRACE_SECONDS old,
+    for a head whose checkpoint write never landed. Returns False when
+    another writer moved the head first.
+    """
+    now_ms = int(time.time() * 1000)
+    condition = 'attribute_not_exists(checkpointId)'
+    values = {':cid': checkpoint_id, ':at': now_ms}
+    if expected_id is not None:
+        condition += ' OR checkpointId = :expected'
+        values[':expected'] = expected_id
+    if dangling_id is not None:
+        condition += ' OR (checkpointId = :dangling AND checkpointAt < :stale)'
+        values[':dangling'] = dangling_id
+        values[':stale'] = now_ms - int(float(os.environ.get('CHECKPOINT_HEAD_GRACE_SECONDS', '60')) * 1000)
+    try:
+        _get_chat_sessions_table().update_item(
+            Key={'sessionId': session_id},
+            UpdateExpression='SET checkpointId=:cid, checkpointAt=:at',
+            ConditionExpression=condition,
+            ExpressionAttributeValues=values
+        )
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+            raise
+        return False
+    return True
+
+def acquire_session_turn(session_id: str, owner: str, lease_seconds: float) -> bool:
+    """Take the session's turn lease for `owner`; False while another run holds it."""
+    now_ms = int(time.time() * 1000)
+    try:
+        _get_chat_sessions_table().update_item(
+            Key={'sessionId': session_id},
+            UpdateExpression='SET turnOwner=:owner, turnExpiresAt=:expires',
+            ConditionExpression='attribute_not_exists(turnOwner) OR turnExpiresAt < :now',
+            ExpressionAttributeValues={
+                ':owner': owner,
+                ':expires': now_ms + int(lease_seconds * 1000),
+                ':now': now_ms
+            }
+        )
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+            raise
+        return False
+    return True
+
+def release_session_turn(session_id: str, owner: str) -> None:
+    """Release the session's turn lease if `owner` still holds it."""
+    try:
+        _get_chat_sessions_table().update_item(
+            Key={'sessionId': session_id},
+            UpdateExpression='REMOVE turnOwner, turnExpiresAt',
+            ConditionExpression='turnOwner = :owner',
+            ExpressionAttributeValues={':owner': owner}
+        )
+    except ClientError as e:
+        # The lease expired and another run took it over
+        if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+            raise
+
+def get_session_messages(
+    session_id: str,
+    user_id: str,
+    limit: int,
+    ascending: bool = True,
+    start_key: Optional[Dict[str, Any]] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    Read one page of a session transcript with a single Query.
+
+    The timestamp range is part of the key condition so DynamoDB only reads
+    matching items; the userId filter keeps other users' sessions invisible
+    without an extra ownership lookup.
+
+    Returns:
+        Tuple of (messages, last_evaluated_key)
+    """
+    key_condition = Key('sessionId').eq(session_id)
+    if since and until:
+        key_condition = key_condition & Key('timestamp').between(since, until)
+    elif since:
+        key_condition = key_condition & Key('timestamp').gte(since)
+    elif until:
+        key_condition = key_condition & Key('timestamp').lte(until)
+
+    query_args = {
+        'KeyConditionExpression': key_condition,
+        'FilterExpression': Attr('userId').eq(user_id),
+        'ProjectionExpression': 'messageId, #ts, content, #type',
+        'ExpressionAttributeNames': {'#ts': 'timestamp', '#type': 'type'},
+        'ScanIndexForward': ascending,
+        'Limit': limit
+    }
+    if start_key:
+        query_args['ExclusiveStartKey'] = start_key
+
+    response = _get_user_messages_table().query(**query_args)
+    return response.get('Items', []), response.get('LastEvaluatedKey')
+
+def get_user_sessions(
+    user_id: str,
+    limit: int,
+    start_key: Optional[Dict[str, Any]] = None
+) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    Read one page of a user's sessions, most recently active first.
+
+    Served entirely by the UserSessionsByLastActivity index; this must never
+    fall back to a Scan of the sessions table.
+
+    Returns:
+        Tuple of (sessions, last_evaluated_key)
+    """
+    query_args = {
+        'IndexName': 'UserSessionsByLastActivity',
+        'KeyConditionExpression': Key('userId').eq(user_id),
+        'ProjectionExpression': 'sessionId, lastActivity, messageCount, topic',
+        'ScanIndexForward': False,
+        'Limit': limit
+    }
+    if start_key:
+        query_args['ExclusiveStartKey'] = start_key
+
+    response = _get_chat_sessions_table().query(**query_args)
+    sessions = [{
+        'sessionId': item['sessionId'],
+        'lastActivity': item.get('lastActivity', ''),
+        'messageCount': int(item.get('messageCount', 0)),
+        'topic': item.get('topic', '')
+    } for item in response.get('Items', [])]
+    return sessions, response.get('LastEvaluatedKey')
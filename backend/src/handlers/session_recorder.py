@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import re
+import time
+import zlib
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# Lines carrying a recording start with this marker so they can be pulled out
+# of CloudWatch Logs (or any captured stdout) with a plain filter
+RECORDING_MARKER = "HEALTHBOT_RECORDING "
+RECORDING_VERSION = 1
+
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+_PHONE = re.compile(r"\+?\d[\d\s().-]{7,}\d")
+_LONG_NUMBER = re.compile(r"\d{5,}")
+
+
+def anonymize_text(text: str) -> str:
+    """Scrub e-mail addresses, phone numbers and long digit runs from user text."""
+    text = _EMAIL.sub("<email>", text or "")
+    text = _PHONE.sub("<phone>", text)
+    return _LONG_NUMBER.sub("<number>", text)
+
+
+def _scrub(value: Any) -> Any:
+    """Apply anonymize_text to every string inside a recorded payload."""
+    if isinstance(value, str):
+        return anonymize_text(value)
+    if isinstance(value, dict):
+        return {k: _scrub(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_scrub(v) for v in value]
+    return value
+
+
+def anonymize_session_id(session_id: str) -> str:
+    """Stable, non-reversible session key so turns of one session can be regrouped."""
+    salt = os.environ.get("SESSION_RECORDING_SALT", "")
+    return hashlib.sha256(f"{salt}{session_id}".encode()).hexdigest()[:16]
+
+
+def is_recording_enabled(session_id: str) -> bool:
+    """Recording is opt-in and sampled per session, so sessions are captured whole."""
+    if os.environ.get("SESSION_RECORDING", "").lower() not in {"1", "true", "yes"}:
+        return False
+    sample_rate = float(os.environ.get("SESSION_RECORDING_SAMPLE_RATE", "1.0"))
+    return (zlib.crc32(session_id.encode()) % 10_000) < sample_rate * 10_000
+
+
+class TurnRecorder(BaseCallbackHandler):
+    """
+    Callback handler that captures the external responses of one graph turn.
+
+    Attach it through the graph config's callbacks; LangChain propagates it to
+    every chat model call and to the web_search tool, so the LLM completions
+    and Tavily payloads are recorded in the order the graph consumed them.
+    """
+
+    def __init__(self, session_id: str, message_type: str, message: str):
+        self.session = anonymize_session_id(session_id)
+        self.message_type = message_type
+        self.message = anonymize_text(message)
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.calls: List[Dict[str, Any]] = []
+        self._started = time.perf_counter()
+        self._pending: Dict[UUID, float] = {}
+
+    def _begin(self, run_id: UUID) -> None:
+        self._pending[run_id] = time.perf_counter()
+
+    def _latency_ms(self, run_id: UUID) -> float:
+        started = self._pending.pop(run_id, None)
+        return round((time.perf_counter() - started) * 1000, 1) if started else 0.0
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs) -> None:
+        self._begin(run_id)
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs) -> None:
+        self._begin(run_id)
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs) -> None:
+        generation = response.generations[0][0] if response.generations and response.generations[0] else None
+        message = getattr(generation, "message", None)
+        self.calls.append({
+            "kind": "llm",
+            "latency_ms": self._latency_ms(run_id),
+            "content": _scrub(message.content if message is not None else getattr(generation, "text", "")),
+            "usage": getattr(message, "usage_metadata", None) or {},
+        })
+
+    def on_llm_error(self, error, *, run_id: UUID, **kwargs) -> None:
+        if isinstance(error, GeneratorExit):
+            # The losing side of a hedged request was closed; its twin is recorded
+            self._pending.pop(run_id, None)
+            return
+        self.calls.append({"kind": "llm", "latency_ms": self._latency_ms(run_id), "error": str(error)})
+
+    def on_tool_start(self, serialized, input_str, *, run_id: UUID, **kwargs) -> None:
+        self._begin(run_id)
+
+    def on_tool_end(self, output, *, run_id: UUID, **kwargs) -> None:
+        # ToolNode hands back a ToolMessage whose content is the JSON-encoded payload
+        content = getattr(output, "content", output)
+        if isinstance(content, str):
+            try:
+                content = json.loads(content)
+            except ValueError:
+                pass
+        # Search responses echo the user's query back in several places
+        self.calls.append({"kind": "search", "latency_ms": self._latency_ms(run_id), "response": _scrub(content)})
+
+    def on_tool_error(self, error, *, run_id: UUID, **kwargs) -> None:
+        self.calls.append({"kind": "search", "latency_ms": self._latency_ms(run_id), "error": str(error)})
+
+    def finish(self, final_state: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> Dict[str, Any]:
+        """Build the turn record and ship it to the configured sinks."""
+        record = {
+            "version": RECORDING_VERSION,
+            "session": self.session,
+            "started_at": self.started_at,
+            "message_type": self.message_type,
+            "message": self.message,
+            "duration_ms": round((time.perf_counter() - self._started) * 1000, 1),
+            "status": (final_state or {}).get("status"),
+            "error": error,
+            "calls": self.calls,
+        }
+        write_record(record)
+        return record
+
+
+def write_record(record: Dict[str, Any]) -> None:
+    """Print the record for CloudWatch and, when configured, append it to a local file."""
+    line = json.dumps(record, default=str)
+    print(f"{RECORDING_MARKER}{line}")
+    path = os.environ.get("SESSION_RECORDING_FILE")
+    if path:
+        with open(path, "a") as f:
+            f.write(line + "\n")
+
+
+def start_turn_recording(session_id: str, message_type: str, message: str) -> Optional[TurnRecorder]:
+    """Return a recorder for this turn, or None when the session is not being recorded."""
+    if not is_recording_enabled(session_id):
+        return None
+    return TurnRecorder(session_id, message_type, message)
+
+
+def load_records(path: str) -> List[Dict[str, Any]]:
+    """
+    Read turn records from a JSONL file.
+
+    Accepts both bare records and raw log lines carrying RECORDING_MARKER, so a
+    CloudWatch Logs export can be replayed without preprocessing.
+    """
+    records = []
+    with open(path) as f:
+        for line in f:
+            if RECORDING_MARKER in line:
+                line = line.split(RECORDING_MARKER, 1)[1]
+            line = line.strip()
+            if not line.startswith("{"):
+                continue
+            record = json.loads(line)
+            if record.get("version") == RECORDING_VERSION:
+                records.append(record)
+    return records
@@ -0,0 +1,101 @@
+"""
+One workflow run at a time per session.
+
+Two requests for the same session (a double click, a second tab) would
+otherwise load the same checkpoint and race to write its successor.
+run_message handles each message under a lease on the session's
+ChatSessions item, taken before the message is saved: a second request
+waits for the first to finish and then runs on the state it left, or gives
+up with SessionBusy (a 409 with Retry-After) when the wait runs out, having
+written nothing a resend would duplicate. The lease lasts as long as the run can, so a container
+that dies mid-turn blocks the session no longer than its own timeout.
+
+Version-conditioned checkpoint writes (checkpoint_cache.CheckpointConflict)
+cover whatever the lease cannot, e.g. a DynamoDB error while taking it.
+"""
+
+import contextlib
+import os
+import time
+import uuid
+from typing import Iterator, Optional
+
+from .deadline import Deadline
+from .metrics import put_metrics
+from .run_generation import RunGuard, RunSuperseded
+from .session_manager import acquire_session_turn, release_session_turn
+
+
+class SessionBusy(Exception):
+    """Another run of the session did not finish within this request's wait."""
+
+    def __init__(self, session_id: str, waited_seconds: float):
+        super().__init__(f"session {session_id} still busy after {waited_seconds:.1f}s")
+        self.session_id = session_id
+        self.waited_seconds = waited_seconds
+
+
+def is_sequencing_enabled() -> bool:
+    return os.environ.get('SESSION_SEQUENCING_DISABLED', '').lower() not in {'1', 'true', 'yes'}
+
+
+def _settings(deadline: Optional[Deadline]) -> dict:
+    wait = float(os.environ.get('SESSION_TURN_WAIT_SECONDS', '20'))
+    lease = float(os.environ.get('SESSION_TURN_LEASE_SECONDS', '180'))
+    if deadline is not None:
+        # Leave the turn itself at least half of what is left, and hold the
+        # lease only as long as this invocation can run
+        wait = min(wait, deadline.remaining() / 2)
+        lease = min(lease, deadline.remaining() + 5)
+    return {'wait': wait, 'lease': lease, 'poll': float(os.environ.get('SESSION_TURN_POLL_MS', '200')) / 1000}
+
+
+@contextlib.contextmanager
+def session_turn(session_id: str, deadline: Optional[Deadline] = None,
+                 run_guard: Optional[RunGuard] = None) -> Iterator[None]:
+    """
+    Hold the session's turn lease for the duration of the block.
+
+    Raises SessionBusy when the lease stays taken for the whole wait, and
+    RunSuperseded when a newer message arrives while waiting. If DynamoDB
+    is unavailable the block runs unsequenced.
+    """
+    if not is_sequencing_enabled():
+        yield
+        return
+
+    settings = _settings(deadline)
+    owner = str(uuid.uuid4())
+    started = time.monotonic()
+    held = False
+    try:
+        while not acquire_session_turn(session_id, owner, settings['lease']):
+            waited = time.monotonic() - started
+            if waited >= settings['wait']:
+                print(f"⏳ Session {session_id} still busy after {waited:.1f}s, giving up")
+                put_metrics({"SessionTurnBusy": (1, "Count")})
+                raise SessionBusy(session_id, waited)
+            if run_guard is not None:
+                run_guard.check("session_turn")
+            time.sleep(settings['poll'])
+        held = True
+    except (SessionBusy, RunSuperseded):
+        raise
+    except Exception as e:
+        print(f"⚠️ Could not take the turn lease for session {session_id}, running unsequenced: {e}")
+        put_metrics({"SessionTurnError": (1, "Count")})
+
+    if held:
+        waited_ms = (time.monotonic() - started) * 1000
+        if waited_ms >= settings['poll'] * 1000:
+            print(f"⏳ Waited {waited_ms:.0f} ms for the previous turn of session {session_id}")
+        put_metrics({"SessionTurnWait": (waited_ms, "Milliseconds")})
+    try:
+        yield
+    finally:
+        if held:
+            try:
+                release_session_turn(session_id, owner)
+            except Exception as e:
+                # The lease expires on its own
+                print(f"⚠️ Could not release the turn lease for session {session_id}: {e}")
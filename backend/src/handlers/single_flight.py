@@ -0,0 +1,227 @@
+"""
+Single-flight coalescing of identical expensive work (searches, summaries).
+
+When many patients ask about the same condition at once, only one caller
+does the work and the rest share its result:
+
+  - within a container, concurrent callers with the same key wait on the
+    leader's future;
+  - across containers, the leader holds a short lease item in
+    SingleFlightTable and stores the finished result on it for
+    SINGLE_FLIGHT_RESULT_SECONDS. Followers poll that item for up to
+    SINGLE_FLIGHT_WAIT_SECONDS and do the work themselves if nothing arrives.
+
+The cross-container half only runs when SINGLE_FLIGHT_TABLE is set, and any
+DynamoDB error falls back to doing the work locally.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from botocore.exceptions import ClientError
+
+from .deadline import current_deadline
+from .metrics import put_metrics
+from ..utils.aws_clients import get_aws_resource
+
+T = TypeVar("T")
+
+# DynamoDB items are capped at 400 KB; larger results are shared in-container only
+MAX_RESULT_BYTES = 350_000
+
+_dynamodb = None
+_single_flight_table = None
+
+_inflight: Dict[str, Future] = {}
+_inflight_lock = threading.Lock()
+
+
+def _get_single_flight_table():
+    """Get the single-flight table, creating the DynamoDB resource lazily."""
+    global _dynamodb, _single_flight_table
+    if _single_flight_table is None:
+        if _dynamodb is None:
+            _dynamodb = get_aws_resource('dynamodb')
+        _single_flight_table = _dynamodb.Table(os.environ['SINGLE_FLIGHT_TABLE'])
+    return _single_flight_table
+
+
+def is_single_flight_enabled() -> bool:
+    return os.environ.get('SINGLE_FLIGHT_DISABLED', '').lower() not in {'1', 'true', 'yes'}
+
+
+def _wait_seconds(settings: Dict[str, float]) -> float:
+    """How long a follower may wait: never past the request's own deadline."""
+    request_deadline = current_deadline()
+    if request_deadline is None:
+        return settings['wait']
+    return min(settings['wait'], request_deadline.remaining())
+
+
+def _settings() -> Dict[str, float]:
+    return {
+        'lease': float(os.environ.get('SINGLE_FLIGHT_LEASE_SECONDS', '30')),
+        'wait': float(os.environ.get('SINGLE_FLIGHT_WAIT_SECONDS', '20')),
+        'poll': float(os.environ.get('SINGLE_FLIGHT_POLL_MS', '250')) / 1000,
+        'result': float(os.environ.get('SINGLE_FLIGHT_RESULT_SECONDS', '60')),
+    }
+
+
+def flight_key(operation: str, *parts: Any) -> str:
+    """Stable key for one unit of work; parts must be JSON-serializable."""
+    digest = hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()[:40]
+    return f"{operation}#{digest}"
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def _try_acquire(table, key: str, owner: str, lease: float) -> Optional[Dict[str, Any]]:
+    """
+    Take the lease for `key`, or return the item that currently holds it.
+
+    Returns None when the lease was acquired.
+    """
+    now_ms = _now_ms()
+    try:
+        table.put_item(
+            Item={
+                'flightKey': key,
+                'leaseOwner': owner,
+                'expiresAt': now_ms + int(lease * 1000),
+                'ttl': int(now_ms / 1000 + lease) + 60
+            },
+            ConditionExpression='attribute_not_exists(flightKey) OR expiresAt < :now',
+            ExpressionAttributeValues={':now': now_ms}
+        )
+        return None
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+            raise
+    item = table.get_item(Key={'flightKey': key}, ConsistentRead=True).get('Item')
+    # The holder finished and cleaned up between our write and read; treat
+    # it like a held lease and look again on the next poll
+    return item or {}
+
+
+def _publish(table, key: str, owner: str, encoded: Optional[str], result_seconds: float) -> None:
+    """Store the leader's result on its lease item, or release the lease if there is nothing to share."""
+    try:
+        if encoded is None or result_seconds <= 0 or len(encoded) > MAX_RESULT_BYTES:
+            table.delete_item(
+                Key={'flightKey': key},
+                ConditionExpression='leaseOwner = :owner',
+                ExpressionAttributeValues={':owner': owner}
+            )
+            return
+        now_ms = _now_ms()
+        table.put_item(
+            Item={
+                'flightKey': key,
+                'leaseOwner': owner,
+                'expiresAt': now_ms + int(result_seconds * 1000),
+                'result': encoded,
+                'ttl': int(now_ms / 1000 + result_seconds) + 60
+            },
+            ConditionExpression='leaseOwner = :owner',
+            ExpressionAttributeValues={':owner': owner}
+        )
+    except ClientError as e:
+        # Our lease expired and another caller took over; its result wins
+        if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+            print(f"⚠️ Could not publish single-flight result for {key}: {e}")
+
+
+def _run_shared(key: str, operation: str, fn: Callable[[], T], encode, decode) -> T:
+    """Lead the work across containers through the lease table."""
+    settings = _settings()
+    table_name = os.environ.get('SINGLE_FLIGHT_TABLE')
+    if not table_name:
+        return fn()
+
+    owner = str(uuid.uuid4())
+    started = time.monotonic()
+    deadline = started + _wait_seconds(settings)
+    try:
+        table = _get_single_flight_table()
+        while True:
+            holder = _try_acquire(table, key, owner, settings['lease'])
+            if holder is None:
+                break
+            if 'result' in holder and int(holder.get('expiresAt', 0)) >= _now_ms():
+                put_metrics({
+                    "SingleFlightRemoteHit": (1, "Count"),
+                    "SingleFlightWaitTime": ((time.monotonic() - started) * 1000, "Milliseconds")
+                }, {"Operation": operation})
+                return decode(holder['result'])
+            if time.monotonic() >= deadline:
+                print(f"⏱️ Single-flight wait for {key} timed out, doing the work locally")
+                put_metrics({"SingleFlightTimeout": (1, "Count")}, {"Operation": operation})
+                return fn()
+            time.sleep(settings['poll'])
+    except Exception as e:
+        print(f"⚠️ Single-flight table unavailable, doing the work locally: {e}")
+        put_metrics({"SingleFlightError": (1, "Count")}, {"Operation": operation})
+        return fn()
+
+    put_metrics({"SingleFlightLeader": (1, "Count")}, {"Operation": operation})
+    try:
+        result = fn()
+    except Exception:
+        _publish(table, key, owner, None, 0)
+        raise
+    try:
+        encoded = encode(result)
+    except (TypeError, ValueError):
+        encoded = None
+    _publish(table, key, owner, encoded, settings['result'])
+    return result
+
+
+def single_flight(operation: str, key: str, fn: Callable[[], T],
+                  encode: Callable[[T], str] = json.dumps,
+                  decode: Callable[[str], T] = json.loads) -> T:
+    """
+    Run `fn` once for all concurrent callers with the same key.
+
+    `operation` names the kind of work (metric dimension); `encode`/`decode`
+    turn the result into the string stored for other containers. Exceptions
+    from the leader are raised to in-container followers and never shared
+    across containers.
+    """
+    if not is_single_flight_enabled():
+        return fn()
+
+    with _inflight_lock:
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = Future()
+            _inflight[key] = future
+
+    if not leader:
+        put_metrics({"SingleFlightLocalFollower": (1, "Count")}, {"Operation": operation})
+        try:
+            return future.result(timeout=_wait_seconds(_settings()))
+        except FutureTimeoutError:
+            print(f"⏱️ Single-flight wait for {key} timed out, doing the work locally")
+            put_metrics({"SingleFlightTimeout": (1, "Count")}, {"Operation": operation})
+            return fn()
+
+    try:
+        result = _run_shared(key, operation, fn, encode, decode)
+        future.set_result(result)
+        return result
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
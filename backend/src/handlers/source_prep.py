@@ -0,0 +1,238 @@
+"""
+Source preparation for the summary prompt.
+
+Tavily results from Mayo Clinic, Healthline, WebMD and friends repeat the same
+paragraphs and navigation boilerplate. Before the sources reach the LLM we:
+  1. split every result into passages,
+  2. drop lines that appear in many different results (boilerplate),
+  3. drop passages that are near-duplicates of an earlier one (MinHash over word shingles),
+  4. pack the most valuable passages into a token budget.
+"""
+
+import heapq
+import os
+import re
+import zlib
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple, TypedDict
+
+# The summary prompt used to take up to 1500 chars from each result
+LEGACY_CHARS_PER_SOURCE = 1500
+CHARS_PER_TOKEN = 4
+
+SHINGLE_SIZE = 5
+SIGNATURE_SIZE = 32
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+class Passage(TypedDict):
+    source_index: int
+    position: int
+    text: str
+    tokens: int
+    score: float
+
+
+class PrepStats(TypedDict):
+    sources_in: int
+    sources_out: int
+    passages_in: int
+    passages_out: int
+    boilerplate_lines_removed: int
+    duplicates_removed: int
+    legacy_tokens: int
+    prompt_tokens: int
+    tokens_saved: int
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate; close enough for budgeting English prose."""
+    return max(len(text) // CHARS_PER_TOKEN, 1) if text else 0
+
+
+def _normalize_line(line: str) -> str:
+    return " ".join(_WORD_RE.findall(line.lower()))
+
+
+def find_boilerplate_lines(
+    contents: List[str],
+    min_fraction: float = 0.5,
+    min_sources: int = 3,
+    max_words: int = 15,
+) -> set:
+    """
+    Short normalized lines that appear in at least `min_fraction` of the results.
+
+    Long repeated passages are real content and are left to near-duplicate removal.
+    """
+    if len(contents) < min_sources:
+        return set()
+    seen_in: Dict[str, int] = {}
+    for content in contents:
+        for line in {_normalize_line(l) for l in content.splitlines()}:
+            if line and line.count(" ") < max_words:
+                seen_in[line] = seen_in.get(line, 0) + 1
+    threshold = max(min_sources, int(len(contents) * min_fraction + 0.999))
+    return {line for line, count in seen_in.items() if count >= threshold}
+
+
+def split_passages(content: str, max_chars: int = 600) -> List[str]:
+    """Split content on blank lines/newlines, then pack sentences into ~max_chars chunks."""
+    passages = []
+    for block in re.split(r"\n\s*\n|\n", content):
+        block = block.strip()
+        if not block:
+            continue
+        if len(block) <= max_chars:
+            passages.append(block)
+            continue
+        current = ""
+        for sentence in _SENTENCE_END_RE.split(block):
+            if current and len(current) + len(sentence) + 1 > max_chars:
+                passages.append(current)
+                current = sentence
+            else:
+                current = f"{current} {sentence}".strip()
+        if current:
+            passages.append(current)
+    return passages
+
+
+def minhash_signature(text: str) -> Optional[FrozenSet[int]]:
+    """
+    Bottom-k MinHash signature: the SIGNATURE_SIZE smallest word-shingle hashes.
+
+    One hash per shingle keeps this well under a millisecond for a whole result set.
+    """
+    words = _WORD_RE.findall(text.lower())
+    if not words:
+        return None
+    size = min(SHINGLE_SIZE, len(words))
+    shingles = {zlib.crc32(" ".join(words[i:i + size]).encode()) for i in range(len(words) - size + 1)}
+    return frozenset(heapq.nsmallest(SIGNATURE_SIZE, shingles))
+
+
+def estimated_similarity(sig_a: FrozenSet[int], sig_b: FrozenSet[int]) -> float:
+    """Estimate the Jaccard similarity of the shingle sets behind two signatures."""
+    union = sig_a | sig_b
+    k = min(SIGNATURE_SIZE, len(union))
+    if not k:
+        return 0.0
+    shared = sig_a & sig_b
+    if not shared:
+        return 0.0
+    return sum(1 for h in heapq.nsmallest(k, union) if h in shared) / k
+
+
+def _default_passage_score(passage: Passage) -> float:
+    # Tavily returns results best-first and pages lead with their key facts
+    return 1.0 / (1 + passage["source_index"]) + 0.5 / (1 + passage["position"])
+
+
+def prepare_sources(
+    results: List[Dict[str, Any]],
+    token_budget: Optional[int] = None,
+    similarity_threshold: Optional[float] = None,
+    score_passages: Optional[Callable[[List[Passage]], None]] = None,
+    max_passages: Optional[int] = None,
+) -> Tuple[List[Dict[str, Any]], PrepStats]:
+    """
+    Deduplicate and budget search results for the summary prompt.
+
+    Args:
+        results: Normalized results with url, title and content
+        token_budget: Max estimated tokens of source text (SOURCE_TOKEN_BUDGET env)
+        similarity_threshold: Estimated Jaccard at which passages count as duplicates
+        score_passages: Optional callback that sets passage["score"] in place
+        max_passages: Keep at most this many top-scoring passages (SOURCE_MAX_PASSAGES env)
+
+    Returns:
+        Tuple of (sources, stats). Each source keeps its url/title and carries only the
+        selected passages, in their original order. Sources left with no passages are dropped,
+        so the list order is the citation order.
+    """
+    if token_budget is None:
+        token_budget = int(os.environ.get("SOURCE_TOKEN_BUDGET", "2500"))
+    if similarity_threshold is None:
+        similarity_threshold = float(os.environ.get("SOURCE_DEDUP_THRESHOLD", "0.7"))
+    if max_passages is None:
+        max_passages = int(os.environ.get("SOURCE_MAX_PASSAGES", "12"))
+
+    contents = [r.get("content", "") or "" for r in results]
+    boilerplate = find_boilerplate_lines(contents)
+
+    passages: List[Passage] = []
+    boilerplate_removed = 0
+    for source_index, content in enumerate(contents):
+        kept_lines = []
+        for line in content.splitlines():
+            if _normalize_line(line) in boilerplate:
+                boilerplate_removed += 1
+            else:
+                kept_lines.append(line)
+        for position, text in enumerate(split_passages("\n".join(kept_lines))):
+            passages.append({
+                "source_index": source_index,
+                "position": position,
+                "text": text,
+                "tokens": estimate_tokens(text),
+                "score": 0.0,
+            })
+    passages_in = len(passages)
+
+    # Earlier (higher ranked) results win when two passages are near-duplicates
+    unique: List[Passage] = []
+    signatures: List[FrozenSet[int]] = []
+    for passage in passages:
+        signature = minhash_signature(passage["text"])
+        if signature is None:
+            continue
+        if any(estimated_similarity(signature, other) >= similarity_threshold for other in signatures):
+            continue
+        signatures.append(signature)
+        unique.append(passage)
+    duplicates_removed = passages_in - len(unique)
+
+    if score_passages is not None:
+        score_passages(unique)
+    else:
+        for passage in unique:
+            passage["score"] = _default_passage_score(passage)
+
+    selected: List[Passage] = []
+    used_tokens = 0
+    for passage in sorted(unique, key=lambda p: p["score"], reverse=True):
+        if len(selected) >= max_passages:
+            break
+        if used_tokens + passage["tokens"] > token_budget:
+            continue
+        selected.append(passage)
+        used_tokens += passage["tokens"]
+
+    by_source: Dict[int, List[Passage]] = {}
+    for passage in sorted(selected, key=lambda p: (p["source_index"], p["position"])):
+        by_source.setdefault(passage["source_index"], []).append(passage)
+
+    sources = []
+    for source_index, source_passages in by_source.items():
+        result = results[source_index]
+        sources.append({
+            "url": result.get("url", ""),
+            "title": result.get("title", ""),
+            "content": "\n\n".join(p["text"] for p in source_passages),
+        })
+
+    legacy_tokens = sum(estimate_tokens(c[:LEGACY_CHARS_PER_SOURCE]) for c in contents)
+    stats: PrepStats = {
+        "sources_in": len(results),
+        "sources_out": len(sources),
+        "passages_in": passages_in,
+        "passages_out": len(selected),
+        "boilerplate_lines_removed": boilerplate_removed,
+        "duplicates_removed": duplicates_removed,
+        "legacy_tokens": legacy_tokens,
+        "prompt_tokens": used_tokens,
+        "tokens_saved": max(legacy_tokens - used_tokens, 0),
+    }
+    return sources, stats
@@ -1,5 +1,10 @@
 from langchain_core.tools import tool
-from .clients import get_tavily_client
+from .clients import get_tavily_client, SEARCH_TIMEOUT_SECONDS
+from .deadline import call_with_deadline, run_with_timeout
+from .memory_profiler import profile_memory
+from .single_flight import flight_key, single_flight
+from .progress import emit_progress
+from .run_generation import ensure_current_run
 
 
 @tool
@@ -16,16 +21,35 @@ def web_search(question: str) -> dict:
             "error": "Search question cannot be empty"
         }
     
+    # A superseded run stops here rather than paying for the search
+    ensure_current_run("tools")
+    
     try:
         tavily_client = get_tavily_client()
         print(f"🔍 Searching for: '{question}'")
-        response = tavily_client.search(
-            question,
-            search_depth="advanced",
-            max_results=8,
-            include_domains=["mayoclinic.org", "healthline.com", "webmd.com", "medlineplus.gov", "cdc.gov", "nih.gov"]
-        )
+        emit_progress("tools", "started")
+        # The ToolNode is a Runnable rather than a plain node function, so the
+        # search payload is profiled here instead of through profile_node
+        with profile_memory("node:tools"):
+            # Patients asking about the same condition at once share one search
+            response = single_flight(
+                "search",
+                flight_key("search", " ".join(question.lower().split())),
+                lambda: call_with_deadline(
+                    "search",
+                    # The pinned tavily-python client takes no timeout, so bound it from outside
+                    lambda timeout: run_with_timeout(lambda: tavily_client.search(
+                        question,
+                        search_depth="advanced",
+                        max_results=8,
+                        include_domains=["mayoclinic.org", "healthline.com", "webmd.com", "medlineplus.gov", "cdc.gov", "nih.gov"]
+                    ), timeout),
+                    SEARCH_TIMEOUT_SECONDS,
+                    dependency="tavily"
+                )
+            )
         print(f"✅ Search completed successfully")
+        emit_progress("tools", "finished", f"Found {len(response.get('results', []))} sources")
         return response
     except Exception as e:
         print(f"❌ Error in web_search: {e}")
@@ -1,5 +1,8 @@
-from typing import Any, Dict, List, Literal, Optional, TypedDict, Union
-from langgraph.graph.message import MessagesState
+from typing import Annotated, Any, Dict, List, Literal, Optional, TypedDict, Union
+from langchain_core.messages import AnyMessage
+
+from .message_history import append_messages
+from .node_memo import update_memo
 
 
 class MultipleChoiceQuestion(TypedDict):
@@ -13,7 +16,9 @@ class ConfirmationPrompt(TypedDict):
     requires_confirmation: bool
 
 
-class HealthBotState(MessagesState):
+class HealthBotState(TypedDict):
+    # Conversation history; append_messages behaves like add_messages (see message_history.py)
+    messages: Annotated[List[AnyMessage], append_messages]
     # User input and workflow control
     user_message: str
     message_type: Literal["topic", "confirmation", "answer", "restart"]
@@ -47,3 +52,5 @@ class HealthBotState(MessagesState):
     # Special response types for frontend
     response_type: Literal["text", "confirmation", "multiple_choice"]
     confirmation_prompt: Optional[ConfirmationPrompt]
+    # Input hashes of the expensive nodes' current outputs (see node_memo.py)
+    node_memo: Annotated[Dict[str, Any], update_memo]
@@ -0,0 +1,133 @@
+"""
+Container initialization during Lambda's INIT phase.
+
+process_user_message calls initialize() at import, so the work a first
+request used to pay for happens before any request arrives: secrets are
+loaded, the shared AWS clients and the per-profile chat models are built,
+the graph is compiled (which also builds the DynamoDB checkpointer) and
+every prompt template is formatted once. Each step is timed and a failing
+step is logged and left to the usual lazy path.
+
+The same module makes initialization snapshot-safe. When the runtime
+offers snapshot hooks (SnapStart), connections are closed before the
+snapshot and again after restore, so no restored container reuses a
+socket from the snapshot, and `random` is re-seeded so restored copies do
+not share retry jitter. uuid4 IDs read os.urandom and need no re-seeding.
+
+A scheduled `{"warmup": true}` event keeps idle containers warm; the
+handler answers it with handle_warmup() without touching the workflow.
+"""
+
+import os
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .clients import DEFAULT_LLM_PROFILES, get_llm, reset_llm_clients
+from .healthbot_graph import get_graph
+from .metrics import put_metrics
+from .prompts import PROMPTS
+from .workflow_engine import setup_environment
+from ..utils.aws_clients import close_aws_connections, get_aws_client, get_aws_resource
+
+try:
+    # Present in Lambda runtimes with SnapStart
+    from snapshot_restore_py import register_after_restore, register_before_snapshot
+except ImportError:
+    register_after_restore = register_before_snapshot = None
+
+_initialized = False
+
+
+def is_warmup_enabled() -> bool:
+    """Only inside Lambda, so local runs and benchmarks keep their lazy, patchable setup."""
+    if os.environ.get('INIT_WARMUP_DISABLED', '').lower() in {'1', 'true', 'yes'}:
+        return False
+    return bool(os.environ.get('AWS_LAMBDA_FUNCTION_NAME'))
+
+
+def _warm_aws_clients() -> None:
+    dynamodb = get_aws_resource('dynamodb')
+    for table_variable in ('CHAT_SESSIONS_TABLE', 'USER_MESSAGES_TABLE', 'RATE_LIMIT_TABLE',
+                           'IDEMPOTENCY_TABLE', 'SINGLE_FLIGHT_TABLE', 'CIRCUIT_BREAKER_TABLE'):
+        if os.environ.get(table_variable):
+            dynamodb.Table(os.environ[table_variable])
+    if os.environ.get('JOB_QUEUE_URL'):
+        get_aws_client('sqs')
+    if os.environ.get('WEBSOCKET_ENDPOINT'):
+        get_aws_client('apigatewaymanagementapi', endpoint_url=os.environ['WEBSOCKET_ENDPOINT'])
+
+
+def _warm_llm_clients() -> None:
+    for profile in DEFAULT_LLM_PROFILES:
+        get_llm(profile)
+
+
+def _warm_prompts() -> None:
+    for prompt in PROMPTS.values():
+        prompt.template.format_messages(**{name: "" for name in prompt.template.input_variables})
+
+
+INIT_STEPS: List[Tuple[str, Callable[[], Any]]] = [
+    ("secrets", setup_environment),
+    ("aws_clients", _warm_aws_clients),
+    ("llm_clients", _warm_llm_clients),
+    ("graph", get_graph),
+    ("prompts", _warm_prompts),
+]
+
+
+def initialize() -> bool:
+    """Run the INIT steps once per container; returns whether this call ran them."""
+    global _initialized
+    if _initialized or not is_warmup_enabled():
+        return False
+    _initialized = True
+
+    started = time.perf_counter()
+    for step, run in INIT_STEPS:
+        step_started = time.perf_counter()
+        try:
+            run()
+        except Exception as e:
+            print(f"⚠️ Init step {step} failed, it will run lazily on first use: {e}")
+            continue
+        put_metrics({"InitStepDuration": ((time.perf_counter() - step_started) * 1000, "Milliseconds")},
+                    {"Step": step})
+    print(f"🔥 Container initialized in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    if register_before_snapshot is not None:
+        register_before_snapshot(_before_snapshot)
+        register_after_restore(_after_restore)
+    return True
+
+
+def _close_connections() -> None:
+    close_aws_connections()
+    reset_llm_clients()
+
+
+def _before_snapshot() -> None:
+    _close_connections()
+
+
+def _after_restore() -> None:
+    # Restored copies of one snapshot start with identical PRNG state
+    random.seed()
+    _close_connections()
+    # Rebuild the chat models now rather than on the first restored request
+    _warm_llm_clients()
+    print("♻️ Restored from snapshot, connections and randomness reset")
+
+
+def is_warmup_event(event: Any) -> bool:
+    """The scheduled keep-warm ping (EventBridge input `{"warmup": true}`)."""
+    return isinstance(event, dict) and event.get('warmup') is True
+
+
+def handle_warmup(context: Optional[Any] = None) -> Dict[str, Any]:
+    """Answer a keep-warm ping; finishes a skipped INIT but never runs the workflow."""
+    ran_init = initialize()
+    put_metrics({"WarmPing": (1, "Count")}, {"FunctionName": getattr(context, 'function_name', 'local')})
+    print(f"🔥 Warm ping{' (ran init)' if ran_init else ''}")
+    return {'warm': True, 'initialized': _initialized}
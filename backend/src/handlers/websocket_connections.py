@@ -0,0 +1,105 @@
+"""
+WebSocket API handlers and the connections table.
+
+Clients open `wss://…?token=<Cognito access token>` to receive progress
+events for their turns. The token is checked with Cognito on $connect and
+the connection is stored in ConnectionsTable under the caller's `sub`;
+progress events for any of that user's sessions are pushed to it (see
+progress.py), and the client filters by sessionId.
+"""
+
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+
+from ..utils.aws_clients import get_aws_client, get_aws_resource
+
+# API Gateway closes WebSocket connections after two hours at most
+CONNECTION_TTL_SECONDS = 2 * 60 * 60
+
+_dynamodb = None
+_connections_table = None
+_cognito = None
+
+
+def _get_connections_table():
+    """Get the connections table, creating the DynamoDB resource lazily."""
+    global _dynamodb, _connections_table
+    if _connections_table is None:
+        if _dynamodb is None:
+            _dynamodb = get_aws_resource('dynamodb')
+        _connections_table = _dynamodb.Table(os.environ['CONNECTIONS_TABLE'])
+    return _connections_table
+
+
+def _get_cognito():
+    global _cognito
+    if _cognito is None:
+        _cognito = get_aws_client('cognito-idp')
+    return _cognito
+
+
+def _user_id_from_token(token: str) -> Optional[str]:
+    """Resolve an access token to the user's `sub`; None when Cognito rejects it."""
+    try:
+        user = _get_cognito().get_user(AccessToken=token)
+    except ClientError as e:
+        print(f"❌ WebSocket token rejected: {e.response.get('Error', {}).get('Code')}")
+        return None
+    attributes = {a['Name']: a['Value'] for a in user.get('UserAttributes', [])}
+    return attributes.get('sub')
+
+
+def save_connection(connection_id: str, user_id: str) -> None:
+    _get_connections_table().put_item(Item={
+        'connectionId': connection_id,
+        'userId': user_id,
+        'connectedAt': int(time.time()),
+        'ttl': int(time.time()) + CONNECTION_TTL_SECONDS
+    })
+
+
+def delete_connection(connection_id: str) -> None:
+    _get_connections_table().delete_item(Key={'connectionId': connection_id})
+
+
+def get_user_connections(user_id: str) -> List[str]:
+    """Open connection ids for a user, via the UserConnections index."""
+    response = _get_connections_table().query(
+        IndexName='UserConnections',
+        KeyConditionExpression=Key('userId').eq(user_id),
+        ProjectionExpression='connectionId'
+    )
+    return [item['connectionId'] for item in response.get('Items', [])]
+
+
+def connect_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """$connect: authenticate the access token and register the connection."""
+    connection_id = event['requestContext']['connectionId']
+    token = (event.get('queryStringParameters') or {}).get('token')
+    if not token:
+        return {'statusCode': 401, 'body': 'Missing token'}
+
+    user_id = _user_id_from_token(token)
+    if not user_id:
+        return {'statusCode': 401, 'body': 'Unauthorized'}
+
+    save_connection(connection_id, user_id)
+    print(f"🔌 WebSocket connected: {connection_id} for user {user_id}")
+    return {'statusCode': 200, 'body': 'Connected'}
+
+
+def disconnect_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """$disconnect: forget the connection."""
+    connection_id = event['requestContext']['connectionId']
+    delete_connection(connection_id)
+    print(f"🔌 WebSocket disconnected: {connection_id}")
+    return {'statusCode': 200, 'body': 'Disconnected'}
+
+
+def default_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """$default: the socket is push-only; client frames (e.g. keep-alive pings) are ignored."""
+    return {'statusCode': 200, 'body': ''}
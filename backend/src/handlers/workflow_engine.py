@@ -1,11 +1,27 @@
 import os
-from typing import Dict, Any
+import time
+from typing import Dict, Any, Optional
 
-from .healthbot_graph import build_graph
+from .checkpoint_cache import CheckpointConflict
+from .deadline import Deadline
+from .healthbot_graph import get_graph
+from .run_generation import RunGuard, RunSuperseded
+from .session_recorder import start_turn_recording
 from ..utils.secrets_manager import set_secrets_as_env_vars
 
+_secrets_loaded_at: Optional[float] = None
+
 def setup_environment() -> None:
-    """Set up environment variables and secrets."""
+    """
+    Set up environment variables and secrets.
+
+    Secrets are loaded once per container (normally during INIT, see
+    warmup.py) and reloaded after SECRETS_REFRESH_SECONDS (default 300).
+    """
+    global _secrets_loaded_at
+    refresh_seconds = float(os.environ.get('SECRETS_REFRESH_SECONDS', '300'))
+    if _secrets_loaded_at is not None and time.monotonic() - _secrets_loaded_at < refresh_seconds:
+        return
     print("🔐 Loading secrets...")
     secrets = set_secrets_as_env_vars()
     print(f"✅ Loaded secrets keys: {list(secrets.keys())}")
@@ -14,13 +30,22 @@ def setup_environment() -> None:
     openai_key = os.environ.get('OPENAI_API_KEY', '')
     print(f"🔑 OpenAI API Key loaded: {openai_key[:10] if openai_key else 'NOT_FOUND'}...")
     print(f"🔑 OpenAI API Key length: {len(openai_key) if openai_key else 0}")
+    if secrets:
+        _secrets_loaded_at = time.monotonic()
 
-def create_workflow_config(session_id: str) -> Dict[str, Any]:
+def create_workflow_config(session_id: str, deadline: Optional[Deadline] = None,
+                           run_guard: Optional[RunGuard] = None) -> Dict[str, Any]:
     """Create the workflow configuration for LangGraph."""
     config = {
         "configurable": {"thread_id": session_id},
         "recursion_limit": 50  # Increase recursion limit to handle complex workflows
     }
+    if deadline is not None:
+        # Nodes and tools read it back with deadline.current_deadline()
+        config["configurable"]["deadline"] = deadline
+    if run_guard is not None:
+        # Nodes and tools check it with run_generation.ensure_current_run()
+        config["configurable"]["run_guard"] = run_guard
     print(f"🔍 Created workflow config with thread_id: {session_id}, recursion_limit: 50")
     return config
 
@@ -48,7 +73,8 @@ def create_initial_state(message_content: str, message_type: str = 'topic') -> D
     print(f"🔍 Created initial state with user_message: '{message_content}', message_type: '{message_type}'")
     return initial_state
 
-def execute_workflow(session_id: str, message_content: str, message_type: str = 'topic', skip_environment_setup: bool = False) -> Dict[str, Any]:
+def execute_workflow(session_id: str, message_content: str, message_type: str = 'topic', skip_environment_setup: bool = False,
+                     deadline: Optional[Deadline] = None, run_guard: Optional[RunGuard] = None) -> Dict[str, Any]:
     """
     Execute the LangGraph workflow.
     
@@ -57,20 +83,25 @@ def execute_workflow(session_id: str, message_content: str, message_type: str =
         message_content: The user's message content
         message_type: The type of message ('topic', 'confirmation', 'answer', 'restart')
         skip_environment_setup: If True, skip setting up environment (useful when already done)
+        deadline: When set, LLM and search calls are sized to finish before it
+        run_guard: When set, the run stops with RunSuperseded once a newer message arrives
     
     Returns:
         The final state from the workflow execution
+
+    Raises CheckpointConflict if another run wrote the session's state
+    first; run_message keeps runs of one session apart (session_turns.py).
     """
     # Set up environment (unless skipped)
     if not skip_environment_setup:
         setup_environment()
     
     # Create workflow configuration
-    config = create_workflow_config(session_id)
+    config = create_workflow_config(session_id, deadline, run_guard)
     
-    # Create the graph
+    # Get the graph (compiled once per container)
     try:
-        graph = build_graph()
+        graph = get_graph()
         print("✅ Graph created successfully")
     except Exception as e:
         print(f"❌ Error creating graph: {e}")
@@ -86,6 +117,11 @@ def execute_workflow(session_id: str, message_content: str, message_type: str =
     print(f"🔍 Config: {config}")
     print("🔍 DEBUG: About to check for existing state...")
     
+    # Capture external responses for offline replay when this session is sampled
+    recorder = start_turn_recording(session_id, message_type, message_content)
+    if recorder:
+        config["callbacks"] = [recorder]
+    
     try:
         # Create the initial state with the user message
         # LangGraph will automatically load existing state from the checkpoint
@@ -105,9 +141,17 @@ def execute_workflow(session_id: str, message_content: str, message_type: str =
         new_state = graph.invoke(initial_state, config=config)
         print(f"✅ Workflow completed, final status: {new_state.get('status', 'unknown')}")
         print(f"🔍 Final state keys: {list(new_state.keys())}")
+        if recorder:
+            recorder.finish(new_state)
         return new_state
+    except (RunSuperseded, CheckpointConflict) as concurrent:
+        if recorder:
+            recorder.finish(error=str(concurrent))
+        raise
     except Exception as invoke_error:
         print(f"❌ Error invoking graph: {invoke_error}")
+        if recorder:
+            recorder.finish(error=str(invoke_error))
         import traceback
         traceback.print_exc()
         raise Exception(f"Workflow execution failed: {str(invoke_error)}")
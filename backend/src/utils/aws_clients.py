@@ -0,0 +1,105 @@
+"""
+Shared boto3 session, clients and resources for the whole container.
+
+Every module gets its AWS clients from here instead of calling boto3
+directly, so one tuned botocore Config (connection pool size, TCP
+keepalive, short connect/read timeouts, adaptive retries) applies
+everywhere and each client is built once per container. Warm invocations
+then reuse both the client objects and their pooled connections.
+
+The shared session is also installed as boto3's default session, so
+libraries that call `boto3.client()` themselves (the DynamoDB
+checkpointer) pick up the same Config.
+"""
+
+import os
+import threading
+import weakref
+from typing import Any, Dict, Optional, Tuple
+
+import boto3
+import botocore.session
+from botocore.config import Config
+
+_session: Optional[boto3.session.Session] = None
+# Every client made through the shared session, including those inside resources
+# and the ones libraries create through boto3's default session
+_created: "weakref.WeakSet" = weakref.WeakSet()
+_clients: Dict[Tuple[str, Optional[str]], Any] = {}
+_resources: Dict[str, Any] = {}
+# boto3 sessions are not thread-safe while creating clients
+_lock = threading.RLock()
+
+
+class _TrackingSession(boto3.session.Session):
+    """Remembers the clients it creates so their connections can be closed together."""
+
+    def client(self, *args, **kwargs):
+        client = super().client(*args, **kwargs)
+        _created.add(client)
+        return client
+
+
+def get_boto_config() -> Config:
+    """The botocore Config shared by every client."""
+    return Config(
+        max_pool_connections=int(os.environ.get('AWS_MAX_POOL_CONNECTIONS', '50')),
+        tcp_keepalive=True,
+        connect_timeout=float(os.environ.get('AWS_CONNECT_TIMEOUT_SECONDS', '2')),
+        read_timeout=float(os.environ.get('AWS_READ_TIMEOUT_SECONDS', '5')),
+        retries={
+            'mode': os.environ.get('AWS_RETRY_MODE', 'adaptive'),
+            'total_max_attempts': int(os.environ.get('AWS_MAX_ATTEMPTS', '3'))
+        }
+    )
+
+
+def get_aws_session() -> boto3.session.Session:
+    """The container's boto3 session, also installed as boto3's default session."""
+    global _session
+    with _lock:
+        if _session is None:
+            core = botocore.session.get_session()
+            core.set_default_client_config(get_boto_config())
+            _session = _TrackingSession(botocore_session=core,
+                                       region_name=os.environ.get('AWS_REGION', 'us-east-1'))
+            boto3.DEFAULT_SESSION = _session
+    return _session
+
+
+def get_aws_client(service_name: str, endpoint_url: Optional[str] = None) -> Any:
+    """Get the container's client for a service (and endpoint), creating it on first use."""
+    key = (service_name, endpoint_url)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = get_aws_session().client(service_name, endpoint_url=endpoint_url)
+                _clients[key] = client
+    return client
+
+
+def get_aws_resource(service_name: str) -> Any:
+    """Get the container's resource for a service, creating it on first use."""
+    resource = _resources.get(service_name)
+    if resource is None:
+        with _lock:
+            resource = _resources.get(service_name)
+            if resource is None:
+                resource = get_aws_session().resource(service_name)
+                _resources[service_name] = resource
+    return resource
+
+
+def close_aws_connections() -> None:
+    """
+    Close the pooled connections of every client made through the shared session.
+
+    The clients stay usable and reconnect on their next call; used when
+    connections may be stale, as after a snapshot restore.
+    """
+    with _lock:
+        clients = list(_created)
+    for client in clients:
+        client.close()
@@ -1,8 +1,9 @@
 import json
-import boto3
 import os
 from typing import Dict, Any
 
+from .aws_clients import get_aws_client
+
 def get_secrets() -> Dict[str, str]:
     """
     Retrieve secrets from AWS Secrets Manager and return them as a dictionary.
@@ -12,12 +13,8 @@ def get_secrets() -> Dict[str, str]:
         # Get the secret name from environment variable or use default
         secret_name = os.environ.get('SECRETS_NAME', 'healthbot-backend-secrets-dev')
         
-        # Create a Secrets Manager client
-        session = boto3.session.Session()
-        client = session.client(
-            service_name='secretsmanager',
-            region_name=os.environ.get('AWS_REGION', 'us-east-1')
-        )
+        # Reuse the container's Secrets Manager client
+        client = get_aws_client('secretsmanager')
         
         # Get the secret value
         response = client.get_secret_value(SecretId=secret_name)
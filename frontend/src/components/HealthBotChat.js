@@ -16,8 +16,10 @@ export default function HealthBotChat() {
   const [showQuiz, setShowQuiz] = useState(false);
   const [sessionId, setSessionId] = useState(null);
   const [pendingConfirmation, setPendingConfirmation] = useState(null);
+  const [progressLabel, setProgressLabel] = useState(null);
 
   const messagesEndRef = useRef(null);
+  const sessionIdRef = useRef(null);
   const navigate = useNavigate();
 
   const scrollToBottom = () => {
@@ -28,6 +30,33 @@ export default function HealthBotChat() {
     scrollToBottom();
   }, [messages]);
 
+  useEffect(() => {
+    sessionIdRef.current = sessionId;
+  }, [sessionId]);
+
+  useEffect(() => {
+    // Show what the backend is doing while a turn runs
+    let socket = null;
+    let closed = false;
+    apiService.openProgressSocket((event) => {
+      if (!sessionIdRef.current || event.sessionId === sessionIdRef.current) {
+        setProgressLabel(event.message || event.label);
+      }
+    }).then((opened) => {
+      socket = opened;
+      if (closed && socket) {
+        socket.close();
+      }
+    }).catch((error) => console.error('Could not open progress socket:', error));
+
+    return () => {
+      closed = true;
+      if (socket) {
+        socket.close();
+      }
+    };
+  }, []);
+
   useEffect(() => {
     // Initialize with welcome message
     addMessage({
@@ -148,6 +177,7 @@ export default function HealthBotChat() {
       throw error;
     } finally {
       setIsTyping(false);
+      setProgressLabel(null);
     }
   };
 
@@ -477,6 +507,7 @@ export default function HealthBotChat() {
                   <span></span>
                   <span></span>
                 </div>
+                {progressLabel && <div className="progress-label">{progressLabel}</div>}
               </div>
             </div>
           )}
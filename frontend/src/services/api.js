@@ -3,6 +3,7 @@ import { getCurrentUser, fetchAuthSession } from 'aws-amplify/auth';
 class ApiService {
   constructor() {
     this.baseUrl = process.env.REACT_APP_API_GATEWAY_URL;
+    this.webSocketUrl = process.env.REACT_APP_WEBSOCKET_URL;
     console.log('API Service initialized with base URL:', this.baseUrl);
   }
 
@@ -29,28 +30,51 @@ class ApiService {
     }
   }
 
+  async openProgressSocket(onProgress) {
+    // Progress events are optional; without a WebSocket URL the chat just waits
+    if (!this.webSocketUrl) {
+      return null;
+    }
+    const session = await fetchAuthSession();
+    if (!session.tokens || !session.tokens.accessToken) {
+      return null;
+    }
+
+    const socket = new WebSocket(`${this.webSocketUrl}?token=${encodeURIComponent(session.tokens.accessToken.toString())}`);
+    socket.onmessage = (message) => {
+      try {
+        const event = JSON.parse(message.data);
+        if (event.type === 'progress') {
+          onProgress(event);
+        }
+      } catch (error) {
+        console.error('Error parsing progress event:', error);
+      }
+    };
+    socket.onerror = (error) => console.error('Progress socket error:', error);
+    return socket;
+  }
+
   async sendMessage(message, sessionId = null, messageType = 'topic') {
     try {
       console.log('Sending message to API:', { message, sessionId, messageType });
       const token = await this.getAuthToken();
       
+      // Retries reuse the key, so the backend replays the original response
+      // instead of running the message twice
       const requestBody = {
         message: message,
         messageType: messageType,
+        idempotencyKey: crypto.randomUUID(),
+        // Topic turns (search + summary) can outlast the API Gateway timeout,
+        // so they run as a job that we poll for
+        async: messageType === 'topic',
         ...(sessionId && { sessionId })
       };
 
       console.log('Request body:', requestBody);
 
-      // Use fetch directly instead of Amplify API
-      const response = await fetch(`${this.baseUrl}/api/messages`, {
-        method: 'POST',
-        headers: {
-          'Authorization': `Bearer ${token}`,
-          'Content-Type': 'application/json'
-        },
-        body: JSON.stringify(requestBody)
-      });
+      const response = await this.postMessageWithRetry(requestBody, token);
 
       console.log('API response status:', response.status);
 
@@ -60,7 +84,11 @@ class ApiService {
         throw new Error(`HTTP error! status: ${response.status}, message: ${errorText}`);
       }
 
-      const responseBody = await response.json();
+      let responseBody = await response.json();
+      if (response.status === 202) {
+        console.log('Message accepted as job:', responseBody.jobId);
+        responseBody = await this.waitForJob(responseBody.jobId, token);
+      }
       console.log('API response:', responseBody);
       return responseBody;
     } catch (error) {
@@ -69,6 +97,124 @@ class ApiService {
     }
   }
 
+  async waitForJob(jobId, token, timeoutMs = 180000) {
+    const deadline = Date.now() + timeoutMs;
+    while (Date.now() < deadline) {
+      const response = await fetch(`${this.baseUrl}/api/jobs/${encodeURIComponent(jobId)}`, {
+        method: 'GET',
+        headers: {
+          'Authorization': `Bearer ${token}`
+        }
+      });
+      if (!response.ok) {
+        const errorText = await response.text();
+        throw new Error(`HTTP error! status: ${response.status}, message: ${errorText}`);
+      }
+
+      const job = await response.json();
+      if (job.status === 'succeeded') {
+        return job.result;
+      }
+      if (job.status === 'failed') {
+        throw new Error(`HTTP error! status: ${job.statusCode}, message: ${JSON.stringify(job.result)}`);
+      }
+
+      const retryAfter = Number(response.headers.get('Retry-After')) || 1;
+      await new Promise((resolve) => setTimeout(resolve, retryAfter * 1000));
+    }
+    throw new Error('Timed out waiting for the response. Please try again.');
+  }
+
+  async postMessageWithRetry(requestBody, token, attempts = 3) {
+    for (let attempt = 1; ; attempt++) {
+      let response = null;
+      try {
+        // Use fetch directly instead of Amplify API
+        response = await fetch(`${this.baseUrl}/api/messages`, {
+          method: 'POST',
+          headers: {
+            'Authorization': `Bearer ${token}`,
+            'Content-Type': 'application/json'
+          },
+          body: JSON.stringify(requestBody)
+        });
+      } catch (error) {
+        if (attempt >= attempts) {
+          throw error;
+        }
+        console.warn('Network error sending message, retrying:', error);
+      }
+
+      // 409: the original is still running; 502/503/504: gateway gave up on it
+      const retryable = response && [409, 502, 503, 504].includes(response.status);
+      if (response && (!retryable || attempt >= attempts)) {
+        return response;
+      }
+
+      const retryAfter = Number(response?.headers.get('Retry-After')) || attempt;
+      await new Promise((resolve) => setTimeout(resolve, retryAfter * 1000));
+    }
+  }
+
+  async listSessions({ cursor = null, limit = 20 } = {}) {
+    try {
+      const token = await this.getAuthToken();
+      const params = new URLSearchParams({ limit: String(limit) });
+      if (cursor) {
+        params.set('cursor', cursor);
+      }
+
+      const response = await fetch(`${this.baseUrl}/api/sessions?${params}`, {
+        method: 'GET',
+        headers: {
+          'Authorization': `Bearer ${token}`
+        }
+      });
+
+      if (!response.ok) {
+        const errorText = await response.text();
+        throw new Error(`HTTP error! status: ${response.status}, message: ${errorText}`);
+      }
+
+      // { sessions: [{ sessionId, lastActivity, messageCount, topic }], nextCursor }
+      return await response.json();
+    } catch (error) {
+      console.error('Error listing sessions:', error);
+      throw error;
+    }
+  }
+
+  async getSessionMessages(sessionId, { cursor = null, limit = 50, order = 'asc' } = {}) {
+    try {
+      const token = await this.getAuthToken();
+      const params = new URLSearchParams({ limit: String(limit), order });
+      if (cursor) {
+        params.set('cursor', cursor);
+      }
+
+      const response = await fetch(
+        `${this.baseUrl}/api/sessions/${encodeURIComponent(sessionId)}/messages?${params}`,
+        {
+          method: 'GET',
+          headers: {
+            'Authorization': `Bearer ${token}`
+          }
+        }
+      );
+
+      if (!response.ok) {
+        const errorText = await response.text();
+        throw new Error(`HTTP error! status: ${response.status}, message: ${errorText}`);
+      }
+
+      // { sessionId, messages: [{ messageId, timestamp, content, type }], nextCursor }
+      return await response.json();
+    } catch (error) {
+      console.error('Error loading session messages:', error);
+      throw error;
+    }
+  }
+
   // Test method to verify API connectivity
   async testConnection() {
     try {